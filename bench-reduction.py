@@ -0,0 +1,31 @@
+import random
+import time
+from persil import *
+
+
+def randomPoints(n,D): # returns a list of n random points in the unit cube of dimension D
+    l = [ tuple([random.random() for i in range(D)]) for j in range(n)]
+    return l
+
+
+# same complex as test-rips.py, with a fixed seed so that runs can be compared
+random.seed(0)
+l = randomPoints(1000,3)
+
+r = RipsComplex(l,threshold = 0.23)
+r.compute_skeleton(2)
+print("Rips complex with {} simplices".format(r.complex._numSimplices))
+
+reference = None
+for backend in ["chain","z2"]:
+    for algorithm in ["standard","twist","cohomology"]:
+        start = time.perf_counter()
+        zc = ZomorodianCarlsson(r.complex,backend = backend,algorithm = algorithm)
+        zc.computeIntervals()
+        elapsed = time.perf_counter() - start
+
+        intervals = [sorted(zc.getIntervals(k)) for k in range(zc.dim+1)]
+        if reference is None:
+            reference = (elapsed,intervals)
+        same = "same intervals" if intervals == reference[1] else "DIFFERENT INTERVALS"
+        print("{:>6} {:>10}: {:7.2f}s  x{:.1f}  {}".format(backend,algorithm,elapsed,reference[0]/elapsed,same))
@@ -0,0 +1,116 @@
+"""
+Micro-benchmark of Simplex objects over a full Rips run, on a complex which
+is not columnar. For each step, prints the time, the number of memory blocks
+allocated during the step and still alive at its end, and the peak memory,
+both measured with tracemalloc:
+- skeleton: RipsComplex.compute_skeleton, which creates one Simplex per simplex
+- checked: the same simplices inserted again in a new complex without the
+  trusted flag, which looks up all their faces
+- lookups: the degree of every simplex and of its faces, twice
+- zc_init and intervals: ZomorodianCarlsson on the complex
+
+Then the simplices of the complex are built from their vertices, put in a
+dict and looked up with their faces twice, first with BaselineSimplex, a copy
+of Simplex before its hash was kept, then with Simplex, with the speedup over
+BaselineSimplex for each step.
+
+    python bench-simplex.py [n] [threshold]
+"""
+
+import random
+import sys
+import time
+import tracemalloc
+
+from persil import *
+
+
+class BaselineSimplex:
+    # Simplex as it was before this benchmark was added: vertices are a sorted copy of the
+    # list, hashed again at each lookup, and faces are created at each call
+    def __init__(self,l):
+        self.vertices = l[:]
+        self.vertices.sort()
+        self.dim = len(l)
+
+    def __eq__(self,other):
+        return (self.vertices == other.vertices)
+
+    def __hash__(self):
+        return hash(tuple(self.vertices))
+
+    def faces(self):
+        res = []
+        for i in range(self.dim):
+            res.append(BaselineSimplex(self.vertices[:i]+self.vertices[i+1:]))
+        return res
+
+
+def measure(name,f,times = None,baseline = None):
+    # times, if given, receives the time of the step under its name, and the speedup over
+    # the time of baseline[name] is printed if baseline is given
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    start = time.perf_counter()
+    res = f()
+    elapsed = time.perf_counter() - start
+    after = tracemalloc.take_snapshot()
+    _,peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    blocks = sum(stat.count_diff for stat in after.compare_to(before,"filename") if stat.count_diff > 0)
+    speedup = "  x{:.1f}".format(baseline[name]/elapsed) if baseline else ""
+    print("{:>10}: {:7.3f}s {:>10} blocks alive {:>8.1f} MB peak{}".format(name,elapsed,blocks,peak/2**20,speedup))
+    if times is not None:
+        times[name] = elapsed
+    return res
+
+
+n = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+threshold = float(sys.argv[2]) if len(sys.argv) > 2 else 0.3
+random.seed(0)
+points = [tuple(random.random() for i in range(3)) for j in range(n)]
+
+r = RipsComplex(points,threshold = threshold)
+measure("skeleton",lambda: r.compute_skeleton(2))
+fc = r.complex
+print("{} simplices".format(fc._numSimplices))
+
+def checked():
+    other = FilteredComplex()
+    for s in fc._simplices:
+        other.insert(list(s.vertices),fc._degrees_dict[s])
+    return other
+other = measure("checked",checked)
+
+def lookups():
+    total = 0
+    for i in range(2):
+        for s in other._simplices:
+            total += other.degree(s)
+            for f in s.faces():
+                total += other.degree(f)
+    return total
+measure("lookups",lookups)
+
+zc = measure("zc_init",lambda: ZomorodianCarlsson(other))
+measure("intervals",zc.computeIntervals)
+
+vertices = [list(s.vertices) for s in fc._simplices]
+def simplexSteps(cls,times,baseline):
+    simplices = measure("build",lambda: [cls(l) for l in vertices],times,baseline)
+    table = measure("table",lambda: {s: i for (i,s) in enumerate(simplices)},times,baseline)
+    def faceLookups():
+        total = 0
+        for i in range(2):
+            for s in simplices:
+                total += table[s]
+                for f in (s.faces() if s.dim > 1 else []):
+                    total += table[f]
+        return total
+    measure("lookups",faceLookups,times,baseline)
+
+baseline = {}
+print("BaselineSimplex")
+simplexSteps(BaselineSimplex,baseline,None)
+print("Simplex")
+simplexSteps(Simplex,None,baseline)
@@ -0,0 +1,232 @@
+"""
+Benchmark suite for persil.
+
+Each case builds a Rips complex on a seeded point cloud (random points in a
+cube, or samples of a circle, a sphere or a torus), or a triangulated surface
+of known homology, and times separately:
+- distances: RipsComplex.__init__, that is compute_dist_matrix (or
+  compute_neighbourhood_graph for sparse cases)
+- skeleton: RipsComplex.compute_skeleton
+- zc_init: ZomorodianCarlsson.__init__
+- intervals: ZomorodianCarlsson.computeIntervals
+
+Each phase is timed several times without tracing, then run once more under
+tracemalloc to record its peak memory. Results are written as JSON, with the
+simplex counts of each dimension and the number of intervals, and can be
+compared with the results of a previous version:
+
+    python bench-suite.py --output new.json
+    python bench-suite.py --output new.json --compare old.json
+
+The comparison exits with status 1 if a phase got slower than the tolerance
+allows, or if the complex or the intervals changed.
+"""
+
+import argparse
+import gc
+import json
+import math
+import platform
+import itertools
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+from persil import *
+
+
+def cubePoints(n,D,rng): # n random points in the unit cube of dimension D
+    return rng.random((n,D))
+
+def circlePoints(n,D,rng): # n points on the unit circle, with a little noise
+    t = rng.random(n)*2*math.pi
+    return np.column_stack((np.cos(t),np.sin(t))) + rng.normal(0,0.01,(n,2))
+
+def spherePoints(n,D,rng): # n points on the unit sphere of R^D
+    X = rng.normal(size = (n,D))
+    return X / np.linalg.norm(X,axis = 1)[:,None]
+
+def torusPoints(n,D,rng): # n points on a torus of radii 2 and 1 in R^3
+    u,v = rng.random(n)*2*math.pi,rng.random(n)*2*math.pi
+    return np.column_stack(((2+np.cos(v))*np.cos(u),(2+np.cos(v))*np.sin(u),np.sin(v)))
+
+CLOUDS = {"cube": cubePoints,"circle": circlePoints,"sphere": spherePoints,"torus": torusPoints}
+
+
+def triangulatedTorus(m):
+    """
+    Returns a FilteredComplex triangulating the torus with an m*m grid of
+    vertices, each simplex having its index as degree. Its homology has
+    ranks 1, 2, 1.
+    """
+    fc = FilteredComplex(columnar = True)
+    vertex = lambda i,j: (i%m)*m + j%m
+    triangles = []
+    for i in range(m):
+        for j in range(m):
+            triangles.append(sorted([vertex(i,j),vertex(i+1,j),vertex(i+1,j+1)]))
+            triangles.append(sorted([vertex(i,j),vertex(i,j+1),vertex(i+1,j+1)]))
+    edges = sorted(set(tuple(e) for t in triangles for e in ([t[0],t[1]],[t[0],t[2]],[t[1],t[2]])))
+    degree = 0
+    for simplices in ([[v] for v in range(m*m)],edges,triangles):
+        fc.extend(np.array(simplices,dtype = np.int64),np.arange(degree,degree+len(simplices),dtype = float))
+        degree += len(simplices)
+    return fc
+
+
+def sphereBoundary(d):
+    """
+    Returns a FilteredComplex containing all faces of the boundary of the
+    (d+1)-simplex, a d-sphere, filtered by dimension. Its homology has
+    ranks 1 in dimensions 0 and d.
+    """
+    fc = FilteredComplex(columnar = True)
+    for k in range(1,d+2):
+        faces = np.array(list(itertools.combinations(range(d+2),k)),dtype = np.int64)
+        fc.extend(faces,np.full(len(faces),float(k)))
+    return fc
+
+
+# name, kind, parameters. Rips cases give the cloud, number of points n, ambient dimension D,
+# threshold, maximum dimension of the skeleton, and options of RipsComplex and ZomorodianCarlsson.
+QUICK = [
+    ("cube-500-3d","rips",dict(cloud = "cube",n = 500,D = 3,threshold = 0.25,maxDimension = 2)),
+    ("cube-1000-3d","rips",dict(cloud = "cube",n = 1000,D = 3,threshold = 0.23,maxDimension = 2)),
+    ("cube-1000-3d-sparse","rips",dict(cloud = "cube",n = 1000,D = 3,threshold = 0.23,maxDimension = 2,sparse = True)),
+    ("cube-300-8d","rips",dict(cloud = "cube",n = 300,D = 8,threshold = 0.6,maxDimension = 2)),
+    ("circle-400","rips",dict(cloud = "circle",n = 400,D = 2,threshold = 0.5,maxDimension = 2)),
+    ("sphere-400","rips",dict(cloud = "sphere",n = 400,D = 3,threshold = 0.5,maxDimension = 3)),
+    ("torus-600","rips",dict(cloud = "torus",n = 600,D = 3,threshold = 0.8,maxDimension = 2)),
+    ("torus-grid-60","complex",dict(surface = "torus",m = 60)),
+    ("sphere-boundary-12","complex",dict(surface = "sphere",d = 12)),
+]
+FULL = QUICK + [
+    ("cube-3000-3d","rips",dict(cloud = "cube",n = 3000,D = 3,threshold = 0.15,maxDimension = 2,columnar = True)),
+    ("cube-5000-3d-sparse","rips",dict(cloud = "cube",n = 5000,D = 3,threshold = 0.12,maxDimension = 2,sparse = True,columnar = True)),
+    ("sphere-1500","rips",dict(cloud = "sphere",n = 1500,D = 3,threshold = 0.3,maxDimension = 3,columnar = True)),
+    ("torus-2000","rips",dict(cloud = "torus",n = 2000,D = 3,threshold = 0.5,maxDimension = 2,columnar = True)),
+    ("torus-grid-200","complex",dict(surface = "torus",m = 200)),
+]
+SUITES = {"quick": QUICK,"full": FULL}
+
+
+def phases(kind,params,seed,zcOptions):
+    # yields the (name,function) of the phases of a case, each function taking the result of the previous one
+    if kind == "rips":
+        def distances(_):
+            points = CLOUDS[params["cloud"]](params["n"],params["D"],np.random.default_rng(seed))
+            return RipsComplex(points,threshold = params["threshold"],sparse = params.get("sparse",False))
+        def skeleton(r):
+            r.compute_skeleton(params["maxDimension"],columnar = params.get("columnar",False))
+            return r.complex
+        yield ("distances",distances)
+        yield ("skeleton",skeleton)
+    else:
+        def build(_):
+            if params["surface"] == "torus":
+                return triangulatedTorus(params["m"])
+            return sphereBoundary(params["d"])
+        yield ("complex",build)
+    yield ("zc_init",lambda fc: ZomorodianCarlsson(fc,**zcOptions))
+    def intervals(zc):
+        zc.computeIntervals()
+        return zc
+    yield ("intervals",intervals)
+
+
+def runCase(name,kind,params,seed,repeat,memory,zcOptions):
+    result = {"name": name,"kind": kind,"params": params,"seed": seed,"zc": zcOptions,"time": {},"peak_memory": {}}
+    for run in range(repeat + (1 if memory else 0)):
+        traced = run == repeat
+        value = None
+        for (phase,function) in phases(kind,params,seed,zcOptions):
+            gc.collect()
+            if traced:
+                tracemalloc.start()
+            start = time.perf_counter()
+            value = function(value)
+            elapsed = time.perf_counter() - start
+            if traced:
+                result["peak_memory"][phase] = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+            else:
+                result["time"][phase] = min(elapsed,result["time"].get(phase,math.inf))
+        zc = value
+    result["simplices"] = [zc._dimStart[k+1]-zc._dimStart[k] for k in range(1,zc.dim+1)]
+    result["intervals"] = [len(zc.intervals[k]) for k in range(zc.dim+1)]
+    result["infinite_intervals"] = [sum(1 for (b,d) in zc.intervals[k] if d == math.inf) for k in range(zc.dim+1)]
+    result["total_time"] = sum(result["time"].values())
+    return result
+
+
+def environment():
+    try:
+        from importlib.metadata import version
+        persilVersion = version("persil")
+    except Exception:
+        persilVersion = None
+    return {"persil": persilVersion,"python": platform.python_version(),"numpy": np.__version__,
+            "machine": platform.machine(),"processor": platform.processor(),"system": platform.system()}
+
+
+def compare(results,previous,tolerance):
+    # prints the differences with previous results, returns the number of regressions
+    old = dict((r["name"],r) for r in previous["results"])
+    regressions = 0
+    for r in results:
+        if r["name"] not in old:
+            continue
+        o = old[r["name"]]
+        for key in ("simplices","intervals","infinite_intervals"):
+            if r[key] != o[key]:
+                print("{}: {} changed from {} to {}".format(r["name"],key,o[key],r[key]))
+                regressions += 1
+        for (phase,t) in r["time"].items():
+            # very short phases are too noisy to be compared by ratio alone
+            if phase in o["time"] and t > tolerance*o["time"][phase] + 0.02:
+                print("{}: {} is slower, {:.3f}s instead of {:.3f}s".format(r["name"],phase,t,o["time"][phase]))
+                regressions += 1
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description = "Benchmarks Rips construction and persistence computations.")
+    parser.add_argument("--suite",choices = sorted(SUITES),default = "quick")
+    parser.add_argument("--cases",nargs = "*",help = "names of the cases to run, all by default")
+    parser.add_argument("--seed",type = int,default = 0)
+    parser.add_argument("--repeat",type = int,default = 3,help = "number of timed runs, the best one is kept")
+    parser.add_argument("--no-memory",action = "store_true",help = "skip the traced run measuring peak memory")
+    parser.add_argument("--backend",choices = ["chain","z2"])
+    parser.add_argument("--algorithm",choices = ["standard","twist","cohomology"],default = "standard")
+    parser.add_argument("--output",help = "JSON file receiving the results")
+    parser.add_argument("--compare",help = "JSON file of previous results")
+    parser.add_argument("--tolerance",type = float,default = 1.25,help = "allowed slowdown ratio when comparing")
+    args = parser.parse_args()
+
+    zcOptions = {"algorithm": args.algorithm}
+    if args.backend:
+        zcOptions["backend"] = args.backend
+    results = []
+    for (name,kind,params) in SUITES[args.suite]:
+        if args.cases and name not in args.cases:
+            continue
+        r = runCase(name,kind,params,args.seed,args.repeat,not args.no_memory,zcOptions)
+        results.append(r)
+        memory = max(r["peak_memory"].values()) / 2**20 if r["peak_memory"] else float("nan")
+        times = "  ".join("{} {:.3f}s".format(phase,t) for (phase,t) in r["time"].items())
+        print("{:<22} {:>9} simplices  {}  peak {:.1f} MiB".format(name,sum(r["simplices"]),times,memory))
+
+    report = {"environment": environment(),"date": time.strftime("%Y-%m-%dT%H:%M:%S"),"results": results}
+    if args.output:
+        with open(args.output,"w") as f:
+            json.dump(report,f,indent = 1)
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)
+        if compare(results,previous,args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
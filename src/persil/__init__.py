@@ -1,6 +1,12 @@
 from .simplexchain import *
 from .homology import *
+from .diagrams import *
 from .graphical import *
 from .vietorisrips import *
+from .witness import *
+from .batch import *
+from .sweep import *
+from .cubical import *
+from .metrics import *
 
-__all__ = ["simplexchain","homology","graphical","vietorisrips","Simplex","FilteredComplex","ZomorodianCarlsson","persistence_diagram","barcode","RipsComplex"]
+__all__ = ["simplexchain","homology","diagrams","graphical","vietorisrips","witness","batch","sweep","cubical","storage","metrics","Simplex","FilteredComplex","ZomorodianCarlsson","PersistenceDiagram","persistence_diagram","barcode","RipsComplex","WitnessComplex","batch_persistence","RipsSweep","CubicalComplex","loadIntervals","Metrics"]
@@ -0,0 +1,146 @@
+# Persistence of many small point clouds, computed in a pool of processes. Clouds are sent
+# to the processes by chunks, so that the cost of a task is not dominated by inter-process
+# communication, and only a bounded number of chunks is waiting or running at any time.
+
+from .vietorisrips import RipsComplex, euclidianDistance
+from .homology import FilteredComplex, ZomorodianCarlsson
+
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from math import comb
+import itertools
+import os
+import numpy as np
+
+
+# In worker processes, the options of batch_persistence, sent once to each process
+_batchOptions = None
+
+# In each process, the simplices of the complete complexes already built, by number of points
+# and dimension, reused for all the clouds of the same size
+_skeletonTemplates = {}
+# largest number of simplices of the highest dimension of a complete complex kept as a template
+_templateSize = 1 << 18
+# number of templates kept by a process
+_templateCount = 16
+
+def _initBatchWorker(options):
+    global _batchOptions
+    _batchOptions = options
+
+def _skeletonTemplate(r,maxDimension):
+    # for each k from 1 to maxDimension+2, the array of all the simplices of k vertices on the
+    # points of r, and the array of the positions of their edges in r.distances
+    key = (r.nPoints,maxDimension)
+    template = _skeletonTemplates.get(key)
+    if template is None:
+        if len(_skeletonTemplates) >= _templateCount:
+            _skeletonTemplates.clear()
+        template = []
+        for k in range(1,maxDimension+3):
+            vertices = np.array(list(itertools.combinations(range(r.nPoints),k)),dtype = np.int64).reshape(-1,k)
+            edges = np.stack([r._condensedIndex(vertices[:,a],vertices[:,b]) for (a,b) in itertools.combinations(range(k),2)] or [np.zeros(len(vertices),dtype = np.int64)],axis = 1)
+            template.append((vertices,edges))
+        _skeletonTemplates[key] = template
+    return template
+
+def _templateComplex(r,maxDimension):
+    # the skeleton of the Rips complex r, whose simplices are those of the complete complex of
+    # the same size under the threshold: only their degrees are computed
+    arrays = []
+    for (vertices,edges) in _skeletonTemplate(r,maxDimension):
+        degrees = r.distances[edges].max(axis = 1) if vertices.shape[1] > 1 else np.zeros(len(vertices))
+        kept = degrees < r.threshold
+        if kept.any():
+            arrays.append((vertices[kept],degrees[kept]))
+    return FilteredComplex.from_arrays(arrays,trusted = True)
+
+def _cloudIntervals(points,options):
+    # intervals of dimensions 0..maxDimension of the Rips complex of points
+    maxDimension = options["maxDimension"]
+    intervals = [[] for k in range(maxDimension+1)]
+    if len(points) == 0:
+        return intervals
+    r = RipsComplex(points,options["distance"],options["threshold"])
+    if not options["collapse"] and comb(r.nPoints,maxDimension+2) <= _templateSize:
+        fc = _templateComplex(r,maxDimension)
+    else:
+        r.compute_skeleton(maxDimension+1,columnar = options["columnar"],collapse = options["collapse"])
+        fc = r.complex
+    zc = ZomorodianCarlsson(fc,algorithm = options["algorithm"],dimensions = list(range(maxDimension+1)))
+    zc.computeIntervals()
+    for k in range(min(maxDimension+1,len(zc.intervals))):
+        intervals[k] = zc.intervals[k]
+    return intervals
+
+def _batchChunk(chunk):
+    return [(i,_cloudIntervals(points,_batchOptions)) for (i,points) in chunk]
+
+
+def batch_persistence(clouds,maxDimension = 1,threshold = None,distance = euclidianDistance,n_jobs = None,chunksize = 16,maxInFlight = None,ordered = False,algorithm = "cohomology",columnar = False,collapse = False):
+    """
+    Computes the persistence intervals of the Rips complexes of many
+    point clouds, in a pool of processes. Yields couples (i,intervals)
+    as soon as they are computed, where i is the position of the cloud
+    in clouds and intervals[k] is the list of intervals of dimension k,
+    for k up to maxDimension.
+
+    Arguments:
+    - clouds: iterable of point clouds, each one given as to RipsComplex.
+    It is read lazily, as chunks are sent to the processes.
+    - maxDimension: highest dimension of the intervals. Default value: 1
+    - threshold, distance: as in RipsComplex, the same for all clouds.
+    A custom distance function must be picklable.
+    - n_jobs: number of processes. With 1, clouds are processed in the
+    current process. Default value: the number of CPUs
+    - chunksize: number of clouds sent to a process at once. Default value: 16
+    - maxInFlight: maximum number of chunks sent and not yet yielded, which
+    bounds memory use. Default value: twice the number of processes
+    - ordered: if True, results are yielded in the order of clouds, which
+    may keep more results waiting. Default value: False
+    - algorithm, columnar, collapse: passed to ZomorodianCarlsson and to
+    RipsComplex.compute_skeleton.
+
+    Each process keeps the simplices of the complete complexes on the
+    numbers of points it has seen, up to 2**18 simplices of the highest
+    dimension. The skeleton of a cloud of the same size is then made of
+    these simplices under the threshold, and only their degrees are
+    computed, unless collapse is set. These complexes are columnar.
+    """
+    options = {"maxDimension": maxDimension,"threshold": threshold,"distance": distance,
+               "algorithm": algorithm,"columnar": columnar,"collapse": collapse}
+    if n_jobs is None:
+        n_jobs = os.cpu_count() or 1
+    clouds = enumerate(clouds)
+    if n_jobs <= 1:
+        for (i,points) in clouds:
+            yield i,_cloudIntervals(points,options)
+        return
+    if maxInFlight is None:
+        maxInFlight = 2*n_jobs
+
+    with ProcessPoolExecutor(max_workers = n_jobs,initializer = _initBatchWorker,initargs = (options,)) as pool:
+        running = {}
+        waiting = {} # results of the chunks finished before the ones before them, when ordered
+        nextChunk = 0 # number of the next chunk to yield, when ordered
+        submitted = 0
+        exhausted = False
+        while True:
+            while not exhausted and len(running) + len(waiting) < maxInFlight:
+                chunk = list(itertools.islice(clouds,chunksize))
+                if not chunk:
+                    exhausted = True
+                    break
+                running[pool.submit(_batchChunk,chunk)] = submitted
+                submitted += 1
+            if not running:
+                break
+            done,_ = wait(running,return_when = FIRST_COMPLETED)
+            for future in done:
+                number = running.pop(future)
+                if not ordered:
+                    yield from future.result()
+                else:
+                    waiting[number] = future.result()
+            while nextChunk in waiting:
+                yield from waiting.pop(nextChunk)
+                nextChunk += 1
@@ -0,0 +1,195 @@
+# Cubical complexes of images and volumes, filtered by the lower star of their voxel values. No
+# cell is created as an object: cells of each dimension are numbered in blocks, one block by set
+# of directions, and the faces of a whole block are found at once from the strides of the grids.
+
+from collections.abc import Sequence
+import bisect
+import itertools
+import numpy as np
+
+
+class Cube:
+    """
+    Cell of a CubicalComplex. vertices is the sorted tuple of the flat
+    indices of its voxels, and dim is its dimension plus one, as for a
+    Simplex, so that a cube with 2**k voxels has dim k+1.
+    """
+    __slots__ = ("vertices","dim")
+
+    def __init__(self,vertices):
+        self.vertices = tuple(sorted(vertices))
+        self.dim = len(self.vertices).bit_length()
+
+    def __eq__(self,other):
+        return isinstance(other,Cube) and self.vertices == other.vertices
+
+    def __hash__(self):
+        return hash(self.vertices)
+
+    def __str__(self):
+        return str(list(self.vertices))
+
+    def __repr__(self):
+        return "Cube{}".format(str(self))
+
+
+class _CubicalCells(Sequence):
+    # cells of a CubicalComplex in filtration order, built as Cube objects when they are accessed
+    def __init__(self,complex):
+        self._complex = complex
+
+    def __len__(self):
+        return self._complex._numSimplices
+
+    def __getitem__(self,i):
+        c = self._complex
+        k = bisect.bisect_right(c._dimStart,i)-1
+        vertices = [int(c._firstVoxel[k][i-c._dimStart[k]])]
+        directions = int(c._directions[k][i-c._dimStart[k]])
+        for (axis,stride) in enumerate(c._strides):
+            if directions >> axis & 1:
+                vertices += [x+stride for x in vertices]
+        return Cube(vertices)
+
+
+def _gridIndex(shape,strides,offset = 0):
+    # flat array of offset + sum of x[i]*strides[i] over the points x of a grid of the given
+    # shape, in C order, built by broadcasting one range per axis
+    res = np.full((1,)*len(shape),offset,dtype = np.int64)
+    for (i,n) in enumerate(shape):
+        axis = [1]*len(shape)
+        axis[i] = n
+        res = res + (np.arange(n,dtype = np.int64)*strides[i]).reshape(axis)
+    return res.reshape(-1)
+
+def _cStrides(shape):
+    # strides, in number of elements, of an array of the given shape in C order
+    strides = [1]*len(shape)
+    for i in range(len(shape)-2,-1,-1):
+        strides[i] = strides[i+1]*shape[i+1]
+    return strides
+
+
+class CubicalComplex:
+    """
+    Cubical complex of a grid of voxels, filtered by the lower star of
+    their values: each voxel is a vertex, adjacent voxels along one axis
+    are joined by edges, and so on up to cubes of dimension d for an
+    array with d axes. The value of a cell is the highest value of its
+    voxels. It is given to ZomorodianCarlsson instead of a FilteredComplex,
+    and is reduced like one:
+
+        zc = ZomorodianCarlsson(CubicalComplex(image),algorithm = "twist")
+
+    With the "twist" algorithm, the apparent pairs, which make most of
+    the pairs of an image, are found with numpy before the reduction,
+    and only the other columns are reduced. The cells of the pairs are
+    Cube objects, whose vertices are flat indices in the array.
+
+    Parameters:
+
+    values : numpy array of any number of axes, the values of the voxels.
+
+    Cells of dimension k-1 have indices in range(self._dimStart[k],
+    self._dimStart[k+1]), sorted by value, and then by their highest
+    voxel in the order of values (ties broken by flat index) and by
+    block. self._faces[k] holds their faces, 2 per direction, in an order
+    where the boundary coefficient of column i is (-1)**i.
+
+    """
+    def __init__(self,values):
+        values = np.asarray(values,dtype = float)
+        self.shape = values.shape
+        self.values = values
+        d = values.ndim
+        flat = values.reshape(-1)
+        order = np.argsort(flat,kind = 'stable')
+        sortedValues = flat[order]
+        # rank of each voxel in the order of values, which orders the cells with the same value
+        rank = np.empty(len(flat),dtype = np.int64)
+        rank[order] = np.arange(len(flat),dtype = np.int64)
+        rank = rank.reshape(self.shape)
+        voxelStrides = _cStrides(self.shape)
+        self._strides = voxelStrides
+
+        self._cubical = True
+        self._columnar = False
+        self._dimension = d
+        self._maxDeg = float(sortedValues[-1]) if len(flat) else 0
+        self._dimStart = [0,0]
+        self._faces = [None]
+        self._firstVoxel = [None] # by cell, its voxel of lowest coordinates
+        self._directions = [None] # by cell, the bit mask of its directions
+        cellValues = []
+        blocks = {} # by set of directions, (offset of the block among its dimension,shape of its grid)
+        position = None # position in the sorted order of the dimension below, by number of the cell in its block
+        for q in range(d+1):
+            owners = []
+            firstVoxel = []
+            directions = []
+            faces = []
+            count = 0
+            for S in itertools.combinations(range(d),q):
+                shape = tuple(n-1 if i in S else n for (i,n) in enumerate(self.shape))
+                size = int(np.prod(shape)) if all(n > 0 for n in shape) else 0
+                blocks[S] = (count,shape)
+                count += size
+                if size == 0:
+                    continue
+                # highest rank of the voxels of each cell, by maximum of the shifted grids
+                m = rank
+                for i in S:
+                    m = np.maximum(m.take(range(0,m.shape[i]-1),axis = i),m.take(range(1,m.shape[i]),axis = i))
+                owners.append(m.reshape(-1))
+                firstVoxel.append(_gridIndex(shape,voxelStrides))
+                directions.append(np.full(size,sum(1 << i for i in S),dtype = np.int64))
+                block = np.zeros((size,2*q),dtype = np.int64)
+                for (r,i) in enumerate(S):
+                    offset,faceShape = blocks[tuple(x for x in S if x != i)]
+                    faceStrides = _cStrides(faceShape)
+                    back = _gridIndex(shape,faceStrides,offset)
+                    front = back + faceStrides[i]
+                    # the coefficients of the front and back faces along the r-th direction are (-1)**r and -(-1)**r
+                    block[:,2*r],block[:,2*r+1] = (front,back) if r%2 == 0 else (back,front)
+                faces.append(block)
+            if count == 0:
+                owners,firstVoxel,directions = [[np.zeros(0,dtype = np.int64)] for i in range(3)]
+                faces = [np.zeros((0,2*q),dtype = np.int64)]
+            owners = np.concatenate(owners)
+            cellOrder = np.argsort(owners,kind = 'stable')
+            cellValues.append(sortedValues[owners[cellOrder]])
+            self._firstVoxel.append(np.concatenate(firstVoxel)[cellOrder])
+            self._directions.append(np.concatenate(directions)[cellOrder])
+            faces = np.concatenate(faces)[cellOrder]
+            if q > 0:
+                faces = position[faces] + self._dimStart[q]
+            self._faces.append(faces)
+            position = np.empty(count,dtype = np.int64)
+            position[cellOrder] = np.arange(count,dtype = np.int64)
+            self._dimStart.append(self._dimStart[-1]+count)
+
+        self._values = np.concatenate(cellValues)
+        self._numSimplices = self._dimStart[-1]
+        self.cells = _CubicalCells(self)
+
+    def __len__(self):
+        return self._numSimplices
+
+    def vertexArray(self,k,cells):
+        """
+        Returns the array of the flat indices of the voxels of the cells
+        of dimension k-1 whose positions among this dimension are given
+        by the array cells, one row of 2**(k-1) sorted indices by cell.
+        """
+        first = self._firstVoxel[k][cells]
+        directions = self._directions[k][cells]
+        rows = first[:,None].repeat(1 << (k-1),axis = 1)
+        # the r-th voxel moves along the directions whose rank in the cell, counted from the
+        # last axis, is a bit of r, so rows are sorted
+        ranks = np.zeros(len(cells),dtype = np.int64)
+        for i in range(len(self.shape)-1,-1,-1):
+            has = ((directions >> i) & 1).astype(bool)
+            bits = (np.arange(1 << (k-1))[None,:] >> ranks[:,None]) & 1
+            rows += np.where(has[:,None],bits*self._strides[i],0)
+            ranks += has
+        return rows
@@ -0,0 +1,433 @@
+# Persistence diagrams as numpy arrays of births and deaths, with vectorized summaries
+# (Betti curves, landscapes, images) and the bottleneck and Wasserstein distances.
+
+from numpy import inf
+from collections import deque
+import numpy as np
+
+
+# number of float64 entries allowed in a temporary block of (grid point,interval) values
+_blockSize = 1 << 22
+
+
+class PersistenceDiagram:
+    def __init__(self,intervals):
+        """
+        Diagram of the intervals (birth,death) of one dimension.
+
+        Arguments:
+        - intervals: list of couples (x,y) of reals, where y may be inf, as in
+        ZomorodianCarlsson.intervals[k], or array of shape (n,2) as returned
+        by loadIntervals.
+
+        Attributes:
+        - births, deaths: arrays of the births and deaths of the intervals
+        - sortedBirths, sortedDeaths: the same arrays, sorted
+        """
+        intervals = np.asarray(intervals,dtype = float).reshape(-1,2)
+        self.births = intervals[:,0].copy()
+        self.deaths = intervals[:,1].copy()
+        self.sortedBirths = np.sort(self.births)
+        self.sortedDeaths = np.sort(self.deaths)
+
+    def __len__(self):
+        return len(self.births)
+
+    def finite(self):
+        """
+        Returns the arrays of the births and deaths of the finite intervals.
+        """
+        finite = self.deaths < inf
+        return self.births[finite],self.deaths[finite]
+
+    def essential(self):
+        """
+        Returns the sorted array of the births of the infinite intervals.
+        """
+        return np.sort(self.births[self.deaths == inf])
+
+    def bettiCurve(self,grid,p = 0):
+        """
+        Returns the array of the persistent Betti numbers at the values of
+        grid: the number of intervals (x,y) with x <= l and l+p < y, for
+        each l in grid, as in ZomorodianCarlsson.bettiNumber. With p = 0,
+        this is the number of births up to l minus the number of deaths up
+        to l, found by binary search in the sorted births and deaths.
+        """
+        grid = np.asarray(grid,dtype = float)
+        if p < 0:
+            return np.zeros(grid.shape,dtype = np.int64)
+        if p == 0:
+            return np.searchsorted(self.sortedBirths,grid,side = 'right') - np.searchsorted(self.sortedDeaths,grid,side = 'right')
+        flat = grid.ravel()
+        res = np.zeros(len(flat),dtype = np.int64)
+        rows = max(1,_blockSize // max(1,len(self)))
+        for a in range(0,len(flat),rows):
+            l = flat[a:a+rows,None]
+            res[a:a+rows] = ((self.births[None,:] <= l) & (self.deaths[None,:] > l+p)).sum(axis = 1)
+        return res.reshape(grid.shape)
+
+    def landscape(self,grid,levels = 1):
+        """
+        Returns the persistence landscape of Bubenik, "Statistical topological
+        data analysis using persistence landscapes", at the values of grid, as
+        an array of shape (levels,len(grid)): row k is the (k+1)-th largest
+        value of max(0,min(t-x,y-t)) over the intervals (x,y), at each t.
+        """
+        grid = np.asarray(grid,dtype = float).ravel()
+        res = np.zeros((levels,len(grid)))
+        m = min(levels,len(self))
+        if m == 0:
+            return res
+        rows = max(1,_blockSize // len(self))
+        for a in range(0,len(grid),rows):
+            t = grid[a:a+rows,None]
+            tents = np.maximum(np.minimum(t-self.births[None,:],self.deaths[None,:]-t),0.)
+            if m < len(self):
+                tents = np.partition(tents,len(self)-m,axis = 1)[:,len(self)-m:]
+            res[:m,a:a+rows] = -np.sort(-tents,axis = 1).T
+        return res
+
+    def image(self,resolution = 20,sigma = None,birthRange = None,persistenceRange = None,weight = None):
+        """
+        Returns the persistence image of Adams et al., "Persistence images: a
+        stable vector representation of persistent homology", of the finite
+        intervals, as an array of shape (resolution,resolution) whose rows go
+        by increasing persistence and columns by increasing birth. Each
+        interval (x,y) is a gaussian of standard deviation sigma centered at
+        (x,y-x), of weight weight(x,y-x), sampled at the centers of the pixels.
+        Gaussians are separable, so the image is a product of two matrices.
+
+        Arguments:
+        - resolution: number of pixels on each side. Default value: 20
+        - sigma: standard deviation. Default value: a pixel of the largest range
+        - birthRange, persistenceRange: couples (min,max) covered by the image.
+        Default value: the range of the intervals
+        - weight: function of the arrays of births and persistences returning
+        an array of weights. Default value: persistence divided by the largest
+        persistence
+        """
+        x,y = self.finite()
+        pers = y - x
+        if birthRange is None:
+            birthRange = (x.min(),x.max()) if len(x) else (0.,1.)
+        if persistenceRange is None:
+            persistenceRange = (0.,pers.max()) if len(x) else (0.,1.)
+        if sigma is None:
+            sigma = max(birthRange[1]-birthRange[0],persistenceRange[1]-persistenceRange[0])/resolution or 1.
+        if weight is None:
+            w = pers/pers.max() if len(x) and pers.max() > 0 else np.ones(len(x))
+        else:
+            w = np.asarray(weight(x,pers),dtype = float)
+        def centers(r):
+            step = (r[1]-r[0])/resolution
+            return r[0] + step*(np.arange(resolution)+0.5)
+        gx = np.exp(-(centers(birthRange)[None,:]-x[:,None])**2/(2*sigma**2))
+        gy = np.exp(-(centers(persistenceRange)[None,:]-pers[:,None])**2/(2*sigma**2))
+        return (gy*w[:,None]).T @ gx / (2*np.pi*sigma**2)
+
+    def _essentialCosts(self,other):
+        # distances between the infinite intervals, matched by order of birth, None if their numbers differ
+        e1,e2 = self.essential(),other.essential()
+        if len(e1) != len(e2):
+            return None
+        return np.abs(e1-e2)
+
+    def bottleneck(self,other):
+        """
+        Returns the bottleneck distance to the diagram other, in the L-inf
+        norm: the smallest e such that intervals can be matched with each
+        other or with the diagonal, each one moving by at most e.
+
+        Two intervals are only worth matching if they are closer than half
+        the persistence of one of them, otherwise both can go to the
+        diagonal instead. The distance is first bounded by doubling a value
+        e until it is reached: each time, the pairs closer than e are found
+        in the intervals sorted by birth, and e is tested with Hopcroft-Karp
+        matchings which must cover the intervals farther than e from the
+        diagonal, one matching for each diagram. The distance is then found
+        by binary search among the costs of these pairs and the distances
+        to the diagonal. The matchings of each test start from those of
+        the previous one.
+        """
+        essential = self._essentialCosts(other)
+        if essential is None:
+            return inf
+        res = essential.max() if len(essential) else 0.
+        x1,y1 = self.finite()
+        x2,y2 = other.finite()
+        diagonal1,diagonal2 = (y1-x1)/2,(y2-x2)/2
+        # every interval can go to the diagonal at e = top
+        top = max(diagonal1.max() if len(x1) else 0.,diagonal2.max() if len(x2) else 0.)
+        if top <= res:
+            return float(res)
+        # one matching covers the far intervals of self, with those of other, and the other one
+        # covers the far intervals of other: a matching covering both exists if these two do
+        matchings = [([-1]*len(x1),[-1]*len(x2)),([-1]*len(x2),[-1]*len(x1))]
+        e = max(res,top/1024)
+        while True:
+            e = min(e,top)
+            i,j,costs = _closePairs(x1,y1,diagonal1,x2,y2,diagonal2,e)
+            sides = [_MatchingGraph(i,j,costs,diagonal1,*matchings[0]),_MatchingGraph(j,i,costs,diagonal2,*matchings[1])]
+            if e == top or all(side.covers(e) for side in sides):
+                break
+            e *= 2
+        candidates = np.unique(np.concatenate((diagonal1,diagonal2,costs,[res])))
+        candidates = candidates[(candidates >= res) & (candidates <= e)]
+        lo,hi = 0,len(candidates)-1
+        while lo < hi:
+            mid = (lo+hi)//2
+            if all(side.covers(candidates[mid]) for side in sides):
+                hi = mid
+            else:
+                lo = mid+1
+        return float(candidates[lo])
+
+    def wasserstein(self,other,q = 1):
+        """
+        Returns the q-Wasserstein distance to the diagram other, in the
+        L-inf norm: the smallest (sum of e^q)^(1/q) over the matchings of
+        intervals with each other or with the diagonal, where e is the
+        distance by which each interval moves.
+
+        Points are matched as in the square cost matrix of the points of
+        both diagrams and of copies of the diagonal, whose copies are only
+        matched with each other at no cost. Two points are only worth
+        matching if e^q is lower than the sum of their distances to the
+        diagonal to the power q, so as for the bottleneck distance, only
+        the close pairs are edges: each point of a diagram is joined to
+        these points of the other one and to its own copy of the diagonal,
+        and the two copies of a close pair are joined. The optimal
+        assignment is found by shortest augmenting paths on these edges,
+        in pure Python and numpy: about 1 second for diagrams of 500
+        intervals, 2 to 7 seconds for 1000 and 10 to 40 seconds for 2000,
+        the longest for diagrams that are far from each other, whose
+        points mostly go to the diagonal.
+        """
+        essential = self._essentialCosts(other)
+        if essential is None:
+            return inf
+        total = float((essential**q).sum())
+        x1,y1 = self.finite()
+        x2,y2 = other.finite()
+        diagonal1,diagonal2 = ((y1-x1)/2)**q,((y2-x2)/2)**q
+        # pairs closer than the sum of their distances to the diagonal, for q = 1, which
+        # includes the pairs worth matching for all q
+        i,j,d = _closePairs(x1,y1,y1-x1,x2,y2,y2-x2,inf)
+        costs = d**q
+        keep = costs < diagonal1[i] + diagonal2[j]
+        i,j,costs = i[keep],j[keep],costs[keep]
+        # rows are the points of self, then the copies of the diagonal for other, and columns
+        # the points of other, then the copies of the diagonal for self
+        n,m = len(x1),len(x2)
+        rows = np.concatenate((i,np.arange(n),n+j,n+np.arange(m)))
+        columns = np.concatenate((j,m+np.arange(n),m+i,np.arange(m)))
+        costs = np.concatenate((costs,diagonal1,np.zeros(len(i)),diagonal2))
+        # the search starts from zero potentials, which stay of the order of the costs of the
+        # matching, so that e^q is not lost next to the distances to the diagonal for large q
+        rowMatch = np.full(n+m,-1,dtype = np.int64)
+        colMatch = np.full(n+m,-1,dtype = np.int64)
+        u,v = np.zeros(n+m),np.zeros(n+m)
+        _assignment(rows,columns,costs,rowMatch,colMatch,u,v)
+        total += costs[rowMatch[rows] == columns].sum()
+        return float(total**(1/q))
+
+
+def _assignment(rows,columns,costs,rowMatch,colMatch,u,v):
+    # Completes the matching of rows and columns given by rowMatch and colMatch (-1 when
+    # unmatched) into a minimum cost perfect matching, where row rows[e] may take column
+    # columns[e] for costs[e], by shortest augmenting paths with the potentials u of the rows
+    # and v of the columns, as in Jonker and Volgenant. The potentials must be zero on the
+    # matched edges, and non negative on the other edges of the matched rows. Each path is
+    # found with Dijkstra's algorithm from a free row, among the columns reached so far,
+    # scanning the edges of a row with numpy. Returns rowMatch.
+    n,m = len(rowMatch),len(colMatch)
+    order = np.argsort(rows,kind = 'stable')
+    columns,costs = columns[order],costs[order]
+    starts = np.zeros(n+1,dtype = np.int64)
+    np.cumsum(np.bincount(rows,minlength = n),out = starts[1:])
+    starts = starts.tolist()
+    shortest = np.full(m,inf)
+    path = np.full(m,-1,dtype = np.int64)
+    seen = np.zeros(m,dtype = bool) # reached by the search
+    done = np.zeros(m,dtype = bool) # visited by the search
+    for root in np.flatnonzero(rowMatch < 0).tolist():
+        visitedRows = [root]
+        visitedColumns = []
+        # columns reached by the search and not yet visited, the only candidates for the next step
+        frontier = np.zeros(0,dtype = np.int64)
+        r = root
+        low = 0.
+        while True:
+            cols = columns[starts[r]:starts[r+1]]
+            reduced = low + costs[starts[r]:starts[r+1]] - u[r] - v[cols]
+            better = ~done[cols] & (reduced < shortest[cols])
+            shortest[cols[better]] = reduced[better]
+            path[cols[better]] = r
+            new = cols[better & ~seen[cols]]
+            seen[new] = True
+            frontier = np.concatenate((frontier,new))
+            if len(frontier) == 0:
+                raise ValueError("No assignment of all the rows")
+            values = shortest[frontier]
+            low = values.min()
+            # among the closest columns, a free one ends the path
+            ties = np.flatnonzero(values == low)
+            free = ties[colMatch[frontier[ties]] < 0]
+            k = int(free[0] if len(free) else ties[0])
+            c = int(frontier[k])
+            frontier = np.delete(frontier,k)
+            done[c] = True
+            visitedColumns.append(c)
+            if colMatch[c] < 0:
+                break
+            r = int(colMatch[c])
+            visitedRows.append(r)
+        # potentials keep the reduced costs of all edges non negative, and zero on the matching
+        u[root] += low
+        others = np.array(visitedRows[1:],dtype = np.int64)
+        u[others] += low - shortest[rowMatch[others]]
+        visitedColumns = np.array(visitedColumns,dtype = np.int64)
+        v[visitedColumns] -= low - shortest[visitedColumns]
+        # augments along the path back to the root
+        while True:
+            r = int(path[c])
+            colMatch[c] = r
+            rowMatch[r],c = c,rowMatch[r]
+            if r == root:
+                break
+        touched = np.concatenate((frontier,visitedColumns))
+        shortest[touched] = inf
+        path[touched] = -1
+        seen[touched] = False
+        done[touched] = False
+    return rowMatch
+
+def _closePairs(x1,y1,r1,x2,y2,r2,bound):
+    # pairs (i,j) of points (x1[i],y1[i]) and (x2[j],y2[j]) at L-inf distance at most bound and
+    # lower than r1[i] or r2[j], with their distances. The points close to a point are found
+    # among those whose x is close enough, by binary search in the sorted x, and the blocks of
+    # candidates are filtered with numpy.
+    def within(xp,yp,rp,xq,yq):
+        order = np.argsort(xq,kind = 'stable')
+        xs = xq[order]
+        reach = np.minimum(rp,bound)
+        lo = np.searchsorted(xs,xp-reach,side = 'left')
+        hi = np.maximum(np.searchsorted(xs,xp+reach,side = 'right'),lo)
+        ends = np.cumsum(hi-lo)
+        found = []
+        a = 0
+        while a < len(xp):
+            # rows a..b-1 have at most _blockSize candidates, or are a single row
+            b = max(a+1,int(np.searchsorted(ends,(ends[a-1] if a else 0)+_blockSize,side = 'right')))
+            counts = hi[a:b]-lo[a:b]
+            p = np.repeat(np.arange(a,b),counts)
+            q = order[np.arange(counts.sum()) - np.repeat(np.cumsum(counts)-counts-lo[a:b],counts)]
+            d = np.maximum(np.abs(xp[p]-xq[q]),np.abs(yp[p]-yq[q]))
+            keep = (d < rp[p]) & (d <= bound)
+            found.append((p[keep],q[keep],d[keep]))
+            a = b
+        return found
+    blocks = within(x1,y1,r1,x2,y2) + [(i,j,d) for (j,i,d) in within(x2,y2,r2,x1,y1)]
+    i,j,d = [np.concatenate([block[t] for block in blocks] + [np.zeros(0,dtype = float if t == 2 else np.int64)]) for t in range(3)]
+    _,first = np.unique(i*len(x2)+j,return_index = True)
+    return i[first],j[first],d[first]
+
+
+class _MatchingGraph:
+    # Bipartite graph of rows and columns whose edge (rows[e],columns[e]) has cost costs[e], with
+    # a matching, given by the lists rowMatch and colMatch, kept from one call of covers to the
+    # next. Rows of the graph are the points of a diagram, columns those of the other one, and
+    # diagonal holds the distances of the rows to the diagonal.
+    def __init__(self,rows,columns,costs,diagonal,rowMatch,colMatch):
+        order = np.lexsort((costs,rows))
+        self.rows = rows[order]
+        self.costs = costs[order]
+        self.indptr = np.zeros(len(diagonal)+1,dtype = np.int64)
+        np.cumsum(np.bincount(self.rows,minlength = len(diagonal)),out = self.indptr[1:])
+        self.indices = columns[order].tolist()
+        self.diagonal = diagonal
+        self.rowMatch = rowMatch
+        self.colMatch = colMatch
+
+    def covers(self,e):
+        # whether the edges of cost at most e have a matching covering the rows farther than e
+        # from the diagonal. Matched edges which are now too long, and matched rows which can
+        # now go to the diagonal, are freed, and the others are kept.
+        allowed = self.costs <= e
+        # edges of each row are sorted by cost, so the allowed ones come first
+        ends = (self.indptr[:-1] + np.bincount(self.rows[allowed],minlength = len(self.diagonal))).tolist()
+        starts = self.indptr[:-1].tolist()
+        far = np.flatnonzero(self.diagonal > e).tolist()
+        needed = set(far)
+        rowMatch,colMatch = self.rowMatch,self.colMatch
+        for r in range(len(rowMatch)):
+            c = rowMatch[r]
+            if c >= 0 and (r not in needed or c not in self.indices[starts[r]:ends[r]]):
+                rowMatch[r] = colMatch[c] = -1
+        return _hopcroftKarp(self.indices,starts,ends,far,rowMatch,colMatch)
+
+def _hopcroftKarp(indices,starts,ends,rows,rowMatch,colMatch):
+    # Hopcroft-Karp algorithm: augments the matching given by rowMatch and colMatch (-1 when
+    # unmatched) along shortest augmenting paths, by phases, until all rows of rows are matched
+    # or no augmenting path is left. Row r may be matched with the columns
+    # indices[starts[r]:ends[r]]. Returns whether all rows of rows are matched.
+    free = []
+    for r in rows:
+        if rowMatch[r] >= 0:
+            continue
+        # greedy start, with the first free column of the row
+        for c in indices[starts[r]:ends[r]]:
+            if colMatch[c] < 0:
+                rowMatch[r],colMatch[c] = c,r
+                break
+        else:
+            free.append(r)
+    while free:
+        # layers of the rows by distance from the free rows, up to the first free column
+        layer = dict.fromkeys(free,0)
+        queue = deque(free)
+        limit = None
+        while queue:
+            r = queue.popleft()
+            if limit is not None and layer[r] >= limit:
+                break
+            for c in indices[starts[r]:ends[r]]:
+                s = colMatch[c]
+                if s < 0:
+                    limit = layer[r]+1
+                elif s not in layer:
+                    layer[s] = layer[r]+1
+                    queue.append(s)
+        if limit is None:
+            return False
+        # disjoint shortest augmenting paths, found by depth first search along the layers
+        position = {}
+        for root in free:
+            path = [root]
+            position[root] = starts[root]
+            while path:
+                r = path[-1]
+                p = position[r]
+                if p == ends[r]:
+                    # dead end, which no other path of this phase goes through
+                    layer[r] = None
+                    path.pop()
+                    continue
+                position[r] = p+1
+                c = indices[p]
+                s = colMatch[c]
+                if s < 0:
+                    if layer[r]+1 != limit:
+                        continue
+                    # augments along the path, each row taking the column it went through
+                    for r in reversed(path):
+                        previous = rowMatch[r]
+                        rowMatch[r],colMatch[c] = c,r
+                        c = previous
+                    break
+                if layer.get(s) == layer[r]+1 and s not in position:
+                    position[s] = starts[s]
+                    path.append(s)
+        free = [r for r in free if rowMatch[r] < 0]
+    return True
@@ -1,28 +1,43 @@
 from numpy import inf
+from matplotlib.collections import LineCollection
 import matplotlib.pyplot as plt
+import numpy as np
 
 
 
 
 def get_min_max(intervals):
-	p_min = inf
-	p_max = -inf
-	for (x,y) in intervals:
-		p_min = min(p_min,x)
-		p_max = max(p_max,x)
-		if y != inf:
-			p_max = max(p_max,y)
-	return p_min,p_max
-
-def persistence_diagram(intervals,saveAs = None):
+	intervals = np.asarray(intervals,dtype = float).reshape(-1,2)
+	if len(intervals) == 0:
+		return inf,-inf
+	finite = intervals[:,1][intervals[:,1] < inf]
+	return intervals[:,0].min(),max(intervals[:,0].max(),finite.max() if len(finite) else -inf)
+
+def _finish(saveAs):
+	# saves the current figure if saveAs is set, shows it otherwise
+	if saveAs:
+		plt.savefig(saveAs)
+		plt.close()
+		print("Saved figure at " + saveAs)
+	else:
+		plt.show()
+
+def persistence_diagram(intervals,saveAs = None,density = False,bins = 200):
 	"""
 	Plots the persistence diagram of the input list.
 	Arguments:
-	- intervals: list of tuples (x,y) of reals. y may be inf
+	- intervals: list of tuples (x,y) of reals, or array of shape (n,2).
+	y may be inf
 	- saveAs: optional. String specifying a path / name to
 	save the image of the diagram. If set, the function will not
 	show the diagram but only save it.
+	- density: optional. If set to True, finite intervals are drawn
+	as a 2D histogram of bins x bins cells, on a logarithmic color
+	scale, instead of one marker each. Useful for very large diagrams.
+	Default value: False
+	- bins: number of cells on each side of the histogram. Default value: 200
 	"""
+	intervals = np.asarray(intervals,dtype = float).reshape(-1,2)
 	if len(intervals) == 0:
 		fig, ax = plt.subplots()
 		lower_limit = 0
@@ -30,11 +45,7 @@ def persistence_diagram(intervals,saveAs = None):
 		ax.set_xlim(left = lower_limit,right = upper_limit)
 		ax.set_ylim(bottom = lower_limit,top = upper_limit)
 		ax.plot([lower_limit, upper_limit],[lower_limit , upper_limit],'b-')
-		if saveAs:
-			plt.savefig(saveAs)
-			print("Saved figure at " + saveAs)
-		else:
-			plt.show()
+		_finish(saveAs)
 		return
 
 	p_min, p_max = get_min_max(intervals)
@@ -49,27 +60,37 @@ def persistence_diagram(intervals,saveAs = None):
 	ax.set_ylim(bottom = lower_limit,top = upper_limit)
 	ax.plot([lower_limit, upper_limit],[lower_limit , upper_limit],'b-')
 
-	for (x,y) in set(intervals):
-		if y == inf:
-			ax.plot([x,x],[x,upper_limit],'g-')
+	# all points of a kind are drawn at once, repeated intervals only once
+	intervals = np.unique(intervals,axis = 0)
+	essential = intervals[intervals[:,1] == inf,0]
+	finite = intervals[intervals[:,1] < inf]
+	if len(essential):
+		ax.add_collection(LineCollection(np.stack([np.stack([essential,essential],axis = 1),np.stack([essential,np.full(len(essential),upper_limit)],axis = 1)],axis = 2),colors = 'g'))
+	if len(finite):
+		if density:
+			counts,xedges,yedges = np.histogram2d(finite[:,0],finite[:,1],bins = bins)
+			counts = np.ma.masked_equal(counts,0)
+			ax.pcolormesh(xedges,yedges,counts.T,norm = "log",cmap = "Reds")
 		else:
-			ax.plot([x],[y],'ro')
+			ax.scatter(finite[:,0],finite[:,1],c = 'r',s = 20,linewidths = 0)
 
-	if saveAs:
-		plt.savefig(saveAs)
-		plt.close()
-		print("Saved figure at " + saveAs)
-	else:
-		plt.show()
+	_finish(saveAs)
 
 
 
 
 
-def barcode(intervals):
+def barcode(intervals,saveAs = None):
 	"""
 	Plot the barcode corresponding to the input list.
+	Arguments:
+	- intervals: list of tuples (x,y) of reals, or array of shape (n,2).
+	y may be inf
+	- saveAs: optional. String specifying a path / name to
+	save the image of the barcode. If set, the function will not
+	show the barcode but only save it.
 	"""
+	intervals = np.asarray(intervals,dtype = float).reshape(-1,2)
 	p_min, p_max = get_min_max(intervals)
 	dp = p_max - p_min
 
@@ -77,15 +98,17 @@ def barcode(intervals):
 	upper_limit = p_max + dp/5
 
 	fig, ax = plt.subplots()
-	ax.set_xlim(left = lower_limit,right = upper_limit)
-
-	n = len(intervals)
-	for i in range(n):
-		(x,y) = intervals[i]
-		if x == y:
-			ax.plot([x],[y],'ro')
-		elif y == inf:
-			ax.plot([x,upper_limit],[i,i],'r-')
-		else:
-			ax.plot([x,y],[i,i],'r-')
-	plt.show()
+	if len(intervals):
+		ax.set_xlim(left = lower_limit,right = upper_limit)
+		ax.set_ylim(bottom = -1,top = len(intervals))
+
+	rows = np.arange(len(intervals),dtype = float)
+	x,y = intervals[:,0],intervals[:,1]
+	points = x == y
+	ends = np.where(y == inf,upper_limit,y)
+	bars = ~points
+	if bars.any():
+		ax.add_collection(LineCollection(np.stack([np.stack([x[bars],rows[bars]],axis = 1),np.stack([ends[bars],rows[bars]],axis = 1)],axis = 1),colors = 'r'))
+	if points.any():
+		ax.scatter(x[points],rows[points],c = 'r',s = 20,linewidths = 0)
+	_finish(saveAs)
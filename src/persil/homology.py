@@ -1,16 +1,131 @@
 from .simplexchain import *
+from .storage import writeArrays, readArrays
+from .diagrams import PersistenceDiagram
 from numpy import inf
+from math import comb
+from array import array
+from collections.abc import Mapping, Sequence
+import bisect
+import heapq
+import time
+import numpy as np
 
 # FilteredComplex class (note that filtrations are non-decreasing), and ZomorodianCarlsson class, which is used to compute homology
 # Maybe some other algos may be implemented later
 
 
+class _SimplexArray:
+    # Columnar storage for the simplices with k vertices of a FilteredComplex: flat array of
+    # their sorted vertices, array of their degrees, and array of their keys in the
+    # combinatorial number system. Keys are looked up in a sorted index, rebuilt when
+    # too many simplices were added since the last time, and in a dict for these.
+    # The arrays may also be read-only numpy arrays, such as memmaps of a saved complex,
+    # in which case they are copied to growable arrays before any modification.
+
+    def __init__(self,k,vertices = None,degrees = None,keys = None,inOrder = False):
+        self.k = k
+        self.vertices = array('q') if vertices is None else vertices
+        self.degrees = array('d') if degrees is None else degrees
+        self.keys = array('q') if keys is None else keys # becomes a list if some key does not fit in 64 bits
+        self.inOrder = inOrder # True if simplices are sorted by degree and key
+        self._sortedKeys = np.zeros(0,dtype = np.int64)
+        self._sortedPos = np.zeros(0,dtype = np.int64)
+        self._recent = {} # key -> position, for the positions from len(self._sortedKeys) to self._recentEnd
+        self._recentEnd = 0
+
+    def __len__(self):
+        return len(self.degrees)
+
+    def _thaw(self):
+        # makes the storage growable
+        self.inOrder = False
+        if isinstance(self.degrees,np.ndarray):
+            self.vertices = array('q',np.ascontiguousarray(self.vertices,dtype = np.int64).tobytes())
+            self.degrees = array('d',np.ascontiguousarray(self.degrees,dtype = float).tobytes())
+            if self.keys.dtype == object:
+                self.keys = self.keys.tolist()
+            else:
+                self.keys = array('q',np.ascontiguousarray(self.keys,dtype = np.int64).tobytes())
+
+    def setDegree(self,pos,d):
+        self._thaw()
+        self.degrees[pos] = d
+
+    def add(self,vertices,key,d):
+        self._thaw()
+        self.vertices.extend(vertices)
+        self.degrees.append(d)
+        try:
+            self.keys.append(key)
+        except OverflowError:
+            self.keys = list(self.keys)
+            self.keys.append(key)
+
+    def extend(self,vertices,keys,degrees):
+        self._thaw()
+        self.vertices.frombytes(np.ascontiguousarray(vertices,dtype = np.int64).tobytes())
+        self.degrees.frombytes(np.ascontiguousarray(degrees,dtype = float).tobytes())
+        if keys.dtype == object and not isinstance(self.keys,list):
+            self.keys = list(self.keys)
+        if isinstance(self.keys,list):
+            self.keys.extend(keys.tolist())
+        else:
+            self.keys.frombytes(keys.tobytes())
+
+    def keyArray(self):
+        if isinstance(self.keys,np.ndarray):
+            return self.keys
+        if isinstance(self.keys,list):
+            return np.array(self.keys,dtype = object)
+        return np.array(self.keys,dtype = np.int64)
+
+    def vertexArray(self):
+        if isinstance(self.vertices,np.ndarray):
+            return self.vertices.reshape(-1,self.k)
+        return np.array(self.vertices,dtype = np.int64).reshape(-1,self.k)
+
+    def find(self,key): # returns the position of the simplex with this key, -1 if there is none
+        n = len(self.degrees)
+        indexed = len(self._sortedKeys)
+        if n - indexed > max(1024,indexed//2):
+            keys = self.keyArray()
+            self._sortedPos = np.argsort(keys,kind = 'stable')
+            self._sortedKeys = keys[self._sortedPos]
+            self._recent = {}
+            self._recentEnd = n
+        else:
+            for pos in range(self._recentEnd,n):
+                self._recent[self.keys[pos]] = pos
+            self._recentEnd = n
+        pos = self._recent.get(key)
+        if pos is not None:
+            return pos
+        i = int(np.searchsorted(self._sortedKeys,key))
+        if i < len(self._sortedKeys) and self._sortedKeys[i] == key:
+            return int(self._sortedPos[i])
+        return -1
+
+
+
 class FilteredComplex:
     # the degree of a simplex is the lowest index for which it appears in the complex
 
-    def __init__(self,warnings = False):
+    def __init__(self,warnings = False,columnar = False):
+        """
+        Arguments:
+        - warnings: Boolean. If set to True, prints a message whenever a simplex
+        or one of its faces is already in the complex. Default value: False
+        - columnar: Boolean. If set to True, simplices are not kept as Simplex
+        objects: for each dimension, the complex stores an array of vertices, an
+        array of degrees and an array of keys in the combinatorial number system,
+        which takes a fraction of the memory. Degrees are then stored as floats.
+        Default value: False
+        """
         self._simplices = [] # list of simplices
         self._degrees_dict = {} # contains the degrees. keys are simplices
+        self._columnar = columnar
+        self._cubical = False # CubicalComplex is reduced in place of a FilteredComplex
+        self._columns = {} # in columnar mode, contains a _SimplexArray for each number of vertices
         self._numSimplices = 0
         self._dimension = 0
         self._warnings = warnings
@@ -18,13 +133,34 @@ class FilteredComplex:
 
 
     def degree(self,s): # check if simplex s is already in the complex, returns the degree if it is, -1 otherwise
+        if self._columnar:
+            column = self._columns.get(s.dim)
+            if column is None:
+                return -1
+            pos = column.find(simplexKey(s.vertices))
+            return float(column.degrees[pos]) if pos >= 0 else -1
         if s in self._degrees_dict:
             return self._degrees_dict[s]
         else:
             return -1
 
 
-    def append(self,s,d): #simplex as a list of vertices, degree. Insert so that the order is preserved
+    def append(self,s,d,trusted = False): #simplex as a list of vertices, degree. Insert so that the order is preserved
+        if self._columnar:
+            self._appendColumnar(s.vertices,d,trusted)
+            return
+
+        # a trusted simplex is known to be new, with all its faces already in the complex with lower degrees
+        if trusted:
+            self._numSimplices += 1
+            self._simplices.append(s)
+            self._degrees_dict[s] = d
+            if s.dim > self._dimension:
+                self._dimension = s.dim
+            if d > self._maxDeg:
+                self._maxDeg = d
+            return
+
         # if the simplex is already in the complex, do nothing
         update = False
         if self.degree(s)>=0:
@@ -59,20 +195,313 @@ class FilteredComplex:
         self._dimension = max(self._dimension,s.dim)
         self._maxDeg = max(self._maxDeg,d)
 
-    def insert(self,l,d):
-        self.append(Simplex(l),d)
+    def _appendColumnar(self,vertices,d,trusted):
+        # same as append, for a sorted tuple of vertices in columnar mode
+        k = len(vertices)
+        column = self._columns.get(k)
+        if column is None:
+            column = self._columns[k] = _SimplexArray(k)
+        key = simplexKey(vertices)
+
+        if not trusted:
+            pos = column.find(key)
+            if pos >= 0:
+                if self._warnings:
+                    print("Face {} is already in the complex.".format(list(vertices)))
+                if column.degrees[pos] <= d:
+                    if self._warnings:
+                        print("Its degree is {} which is lower than {}: keeping it that way".format(column.degrees[pos],d))
+                    return
+                if self._warnings:
+                    print("However its degree is higher than {}: updating it to {}".format(column.degrees[pos],d))
+            if k > 1:
+                for i in range(k):
+                    if self._warnings:
+                        print("Inserting face {} as well".format(list(vertices[:i]+vertices[i+1:])))
+                    self._appendColumnar(vertices[:i]+vertices[i+1:],d,False)
+            if pos >= 0:
+                column.setDegree(pos,d)
+                return
+
+        column.add(vertices,key,d)
+        self._numSimplices += 1
+        if k > self._dimension:
+            self._dimension = k
+        if d > self._maxDeg:
+            self._maxDeg = d
+
+    def insert(self,l,d,trusted = False):
+        if self._columnar:
+            self._appendColumnar(tuple(sorted(l)),d,trusted)
+        else:
+            self.append(Simplex(l),d,trusted)
+
+    def extend(self,vertices,degrees,trusted = False):
+        """
+        Adds a whole dimension at once.
+
+        Arguments:
+        - vertices: array of shape (m,k), each row containing the vertices of
+        one of the m simplices, in any order. A one dimensional array is read
+        as a list of vertices.
+        - degrees: array of the m degrees of these simplices
+        - trusted: Boolean. If set to False, checks that the simplices are new
+        and distinct, and that all their faces are already in the complex with
+        lower or equal degrees. If set to True, the input is assumed to satisfy
+        these conditions and is not checked. Default value: False
+
+        In columnar mode, simplices are added as arrays, the checks are
+        vectorized, and the key index is only rebuilt at the next lookup.
+        Dimensions should be added in increasing order.
+        """
+        if len(degrees) == 0:
+            return
+        vertices = np.sort(np.asarray(vertices,dtype = np.int64).reshape(len(degrees),-1),axis = 1)
+        m,k = vertices.shape
+        if not trusted and np.any(vertices[:,1:] == vertices[:,:-1]):
+            raise ValueError("Some simplices have repeated vertices")
+
+        if not self._columnar:
+            simplices = [Simplex.fromSorted(tuple(l)) for l in vertices.tolist()]
+            degrees = np.asarray(degrees,dtype = float).tolist()
+            if not trusted:
+                if len(set(simplices)) < m or any(self.degree(s) >= 0 for s in simplices):
+                    raise ValueError("Some simplices are repeated or already in the complex")
+                for (s,d) in zip(simplices,degrees):
+                    for f in (s.faces() if k > 1 else []):
+                        if not 0 <= self.degree(f) <= d:
+                            raise ValueError("Face {} of {} is missing or has a higher degree".format(f,s))
+            for (s,d) in zip(simplices,degrees):
+                self.append(s,d,trusted = True)
+            return
+
+        degrees = np.asarray(degrees,dtype = float)
+        keys,faceKeys = _faceKeys(vertices)
+        column = self._columns.get(k)
+        if column is None:
+            column = self._columns[k] = _SimplexArray(k)
+        if not trusted:
+            allKeys = np.concatenate((column.keyArray(),keys))
+            if len(np.unique(allKeys)) < len(allKeys):
+                raise ValueError("Some simplices are repeated or already in the complex")
+            if k > 1:
+                below = self._columns.get(k-1)
+                belowKeys = below.keyArray() if below else np.zeros(0,dtype = np.int64)
+                belowDegrees = np.array(below.degrees) if below else np.zeros(0)
+                order = np.argsort(belowKeys,kind = 'stable')
+                sortedKeys = belowKeys[order]
+                for f in faceKeys:
+                    pos = np.minimum(np.searchsorted(sortedKeys,f),max(len(sortedKeys)-1,0))
+                    if len(sortedKeys) == 0 or np.any(sortedKeys[pos] != f):
+                        raise ValueError("Some faces of the {}-simplices are missing from the complex".format(k-1))
+                    if np.any(belowDegrees[order[pos]] > degrees):
+                        raise ValueError("Some faces of the {}-simplices have a higher degree".format(k-1))
+
+        column.extend(vertices,keys,degrees)
+        self._numSimplices += m
+        self._dimension = max(self._dimension,k)
+        self._maxDeg = max(self._maxDeg,degrees.max())
+
+    @classmethod
+    def from_arrays(cls,dimensions,trusted = False,columnar = True,warnings = False):
+        """
+        Builds a complex from arrays. dimensions is a list of couples
+        (vertices,degrees), one for each dimension, as taken by extend.
+        The complex is columnar unless columnar is set to False.
+        """
+        fc = cls(warnings = warnings,columnar = columnar)
+        for (vertices,degrees) in sorted(dimensions,key = lambda a: np.shape(a[0])[1] if np.ndim(a[0]) > 1 else 1):
+            fc.extend(vertices,degrees,trusted)
+        return fc
+
+    def save(self,path):
+        """
+        Saves the complex in a binary file, which load opens without
+        copying it in memory. For each dimension, the file contains the
+        array of vertices, the array of degrees and the array of keys of
+        the simplices, sorted by degree and key: a ZomorodianCarlsson
+        instance built on the loaded complex does not need to sort it.
+        """
+        arrays = []
+        dims = []
+        for k in range(1,self._dimension+1):
+            if self._columnar:
+                if k not in self._columns:
+                    continue
+                column = self._columns[k]
+                vertices,degrees = column.vertexArray(),np.asarray(column.degrees,dtype = float)
+                keys = column.keyArray()
+            else:
+                simplices = [s for s in self._simplices if s.dim == k]
+                vertices = np.array([s.vertices for s in simplices],dtype = np.int64).reshape(-1,k)
+                degrees = np.array([self._degrees_dict[s] for s in simplices],dtype = float)
+                keys = _faceKeys(vertices)[0]
+            if len(degrees) == 0:
+                continue
+            order = np.lexsort((keys,degrees))
+            arrays.append(("vertices{}".format(k),vertices[order]))
+            arrays.append(("degrees{}".format(k),degrees[order]))
+            if keys.dtype != object:
+                arrays.append(("keys{}".format(k),keys[order]))
+            dims.append(k)
+        writeArrays(path,"FilteredComplex",arrays,{"dimensions": dims})
+
+    @classmethod
+    def load(cls,path,mmap = True,warnings = False):
+        """
+        Loads a complex saved with save, in columnar mode. If mmap is True,
+        the arrays of the complex are memory maps of the file, and are only
+        copied in memory if the complex is modified.
+        """
+        meta,arrays = readArrays(path,"FilteredComplex",mmap)
+        fc = cls(warnings = warnings,columnar = True)
+        for k in meta["dimensions"]:
+            vertices = arrays["vertices{}".format(k)]
+            degrees = arrays["degrees{}".format(k)]
+            keys = arrays.get("keys{}".format(k))
+            if keys is None:
+                keys = _faceKeys(np.asarray(vertices))[0]
+            fc._columns[k] = _SimplexArray(k,vertices.reshape(-1),degrees,keys,inOrder = True)
+            fc._numSimplices += len(degrees)
+            fc._dimension = k
+            fc._maxDeg = max(fc._maxDeg,float(degrees[-1]))
+        return fc
 
     def __str__(self):
+        if self._columnar:
+            lines = []
+            for k in sorted(self._columns):
+                column = self._columns[k]
+                vertices = column.vertexArray().tolist()
+                for pos in range(len(column)):
+                    lines.append("{} : {}".format(vertices[pos],column.degrees[pos]))
+            return "\n".join(lines)
 
         return  "\n".join(["{} : {}".format(s,self._degrees_dict[s]) for s in self._simplices])
 
 
 
+def _faceKeys(vertices):
+    # Returns the keys of the simplices given as rows of increasing vertices, and the list of
+    # the keys of their faces without vertex i, for each i: the vertices before i keep their
+    # rank, the next ones lose one. Keys are int64 when they cannot overflow, python integers otherwise.
+    m,k = vertices.shape
+    top = int(vertices.max())+1 if m else 0
+    dtype = np.int64 if k*max([t*comb(top,t) for t in range(1,k+1)],default = 0) < 1 << 63 else object
+
+    def binomials(v,i): # (v choose i), computed exactly as C(v,t) = C(v,t-1)*(v-t+1)/t
+        c = np.ones(m,dtype = dtype)
+        for t in range(1,i+1):
+            c = c*(v-t+1)//t
+        return c
+
+    kept = [binomials(vertices[:,j],j+1) for j in range(k)]
+    lowered = [binomials(vertices[:,j],j) for j in range(k)]
+    keys = sum(kept,np.zeros(m,dtype = dtype))
+    if k < 2:
+        return keys,[]
+    return keys,[sum(kept[:i]+lowered[i+1:],np.zeros(m,dtype = dtype)) for i in range(k)]
+
+
+
+class _ColumnarSimplices(Sequence):
+    # simplices of a ZomorodianCarlsson instance built on a columnar complex, created on access
+    def __init__(self,zc):
+        self._zc = zc
+
+    def __len__(self):
+        return self._zc.numSimplices
+
+    def __getitem__(self,i):
+        if isinstance(i,slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        k = bisect.bisect_right(self._zc._dimStart,i)-1
+        return Simplex.fromSorted(tuple(self._zc._vertices[k][i-self._zc._dimStart[k]].tolist()))
+
+
+
+class _ColumnarDegrees(Mapping):
+    # degrees of the simplices of a ZomorodianCarlsson instance built on a columnar complex
+    def __init__(self,zc):
+        self._zc = zc
+
+    def __len__(self):
+        return self._zc.numSimplices
+
+    def __iter__(self):
+        return iter(self._zc.simplices)
+
+    def __getitem__(self,s):
+        i = self._zc.index(s)
+        if i < 0:
+            raise KeyError(s)
+        return self._zc._values.item(i)
+
+
+
+
+def _reduceZ2(d,pivotColumns,sign,added = None):
+    # Reduces the chain d, given as a list of indices, over Z/2Z: while the pivot of d
+    # is the pivot of a column in pivotColumns, this column is added to d. The pivot is
+    # the highest index for sign = -1 and the lowest one for sign = 1. The chain is kept
+    # in a heap of indices multiplied by sign, in which an index present twice cancels
+    # out, so the pivot is found without scanning the whole chain. Returns d as a list
+    # of indices starting with its pivot, in heap order, and the number of columns
+    # added to it. If added is a list, the pivots of these columns are appended to it.
+    heap = [sign*i for i in d]
+    heapq.heapify(heap)
+    additions = 0
+    while heap:
+        p = heapq.heappop(heap)
+        if heap and heap[0] == p:
+            heapq.heappop(heap)
+            continue
+        c = pivotColumns.get(sign*p)
+        if c is None:
+            heapq.heappush(heap,p)
+            break
+        additions += 1
+        if added is not None:
+            added.append(sign*p)
+        for i in c[1:]:
+            heapq.heappush(heap,sign*i)
+    d = []
+    while heap:
+        p = heapq.heappop(heap)
+        if heap and heap[0] == p:
+            heapq.heappop(heap)
+        else:
+            d.append(sign*p)
+    return d,additions
+
+
+
 
+class _ApparentColumns(dict):
+    # Reduced columns by pivot, for a reduction with apparent pairs: the column whose pivot is the
+    # simplex t of an apparent pair (t,s) is the boundary of s, which is built when it is needed.
+    def __init__(self,zc):
+        dict.__init__(self)
+        self._zc = zc
+
+    def get(self,p,default = None):
+        c = dict.get(self,p)
+        if c is not None:
+            return c
+        zc = self._zc
+        s = int(zc._partner[p])
+        if s <= p:
+            return default
+        faces = zc._faceIndices(s,bisect.bisect_right(zc._dimStart,s)-1)
+        if zc.backend == "z2":
+            return [p]+[i for i in faces if i != p]
+        return SimplexChain([(faces[i],(-1)**i) for i in range(len(faces))],zc)
 
 
 class ZomorodianCarlsson:
-    def __init__(self,filteredComplex,field = 2,strict = True,verbose = False):
+    def __init__(self,filteredComplex,field = 2,strict = True,verbose = False,backend = None,algorithm = "standard",dimensions = None,metrics = None,representatives = None):
         """
         Class for Zomorodian and Carlsson's algorithm for persistent homology.
         Initialization does not compute homology. Call self.computeIntervals
@@ -80,60 +509,270 @@ class ZomorodianCarlsson:
 
         Arguments:
         - filteredComplex should be an instance of FilteredComplex, on which
-        homology will be computed.
+        homology will be computed, or of CubicalComplex. The pairs of a
+        CubicalComplex are made of Cube objects, and on a CubicalComplex,
+        the "twist" algorithm finds its apparent pairs with numpy, and
+        only reduces the other columns.
         - field: prime number, specifies the field over which homology is
         computed. Default value: 2
         - strict: Boolean. If set to True, homology elements of duration zero,
         i.e. intervals of the form (x,x), will be ignored. Default value: True
         - verbose: Boolean. If set to True, the computeIntervals method will
         output its progress throughout the algo. Default value: False
+        - backend: "chain" or "z2". The "chain" backend reduces columns as
+        SimplexChain objects and works over any field. The "z2" backend only
+        works over Z/2Z: columns are lists of simplex indices starting with
+        their pivot, added as symmetric differences in a heap which gives
+        the pivot. Both give the same intervals and pairs. Default value:
+        "z2" if field is 2, "chain" otherwise.
+        - algorithm: "standard", "twist" or "cohomology". "standard" is the
+        algorithm of Zomorodian and Carlsson, which removes the unmarked
+        simplices from each boundary before reducing it. "twist" reduces the boundaries
+        dimension by dimension from the top, and skips the columns of the
+        simplices already found as pivots, which are known to reduce to zero
+        (clearing). "cohomology" reduces coboundaries instead, dimension by
+        dimension from the bottom, with the same clearing. All three give
+        the same intervals and pairs, possibly in a different order, but
+        self.T is only filled by "standard" and "twist". On Rips complexes,
+        "cohomology" is usually the fastest. Default value: "standard"
+        - dimensions: iterable of the homology dimensions to compute. The
+        intervals of dimension k only need the boundaries of the simplices
+        with k+1 and k+2 vertices to be reduced, so the other simplices
+        are skipped, and no interval is found for the other dimensions.
+        Default value: all dimensions
+        - metrics: instance of Metrics, which receives the time spent in
+        initialization and reduction, the number of simplices and the
+        statistics of each reduced column. Default value: None
+        - representatives: None, an integer n or "all". If not None, the
+        reduction also keeps track of the combination of columns added to
+        each column, and once it is over, the representatives of the n
+        longest intervals of each dimension (or of all of them) are kept in
+        self.representatives, and self.T and all other chains are discarded,
+        so update can no longer be run. Representatives are cycles with the
+        "standard" and "twist" algorithms, and cocycles with "cohomology".
+        With "standard", boundaries are then reduced without removing their
+        unmarked simplices, so that reduced boundaries are cycles.
+        Default value: None
 
         """
+        start = time.perf_counter()
+        if backend is None:
+            backend = "z2" if field == 2 else "chain"
+        if backend not in ("chain","z2"):
+            raise ValueError("Unknown backend {}".format(backend))
+        if backend == "z2" and field != 2:
+            raise ValueError("The z2 backend can only compute homology over Z/2Z")
+        if algorithm not in ("standard","twist","cohomology"):
+            raise ValueError("Unknown algorithm {}".format(algorithm))
+        if representatives is not None and representatives != "all" and not (isinstance(representatives,int) and representatives >= 0):
+            raise ValueError("representatives must be None, a non negative integer or \"all\"")
+        self.backend = backend
+        self.algorithm = algorithm
 
         self.numSimplices = filteredComplex._numSimplices
+        self.dim = filteredComplex._dimension
+        self.field = field
+        self._columnar = filteredComplex._columnar
+        self._cubical = filteredComplex._cubical
+        # intervals of dimension k are found in self.intervals[k], for k up to the dimension of the complex
+        numIntervals = self.dim+1
+        if self._cubical:
+            # cells of dimension k are numbered like simplices with k+1 vertices
+            self.dim += 1
 
-        # first, order the simplices in lexico order on dimension, degree and then arbitrary order
-        def key(s):
-            d = filteredComplex.degree(s)
-            return (s.dim,d,s)
-        filteredComplex._simplices.sort(key = key)
-        self.simplices = filteredComplex._simplices[:]
+        self._allDimensions = dimensions is None
+        if dimensions is None:
+            dimensions = range(self.dim)
+        self.dimensions = sorted(set(dimensions))
+        if any(q < 0 for q in self.dimensions):
+            raise ValueError("Homology dimensions must be non negative")
+        # Boundaries of simplices with k vertices are only reduced for k in self._reduced: they give
+        # the deaths of (k-2)-dimensional classes, and the simplices creating (k-1)-dimensional classes
+        self._reduced = set([k for q in self.dimensions for k in (q+1,q+2) if k <= self.dim])
 
-        # remember the index of each simplex
-        self._indexBySimplex = {}
-        for i in range(self.numSimplices):
-            self._indexBySimplex[self.simplices[i]] = i
+        if self._columnar:
+            self._initColumnar(filteredComplex)
+        elif self._cubical:
+            self._initCubical(filteredComplex)
+        else:
+            # first, order the simplices in lexico order on dimension, degree and then arbitrary order
+            def key(s):
+                d = filteredComplex.degree(s)
+                return (s.dim,d,s)
+            filteredComplex._simplices.sort(key = key)
+            self.simplices = filteredComplex._simplices[:]
+            self._complex = filteredComplex # simplices appended to it later are reduced by update
 
+            # remember the index of each simplex
+            self._indexBySimplex = {}
+            for i in range(self.numSimplices):
+                self._indexBySimplex[self.simplices[i]] = i
 
-        self.dim = filteredComplex._dimension
-        self.degrees = filteredComplex._degrees_dict.copy()
-        self.field = field
+            self.degrees = filteredComplex._degrees_dict.copy()
+            self._values = [self.degrees[s] for s in self.simplices]
+            self._value = self._values.__getitem__
+
+            # simplices with k vertices have indices in range(self._dimStart[k],self._dimStart[k+1])
+            self._dimStart = [0 for k in range(self.dim+2)]
+            for s in self.simplices:
+                self._dimStart[s.dim+1] += 1
+            for k in range(1,self.dim+2):
+                self._dimStart[k] += self._dimStart[k-1]
+            self._initFaces()
 
 
-        self.marked = [False for i in range(self.numSimplices)]
-        self.T = [None for i in range(self.numSimplices)] # contains couples (index,chain)
-        self.intervals = [[] for i in range(self.dim+1)] # contains homology intervals once the algo has finished
+        # only the entries of the simplices in reduced dimensions are filled
+        self.marked = [False]*self.numSimplices
+        self.T = [None]*self.numSimplices # contains couples (index,chain)
+        self._pivotColumns = {} # reduced chains, by pivot
+        self.intervals = [[] for i in range(numIntervals)] # contains homology intervals once the algo has finished
         self.pairs = []
+        self._essential = set() # indices of the simplices creating the classes which are never killed
+        self._lastDegrees = None # highest degree of each dimension, once update has been run
+        self._partner = None # with apparent pairs, the other simplex of the pair of each simplex, -1 for the others
+        # With representatives, the combination of columns reduced into each column (the matrix V
+        # such that R = DV) is kept in self._combinations by pivot for the columns which do not
+        # reduce to zero, and in self._cycles by index for the others, until the reduction is over
+        self._representativeCount = representatives
+        self.representatives = [{} for i in range(numIntervals)] # by position in self.intervals[k], couples (indices,coefficients)
+        if representatives is not None:
+            self._combinations = {}
+            self._cycles = {}
+            self._intervalColumns = [[] for i in range(numIntervals)] # couples (t,s) of each interval
 
         self._maxDeg = filteredComplex._maxDeg
         self._strict = strict
         self._verbose = verbose
         self._homologyComputed = False
+        self._metrics = metrics
+        self._lastAdditions = 0
+        if metrics is not None:
+            metrics.setSimplexCounts([0]+[self._dimStart[k+1]-self._dimStart[k] for k in range(1,self.dim+1)])
+            metrics.times["initialization"] = metrics.times.get("initialization",0.) + time.perf_counter() - start
+
+    def _initColumnar(self,filteredComplex):
+        # Each dimension is sorted by degree and key with a single lexsort. Faces are then
+        # found by computing their keys, and searching them among the keys of the dimension below.
+        columns = filteredComplex._columns
+
+        self._dimStart = [0,0]
+        self._vertices = [None]
+        self._keys = [None]
+        self._keyOrder = [None]
+        self._faces = [None]
+        values = []
+        for k in range(1,self.dim+1):
+            if k in columns:
+                column = columns[k]
+                vertices,degrees,keys = column.vertexArray(),np.asarray(column.degrees,dtype = float),column.keyArray()
+            else:
+                vertices,degrees,keys = np.zeros((0,k),dtype = np.int64),np.zeros(0),np.zeros(0,dtype = np.int64)
+            if k not in columns or not columns[k].inOrder:
+                order = np.lexsort((keys,degrees))
+                vertices,degrees,keys = vertices[order],degrees[order],keys[order]
+            values.append(degrees)
+            self._vertices.append(vertices)
+            self._keys.append(keys)
+            self._keyOrder.append(np.argsort(keys,kind = 'stable'))
+
+            if k not in self._reduced:
+                # faces of these simplices are not needed
+                self._faces.append(None)
+                self._dimStart.append(self._dimStart[-1]+len(keys))
+                continue
+            self._faces.append(self._faceArray(k,vertices,self._keys[k-1][self._keyOrder[k-1]] if k > 1 else None,self._keyOrder[k-1]))
+            self._dimStart.append(self._dimStart[-1]+len(keys))
+
+        self._values = np.concatenate(values) if values else np.zeros(0)
+        self._value = self._values.item
+        self.simplices = _ColumnarSimplices(self)
+        self.degrees = _ColumnarDegrees(self)
+
+    def _initCubical(self,cubicalComplex):
+        # A CubicalComplex already has the arrays of its cells in filtration order, dimension by
+        # dimension, and their faces, so they are used as they are.
+        self._complex = cubicalComplex
+        self._dimStart = cubicalComplex._dimStart
+        self._faces = cubicalComplex._faces
+        self._values = cubicalComplex._values
+        self._value = self._values.item
+        self.simplices = cubicalComplex.cells
+        self.degrees = None
+
+    def _faceArray(self,k,vertices,sortedKeys,keyOrder):
+        # Returns the array of the indices of the faces of the simplices with k vertices given as
+        # rows of vertices: row j holds the faces of simplex j in the order of Simplex.faces, so
+        # the coefficient of column i in a boundary is (-1)**i. sortedKeys are the sorted keys
+        # of the simplices with k-1 vertices, and keyOrder the permutation sorting them.
+        faces = np.zeros((len(vertices),k if k > 1 else 0),dtype = np.int64)
+        if k > 1 and len(vertices):
+            for (i,faceKeys) in enumerate(_faceKeys(vertices)[1]):
+                pos = np.minimum(np.searchsorted(sortedKeys,faceKeys),max(len(sortedKeys)-1,0))
+                if len(sortedKeys) == 0 or np.any(sortedKeys[pos] != faceKeys):
+                    raise ValueError("Some faces of {}-simplices are missing from the complex".format(k-1))
+                faces[:,i] = keyOrder[pos] + self._dimStart[k-1]
+        return faces
+
+    def _initFaces(self):
+        # Builds self._faces for a complex which is not columnar, as in _initColumnar: the
+        # vertices of each needed dimension are read once as an array, and faces are found
+        # by searching their keys, without creating any Simplex or hashing them.
+        self._faces = [None for k in range(self.dim+1)]
+        needed = set([q for k in self._reduced for q in (k-1,k) if q >= 1])
+        keys = {}
+        vertices = {}
+        for k in sorted(needed):
+            block = self.simplices[self._dimStart[k]:self._dimStart[k+1]]
+            vertices[k] = np.array([s.vertices for s in block],dtype = np.int64).reshape(-1,k)
+            keys[k] = _faceKeys(vertices[k])[0]
+        for k in self._reduced:
+            if k == 1:
+                self._faces[k] = np.zeros((self._dimStart[2]-self._dimStart[1],0),dtype = np.int64)
+                continue
+            order = np.argsort(keys[k-1],kind = 'stable')
+            self._faces[k] = self._faceArray(k,vertices[k],keys[k-1][order],order)
+
+    def index(self,s):
+        """
+        Returns the index of simplex s in the filtration order, -1
+        if it is not in the complex.
+        """
+        if not self._columnar:
+            return self._indexBySimplex.get(s,-1)
+        if s.dim < 1 or s.dim > self.dim:
+            return -1
+        key = simplexKey(s.vertices)
+        sortedKeys = self._keys[s.dim][self._keyOrder[s.dim]]
+        pos = int(np.searchsorted(sortedKeys,key))
+        if pos < len(sortedKeys) and sortedKeys[pos] == key:
+            return int(self._keyOrder[s.dim][pos]) + self._dimStart[s.dim]
+        return -1
+
+    def _faceIndices(self,j,k):
+        # indices of the faces of simplex j with k vertices, in the order of Simplex.faces
+        if j < self._dimStart[-1]:
+            return self._faces[k][j-self._dimStart[k]].tolist()
+        # simplex added by update
+        if k == 1:
+            return []
+        return [self._indexBySimplex[f] for f in self.simplices[j].faces()]
 
     def addInterval(self,k,t,s):
-        i = self.degrees[t]
-        if not s:
+        # t and s are the indices of the simplices creating and killing a k-dimensional class.
+        # s is None if the class is never killed.
+        if k not in self.dimensions:
+            return
+        i = self._value(t)
+        if s is None:
             j = inf
         else:
-            j = self.degrees[s]
+            j = self._value(s)
 
         if i != j or (not self._strict):
-            #if self._verbose:
-                #print("Adding {}-interval ({},{})".format(k,i,j))
             self.intervals[k].append((i,j))
-            self.pairs.append((t,s))
-            #if i == 10:
-            #    print(k,t,s)
+            self.pairs.append((self.simplices[t],None if s is None else self.simplices[s]))
+            if self._representativeCount is not None:
+                self._intervalColumns[k].append((t,s))
 
 
 
@@ -146,80 +785,422 @@ class ZomorodianCarlsson:
         if self._homologyComputed:
             print("Homology was already computed.")
             return
+        if self._metrics is None:
+            self._computeIntervals()
+        else:
+            with self._metrics.phase("reduction"):
+                self._computeIntervals()
+        if self._representativeCount is not None:
+            self._keepRepresentatives()
+        self._homologyComputed = True
+
+    def _progress(self,done):
+        # reports the progress of the reduction every 1000 simplices
         if self._verbose:
-            print("Beginning first pass")
-        for j in range(self.numSimplices):
-            if j%1000 == 0 and self._verbose:
-                print('{}/{}'.format(j,self.numSimplices))
-            s = self.simplices[j]
-            #if self._verbose:
-                #print("Examining {}. Removing pivot rows...".format(s))
-            d = self.removePivotRows(s)
-            #if self._verbose:
-                #print("Done removing pivot rows")
-            if d.isEmpty():
-                #if self._verbose:
-                    #print("Boundary is empty when pivots are removed: marking {}".format(s))
-                self.marked[j] = True
-            else:
+            print('{}/{}'.format(done,self.numSimplices))
+        if self._metrics is not None:
+            self._metrics.progress("reduction",done,self.numSimplices)
 
-                maxInd = self.maxIndex(d)
-                t = self.simplices[maxInd]
-                k = t.dim-1
-                self.T[maxInd] = (s,d)
-                self.addInterval(k,t,s)
-                #if self._verbose:
-                    #print("Boundary non-reducible: T{} is set to:".format(t))
-                    #print(str(d))
+    def _computeIntervals(self):
+        if self.algorithm == "cohomology":
+            self._cohomologyPass()
+            return
+
+        metrics = self._metrics
+        if self._verbose:
+            print("Beginning first pass")
+        if self.algorithm == "twist":
+            dims = range(self.dim,0,-1)
+        else:
+            dims = range(1,self.dim+1)
+        tracking = self._representativeCount is not None
+        # on cubical complexes, most pairs are apparent pairs, which are found with numpy
+        apparent = self._cubical and self.algorithm == "twist" and not tracking
+        if apparent:
+            self._partner = np.full(self.numSimplices,-1,dtype = np.int64)
+            self._pivotColumns = _ApparentColumns(self)
+        count = 0
+        for k in dims:
+            if k not in self._reduced:
+                continue
+            # unmarked faces can only be removed if the dimension below was reduced
+            onlyMarked = k-1 in self._reduced and self.algorithm == "standard" and not tracking
+            columns = range(self._dimStart[k],self._dimStart[k+1])
+            if apparent and k == 2:
+                self._unionFindPairs()
+                columns = []
+            elif apparent:
+                if k > 2:
+                    self._addApparentPairs(k)
+                # the simplices of apparent pairs are neither reduced nor cleared
+                columns = (np.flatnonzero(self._partner[self._dimStart[k]:self._dimStart[k+1]] < 0) + self._dimStart[k]).tolist()
+            for j in columns:
+                if count%1000 == 0:
+                    self._progress(count)
+                count += 1
+                if self.algorithm == "twist":
+                    if self.T[j]:
+                        # j is the pivot of a column, so its own column reduces to zero
+                        self.marked[j] = True
+                        continue
+                added = [] if tracking else None
+                d = self._reduceBoundary(j,k,onlyMarked,added)
+                if metrics is not None:
+                    metrics.column(k,j,self._lastAdditions,self._chainSize(d))
+                if self.isEmpty(d):
+                    self.marked[j] = True
+                    if tracking:
+                        self._keepCombination(j,None,added)
+                else:
+                    maxInd = self.maxIndex(d)
+                    self.T[maxInd] = (j,d)
+                    self._pivotColumns[maxInd] = d
+                    self.addInterval(k-2,maxInd,j)
+                    if tracking:
+                        # maxInd creates a class which is killed, its cycle is d
+                        self._cycles.pop(maxInd,None)
+                        self._keepCombination(j,maxInd,added)
 
         if self._verbose:
             print("First pass over, beginning second pass")
-        for j in range(self.numSimplices):
-            if j%1000 == 0 and self._verbose:
-                print('{}/{}'.format(j,self.numSimplices))
-            s = self.simplices[j]
-            if self.marked[j] and not self.T[j]:
-                k = s.dim -1
-                #if self._verbose:
-                    #print("Infinite interval found for {}.".format(s))
-                self.addInterval(k,s,None)
+        for k in range(1,self.dim+1):
+            if k-1 not in self.dimensions:
+                continue
+            for j in range(self._dimStart[k],self._dimStart[k+1]):
+                if j%1000 == 0 and self._verbose:
+                    print('{}/{}'.format(j,self.numSimplices))
+                if self.marked[j] and not self.T[j]:
+                    self._essential.add(j)
+        self._addEssentialIntervals()
         if self._verbose:
             print("Second pass over")
-        self._homologyComputed = True
 
+    def _addApparentPairs(self,k):
+        # Finds the apparent pairs (t,s) of simplices s with k vertices: t is the face of s with the
+        # highest index, and s the coface of t with the lowest index. They are persistence pairs,
+        # and the boundary of s can be used in place of its reduced column, with the same pivot t
+        # (Bauer, "Ripser: efficient computation of Vietoris-Rips persistence barcodes"), so their
+        # columns are neither reduced nor stored, and are left out of self.marked and self.T.
+        start,below = self._dimStart[k],self._dimStart[k-1]
+        faces = self._faces[k]
+        if len(faces) == 0:
+            return
+        youngest = faces.max(axis = 1)
+        flat = faces.reshape(-1)
+        order = np.argsort(flat,kind = 'stable')
+        sortedFaces = flat[order]
+        first = np.flatnonzero(np.concatenate(([True],sortedFaces[1:] != sortedFaces[:-1])))
+        oldest = np.full(start-below,-1,dtype = np.int64)
+        oldest[sortedFaces[first]-below] = order[first]//faces.shape[1]
+        s = np.flatnonzero(oldest[youngest-below] == np.arange(len(faces)))
+        t = youngest[s]
+        s += start
+        self._partner[t] = s
+        self._partner[s] = t
+        if k-2 in self.dimensions:
+            keep = self._values[t] != self._values[s] if self._strict else np.ones(len(s),dtype = bool)
+            for (a,b) in zip(t[keep].tolist(),s[keep].tolist()):
+                self.addInterval(k-2,a,b)
 
+    def _unionFindPairs(self):
+        # Pairs the simplices with 2 vertices as the reduction of their columns would, with the
+        # pairs recorded as apparent pairs: an edge joining two components kills the youngest of
+        # their oldest vertices, and the other edges create cycles. Components are kept in a
+        # union-find structure, whose roots are the oldest vertices of the components.
+        start,end = self._dimStart[2],self._dimStart[3]
+        parent = list(range(self._dimStart[2]))
+        def root(x):
+            while parent[x] != x:
+                parent[x] = parent[parent[x]]
+                x = parent[x]
+            return x
+        faces = self._faces[2]
+        partner = self._partner
+        killed = []
+        killers = []
+        for a in range(start,end,1 << 16):
+            b = min(a+(1 << 16),end)
+            for (j,u,v) in zip(range(a,b),faces[a-start:b-start,0].tolist(),faces[a-start:b-start,1].tolist()):
+                u,v = root(u),root(v)
+                if u == v:
+                    if partner[j] < 0:
+                        # the column of j is zero, or cleared if j is a pivot
+                        self.marked[j] = True
+                    continue
+                if u < v:
+                    u,v = v,u
+                parent[u] = v
+                killed.append(u)
+                killers.append(j)
+            self._progress(b)
+        t = np.array(killed,dtype = np.int64)
+        s = np.array(killers,dtype = np.int64)
+        partner[t] = s
+        partner[s] = t
+        if 0 in self.dimensions:
+            keep = self._values[t] != self._values[s] if self._strict else np.ones(len(s),dtype = bool)
+            for (a,b) in zip(t[keep].tolist(),s[keep].tolist()):
+                self.addInterval(0,a,b)
 
-    def removePivotRows(self,s):
-        d = simplexBoundary(s,self)
-        for j in d.coeffs:
-            if not self.marked[j]:
-                d.coeffs[j] = 0
-        d.purge()
-        while not d.isEmpty():
+    def _addEssentialIntervals(self):
+        # adds the infinite intervals at the end of the intervals of each dimension
+        for j in sorted(self._essential,key = lambda j: (self.simplices[j].dim,j)):
+            self.addInterval(self.simplices[j].dim-1,j,None)
 
-            #if self._verbose:
-                #print("Current chain d:")
-                #print(str(d))
+    def update(self):
+        """
+        Updates the intervals with the simplices appended to the complex
+        since this instance was created, without computing the others
+        again. Runs computeIntervals first if it has not been run.
+        The new simplices must be appended in filtration order: each one
+        after its faces, with a degree at least as high as the degrees of
+        all the simplices of the same dimension before it. Each one is
+        reduced against the reduced columns of self.T, as in the standard
+        algorithm, the intervals it closes become finite, and new infinite
+        intervals are added. New simplices get the next indices, so indices
+        are no longer grouped by dimension. Only works with the "standard"
+        and "twist" algorithms, on a complex which is neither columnar
+        nor a CubicalComplex.
+        Returns the number of new simplices.
+        """
+        if self._columnar or self._cubical or self.algorithm == "cohomology":
+            raise ValueError("update only works with the standard and twist algorithms, on complexes which are neither columnar nor cubical")
+        if self._representativeCount is not None:
+            raise ValueError("update cannot be run once chains have been discarded for representatives")
+        if not self._homologyComputed:
+            self.computeIntervals()
+        if self._metrics is None:
+            return self._update()
+        with self._metrics.phase("reduction"):
+            return self._update()
 
-            maxInd = self.maxIndex(d)
-            t = self.simplices[maxInd]
-            #if self._verbose:
-                #print("simplex with max index in d: {} with index {}".format(maxInd))
+    def _update(self):
+        new = self._complex._simplices[self.numSimplices:]
+        if not new:
+            return 0
+        if self._lastDegrees is None:
+            self._lastDegrees = {k: self._values[self._dimStart[k+1]-1] for k in range(1,self.dim+1) if self._dimStart[k+1] > self._dimStart[k]}
+        last = dict(self._lastDegrees)
+        for s in new:
+            d = self._complex._degrees_dict[s]
+            if d < last.get(s.dim,-inf):
+                raise ValueError("Simplex {} of degree {} is not in filtration order".format(s,d))
+            last[s.dim] = d
+        # infinite intervals are added again at the end, once the new simplices are reduced
+        for j in self._essential:
+            self.intervals[self.simplices[j].dim-1].pop()
+        del self.pairs[len(self.pairs)-len(self._essential):]
+
+        metrics = self._metrics
+        for s in new:
+            d = self._complex._degrees_dict[s]
+            k = s.dim
+            j = self.numSimplices
+            self.numSimplices += 1
+            self.simplices.append(s)
+            self._indexBySimplex[s] = j
+            self.degrees[s] = d
+            self._values.append(d)
+            self.marked.append(False)
+            self.T.append(None)
+            self._maxDeg = max(self._maxDeg,d)
+            if k > self.dim:
+                self.dim = k
+                self.intervals.append([])
+                if self._allDimensions:
+                    self.dimensions = list(range(self.dim))
+                self._reduced = set([q for p in self.dimensions for q in (p+1,p+2) if q <= self.dim])
+            if k not in self._reduced:
+                continue
+
+            # as in _computeIntervals, unmarked faces are only removed by the standard algorithm
+            onlyMarked = k-1 in self._reduced and self.algorithm == "standard" and self._representativeCount is None
+            b = self._reduceBoundary(j,k,onlyMarked)
+            if metrics is not None:
+                metrics.column(k,j,self._lastAdditions,self._chainSize(b))
+            if self.isEmpty(b):
+                self.marked[j] = True
+                if k-1 in self.dimensions:
+                    self._essential.add(j)
+            else:
+                maxInd = self.maxIndex(b)
+                self.T[maxInd] = (j,b)
+                self._pivotColumns[maxInd] = b
+                self._essential.discard(maxInd)
+                self.addInterval(k-2,maxInd,j)
+        self._lastDegrees = last
+        self._addEssentialIntervals()
+        return len(new)
+
+    def _cohomologyPass(self):
+        # reduction of the coboundary matrix: simplices are processed by increasing
+        # dimension and decreasing index, and the pivot of a cochain is its lowest index.
+        # Coboundaries of simplices with k vertices give the (k-1)-dimensional intervals, and
+        # the dimension below is needed to clear the simplices killing (k-2)-dimensional classes
+        rows = set([k for q in self.dimensions for k in (q,q+1) if 1 <= k <= self.dim])
+        cofaces = [[] for i in range(self.numSimplices)]
+        for k in range(2,self.dim+1):
+            if k-1 not in rows:
+                continue
+            for j in range(self._dimStart[k],self._dimStart[k+1]):
+                faces = self._faceIndices(j,k)
+                for i in range(len(faces)):
+                    cofaces[faces[i]].append((j,(-1)**i))
+
+        metrics = self._metrics
+        tracking = self._representativeCount is not None
+        count = 0
+        for k in range(1,self.dim+1):
+            if k not in rows:
+                continue
+            for i in range(self._dimStart[k+1]-1,self._dimStart[k]-1,-1):
+                if count%1000 == 0:
+                    self._progress(count)
+                count += 1
+                if i in self._pivotColumns:
+                    # i kills a class of lower dimension, so its coboundary reduces to zero
+                    continue
+                added = [] if tracking else None
+                if self.backend == "z2":
+                    d,additions = _reduceZ2([j for (j,sign) in cofaces[i]],self._pivotColumns,1,added)
+                else:
+                    d,additions = self._reduceChain(SimplexChain(cofaces[i],self),min,added)
+                cofaces[i] = None
+                if metrics is not None:
+                    metrics.column(k,i,additions,self._chainSize(d))
+                if self.isEmpty(d):
+                    self.addInterval(k-1,i,None)
+                    if tracking:
+                        self._keepCombination(i,None,added)
+                else:
+                    minInd = d[0] if self.backend == "z2" else min(d.coeffs)
+                    self._pivotColumns[minInd] = d
+                    self.addInterval(k-1,i,minInd)
+                    if tracking:
+                        self._keepCombination(i,minInd,added)
+
+    def _keepCombination(self,j,pivot,added):
+        # combination of the columns reduced into column j: j itself, plus the combinations of the
+        # columns added to it, whose pivots are in added (with their factors for the chain backend).
+        # It is kept by pivot, or by index in self._cycles if pivot is None (the column reduced to zero)
+        if self.backend == "z2":
+            v = {j}
+            for p in added:
+                v ^= self._combinations[p]
+        else:
+            v = SimplexChain([(j,1)],self)
+            for (p,factor) in added:
+                v = v - factor*self._combinations[p]
+        if pivot is None:
+            self._cycles[j] = v
+        else:
+            self._combinations[pivot] = v
+
+    def _keepRepresentatives(self):
+        # keeps the chains representing the selected intervals as arrays, and discards all the others.
+        # The cycle of a finite interval (t,s) is the reduced boundary of s, and the cycle of an infinite
+        # one is the combination of columns reduced into t. With cohomology, the cocycle of an interval
+        # is the combination of columns reduced into t in both cases.
+        for k in range(len(self.intervals)):
+            columns = self._intervalColumns[k]
+            if self._representativeCount == "all":
+                chosen = range(len(columns))
+            else:
+                intervals = np.array(self.intervals[k],dtype = float).reshape(-1,2)
+                chosen = np.argsort(intervals[:,0]-intervals[:,1],kind = 'stable')[:self._representativeCount].tolist()
+            for i in chosen:
+                t,s = columns[i]
+                if s is None:
+                    chain = self._cycles[t]
+                elif self.algorithm == "cohomology":
+                    chain = self._combinations[s]
+                else:
+                    chain = self.T[t][1]
+                if self.backend == "z2":
+                    self.representatives[k][i] = (np.array(sorted(chain),dtype = np.int64),None)
+                else:
+                    indices = sorted(j for j in chain.coeffs if chain.coeffs[j])
+                    self.representatives[k][i] = (np.array(indices,dtype = np.int64),np.array([chain.coeffs[j] for j in indices],dtype = np.int64))
+        self.T = None
+        self._pivotColumns = None
+        self._combinations = None
+        self._cycles = None
+        self._intervalColumns = None
+
+    def representative(self,k,i):
+        """
+        Returns the representative of the interval self.intervals[k][i], as
+        a couple (vertices,coefficients) of arrays: row r of vertices holds
+        the k+1 vertices of the r-th simplex of the cycle (or cocycle), and
+        coefficients[r] its coefficient. Can only be run for the intervals
+        kept with the representatives argument.
+        """
+        if i not in self.representatives[k]:
+            raise ValueError("No representative was kept for interval {} of dimension {}".format(i,k))
+        indices,coefficients = self.representatives[k][i]
+        if coefficients is None:
+            coefficients = np.ones(len(indices),dtype = np.int64)
+        if self._columnar:
+            return self._vertices[k+1][indices-self._dimStart[k+1]],coefficients
+        if self._cubical:
+            return self._complex.vertexArray(k+1,indices-self._dimStart[k+1]),coefficients
+        return np.array([self.simplices[j].vertices for j in indices.tolist()],dtype = np.int64).reshape(-1,k+1),coefficients
 
-            if not self.T[maxInd]:
-                #if self._verbose:
-                    #print("{} is not in T: done removing pivot rows".format(t))
-                break
 
-            c = self.T[maxInd][1]
-            q = c.getCoeff(t)
-            #if self._verbose:
-                #print("{} is in T with coeff {}: ".format(t,q),"##########",str(c),"##########",sep='\n'    )
-            d = d - pow(q,self.field-2,self.field)*c
+    def removePivotRows(self,s,onlyMarked = True):
+        """
+        Returns the boundary of s, reduced by the chains of T. If
+        onlyMarked is True, the unmarked simplices are first removed
+        from the boundary.
+        """
+        return self._reduceBoundary(self.index(s),s.dim,onlyMarked)
+
+    def _reduceBoundary(self,j,k,onlyMarked = True,added = None):
+        # same as removePivotRows, for simplex j with k vertices. The number of
+        # columns added to the boundary is left in self._lastAdditions, and their
+        # pivots are appended to added as in _reduceChain
+        faces = self._faceIndices(j,k)
+        if self.backend == "z2":
+            if onlyMarked:
+                faces = [i for i in faces if self.marked[i]]
+            d,self._lastAdditions = _reduceZ2(faces,self._pivotColumns,-1,added)
+            return d
+        d = SimplexChain([(faces[i],(-1)**i) for i in range(len(faces)) if self.marked[faces[i]] or not onlyMarked],self)
+        d,self._lastAdditions = self._reduceChain(d,max,added)
         return d
 
+    def _reduceChain(self,d,pivotOf,added = None):
+        # while the pivot of d is the pivot of a reduced chain, cancels it with this chain.
+        # Returns the reduced chain and the number of chains added to it. If added is a
+        # list, couples (pivot,factor) are appended to it for each chain c, d becoming d - factor*c
+        additions = 0
+        while not d.isEmpty():
+            p = pivotOf(d.coeffs)
+            c = self._pivotColumns.get(p)
+            if c is None:
+                break
+            q = c.getCoeff(p)
+            factor = d.getCoeff(p)*pow(q,self.field-2,self.field)
+            d = d - factor*c
+            additions += 1
+            if added is not None:
+                added.append((p,factor))
+        return d,additions
+
+    def _chainSize(self,d):
+        # number of terms of the chain d
+        if self.backend == "z2":
+            return len(d)
+        return len(d.coeffs)
+
+    def isEmpty(self,d):
+        if self.backend == "z2":
+            return len(d) == 0
+        return d.isEmpty()
 
     def maxIndex(self,d):
+        if self.backend == "z2":
+            return d[0] if d else -1
         currmax = -1
         for j in d.coeffs:
             if j>currmax:
@@ -228,6 +1209,34 @@ class ZomorodianCarlsson:
 
 
 
+    def saveIntervals(self,path):
+        """
+        Saves the intervals and pairs in a binary file, which can be
+        read with loadIntervals. Can only be run after computeIntervals
+        has been run.
+        """
+        if not self._homologyComputed:
+            print("Warning: homology has not yet been computed. Saving empty intervals.")
+        arrays = []
+        for k in range(len(self.intervals)):
+            intervals = np.array(self.intervals[k],dtype = float).reshape(-1,2)
+            # cubes of dimension k have 2**k vertices
+            size = 1 << k if self._cubical else k+1
+            births = np.full((len(intervals),size),-1,dtype = np.int64)
+            deaths = np.full((len(intervals),2*size if self._cubical else size+1),-1,dtype = np.int64)
+            arrays.append(("intervals{}".format(k),intervals))
+            arrays.append(("births{}".format(k),births))
+            arrays.append(("deaths{}".format(k),deaths))
+        # pairs are stored by dimension, in the same order as intervals
+        filled = [0 for k in range(self.dim+1)]
+        for (t,s) in self.pairs:
+            k = t.dim-1
+            arrays[3*k+1][1][filled[k]] = t.vertices
+            if s is not None:
+                arrays[3*k+2][1][filled[k]] = s.vertices
+            filled[k] += 1
+        writeArrays(path,"ZomorodianCarlsson",arrays,{"dimension": len(self.intervals)-1,"field": self.field,"strict": self._strict})
+
     def getIntervals(self,d):
         """
         Returns the list of d-dimensional homology elements.
@@ -237,14 +1246,41 @@ class ZomorodianCarlsson:
             print("Warning: homology has not yet been computed. This will return an empty list.")
         return self.intervals[d][:]
 
+    def diagram(self,k):
+        """
+        Returns the k-dimensional intervals as a PersistenceDiagram.
+        Can only be run after computeIntervals has been run.
+        """
+        if not self._homologyComputed:
+            print("Warning: homology has not yet been computed. This will return an empty diagram.")
+        return PersistenceDiagram(self.intervals[k])
+
     def bettiNumber(self,k,l,p):
-        res = 0
+        """
+        Returns the number of k-dimensional classes born at l or before
+        and still alive at l+p. For many values of l, use
+        self.diagram(k).bettiCurve instead.
+        """
         if not self._homologyComputed:
             print("Warning: homology has not yet been computed. This will return 0.")
-        for (i,j) in self.intervals[k]:
-            if (i <= l and l + p < j ) and p>=0:
-                    res+=1
-        return res
+        return int(PersistenceDiagram(self.intervals[k]).bettiCurve([l],p)[0])
 
 
 
+def loadIntervals(path,mmap = True):
+    """
+    Reads a file written by ZomorodianCarlsson.saveIntervals.
+    Returns a couple (intervals,pairs) where intervals[k] is an
+    array of shape (n,2) containing the k-dimensional intervals,
+    and pairs[k] a couple of arrays (births,deaths) containing the
+    vertices of the simplices creating and killing these classes,
+    row by row. Rows of -1 stand for infinite intervals. If mmap is
+    True, arrays are read-only memory maps of the file.
+    """
+    meta,arrays = readArrays(path,"ZomorodianCarlsson",mmap)
+    intervals = []
+    pairs = []
+    for k in range(meta["dimension"]+1):
+        intervals.append(arrays["intervals{}".format(k)])
+        pairs.append((arrays["births{}".format(k)],arrays["deaths{}".format(k)]))
+    return intervals,pairs
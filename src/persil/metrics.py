@@ -0,0 +1,110 @@
+# Instrumentation of Rips constructions and persistence computations. A Metrics instance
+# given to RipsComplex or ZomorodianCarlsson collects timings, counts and reduction
+# statistics, and forwards progress to an optional callback.
+
+from contextlib import contextmanager
+import heapq
+import time
+
+
+class Metrics:
+    def __init__(self,callback = None,longest = 10):
+        """
+        Collects measurements of the computations it is given to, with the
+        metrics argument of RipsComplex and ZomorodianCarlsson. The same
+        instance can be given to both.
+
+        Arguments:
+        - callback: function called as callback(phase,done,total) to report
+        progress, every 1000 simplices or so. Default value: None
+        - longest: number of reduced columns kept in self.longest.
+        Default value: 10
+
+        Attributes:
+        - times: dict of the wall time spent in each phase, in seconds. Phases
+        are "distances", "collapse", "sparsification" and "skeleton" for
+        RipsComplex, "landmarks" and "distances" for WitnessComplex,
+        "initialization" and "reduction" for ZomorodianCarlsson. Times add
+        up if a phase is run several times.
+        - simplices: number of simplices by number of vertices: simplices[k]
+        for simplices with k vertices, simplices[0] is 0
+        - columns, additions, fillIn, maxFillIn: dicts giving, for each number
+        of vertices k, the number of reduced columns of simplices with k
+        vertices, the number of column additions done to reduce them, the
+        total and the largest number of terms in the reduced columns. With
+        the cohomology algorithm, columns are coboundaries.
+        - longest: list of couples (additions,index) of the columns which
+        needed the most additions, the longest first. index is the index
+        of the simplex in the ZomorodianCarlsson instance, whose simplex is
+        zc.simplices[index].
+        """
+        self.callback = callback
+        self.times = {}
+        self.simplices = []
+        self.columns = {}
+        self.additions = {}
+        self.fillIn = {}
+        self.maxFillIn = {}
+        self._longestSize = longest
+        self._longest = []
+
+    @contextmanager
+    def phase(self,name):
+        """
+        Context manager adding the time spent in its block to phase name.
+        """
+        start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.times[name] = self.times.get(name,0.) + time.perf_counter() - start
+
+    def progress(self,phase,done,total):
+        if self.callback is not None:
+            self.callback(phase,done,total)
+
+    def setSimplexCounts(self,counts):
+        self.simplices = list(counts)
+
+    def column(self,k,index,additions,size):
+        """
+        Records the reduction of the column of simplex index, which has k
+        vertices: additions columns were added to it, and size terms remain.
+        """
+        self.columns[k] = self.columns.get(k,0) + 1
+        self.additions[k] = self.additions.get(k,0) + additions
+        self.fillIn[k] = self.fillIn.get(k,0) + size
+        if size > self.maxFillIn.get(k,0):
+            self.maxFillIn[k] = size
+        if len(self._longest) < self._longestSize:
+            heapq.heappush(self._longest,(additions,index))
+        elif additions > self._longest[0][0]:
+            heapq.heapreplace(self._longest,(additions,index))
+
+    @property
+    def longest(self):
+        return sorted(self._longest,reverse = True)
+
+    def report(self):
+        """
+        Returns all measurements as a dict, which can be written as JSON.
+        """
+        dims = sorted(self.columns)
+        return {"times": dict(self.times),
+                "simplices": list(self.simplices),
+                "columns": dict((k,self.columns[k]) for k in dims),
+                "additions": dict((k,self.additions[k]) for k in dims),
+                "fillIn": dict((k,self.fillIn[k]) for k in dims),
+                "maxFillIn": dict((k,self.maxFillIn.get(k,0)) for k in dims),
+                "longest": [list(c) for c in self.longest]}
+
+    def __str__(self):
+        lines = ["{}: {:.3f}s".format(phase,t) for (phase,t) in self.times.items()]
+        if self.simplices:
+            lines.append("simplices by number of vertices: {}".format(self.simplices[1:]))
+        for k in sorted(self.columns):
+            lines.append("{} vertices: {} columns, {} additions, {:.1f} terms on average, {} at most".format(
+                k,self.columns[k],self.additions[k],self.fillIn[k]/self.columns[k],self.maxFillIn.get(k,0)))
+        if self._longest:
+            lines.append("longest reductions (additions,index): {}".format(self.longest))
+        return "\n".join(lines)
@@ -1,16 +1,34 @@
 # Base classes for simplices and simplex chains
 
+from math import comb
 
-class Simplex:
-    def __init__(self,l):
-        self.vertices = l[:]
-        self.vertices.sort()
-        self.dim = len(l)
 
+class Simplex:
+    # Simplices are not modified once created: their hash is computed once, and their
+    # faces are only kept if faces is called with cache = True.
+    __slots__ = ("vertices","dim","_hash","_faces")
 
+    def __init__(self,l):
+        self.vertices = tuple(sorted(l))
+        self.dim = len(self.vertices)
+        self._hash = hash(self.vertices)
+        self._faces = None
+
+    @classmethod
+    def fromSorted(cls,vertices):
+        """
+        Returns the simplex of the given tuple of vertices, which must
+        already be sorted in increasing order. It is not copied or checked.
+        """
+        s = object.__new__(cls)
+        s.vertices = vertices
+        s.dim = len(vertices)
+        s._hash = hash(vertices)
+        s._faces = None
+        return s
 
     def __eq__(self,other):
-        return (self.vertices == other.vertices)
+        return self is other or self.vertices == other.vertices
 
     def __lt__(self,other): # should only be used for simplices of same dimension
         for (x,y) in zip(self.vertices,other.vertices):
@@ -20,20 +38,51 @@ class Simplex:
 
 
     def __hash__(self):
-        return hash(tuple(self.vertices))
+        return self._hash
 
     def __str__(self):
-        return str(self.vertices)
+        return str(list(self.vertices))
 
     def __repr__(self):
-        return "Simplex{}".format(str(self.vertices))
+        return "Simplex{}".format(str(self))
 
+    def __getstate__(self):
+        return self.vertices
 
-    def faces(self):
-        res = []
-        for i in range(self.dim):
-            res.append(Simplex(self.vertices[:i]+self.vertices[i+1:]))
-        return res
+    def __setstate__(self,vertices):
+        self.vertices = vertices
+        self.dim = len(vertices)
+        self._hash = hash(vertices)
+        self._faces = None
+
+
+    def faces(self,cache = False):
+        """
+        Returns the list of the faces of the simplex, the face without
+        vertex i being at position i. A list kept by an earlier call with
+        cache = True is returned as it is, so it must not be modified.
+
+        Arguments:
+        - cache: whether to keep the list of faces with the simplex, for
+          simplices whose faces are needed many times. Default value: False
+        """
+        if self._faces is not None:
+            return self._faces
+        v = self.vertices
+        faces = [Simplex.fromSorted(v[:i]+v[i+1:]) for i in range(self.dim)]
+        if cache:
+            self._faces = faces
+        return faces
+
+
+
+def simplexKey(vertices):
+    """
+    Returns the index of the sorted tuple of vertices in the combinatorial
+    number system, which is the rank of the simplex among the simplices
+    of the same dimension, in colexicographic order.
+    """
+    return sum(comb(vertices[i],i+1) for i in range(len(vertices)))
 
 
 
@@ -121,22 +170,3 @@ class SimplexChain:
     def __repr__(self):
         return str(self)
 
-
-
-def boundary(schain):
-    res = SimplexChain([],schain.complex)
-
-    for j in schain.coeffs:
-        faces = j.faces()
-        l = [(faces[i],(-1)**i) for i in range(shain.complex.simplices[j].dim) ]
-        res += schain.coeffs[s] * SimplexChain(l,schain.complex)
-    return res
-
-def simplexBoundary(s,complex):
-    res = SimplexChain([],complex)
-    if s.dim == 1:
-        return res
-    faces = s.faces()
-    l = [(complex._indexBySimplex[faces[i]],(-1)**i) for i in range(s.dim) ]
-    res += SimplexChain(l,complex)
-    return res
\ No newline at end of file
@@ -0,0 +1,72 @@
+# Binary files of numpy arrays, used to save filtered complexes and persistence intervals.
+# A file starts with a magic string and the length of a JSON header, on 8 bytes each. The
+# header gives the kind of content, some metadata, and the name, dtype, shape and offset of
+# each array. Arrays follow in C order, aligned on 64 bytes, so they can be opened with
+# numpy.memmap without any copy.
+
+import json
+import struct
+import numpy as np
+
+
+MAGIC = b"PERSIL01"
+ALIGNMENT = 64
+
+
+def writeArrays(path,kind,arrays,meta = None):
+    """
+    Writes a file of arrays.
+
+    Arguments:
+    - path: path of the file
+    - kind: string describing the content of the file
+    - arrays: list of couples (name,array). Arrays are written one after
+    the other, so numpy memmaps are streamed to the file.
+    - meta: optional dict of JSON serializable metadata
+    """
+    arrays = [(name,np.asarray(a)) for (name,a) in arrays]
+    descriptions = []
+    offset = 0
+    for (name,a) in arrays:
+        descriptions.append({"name": name,"dtype": a.dtype.str,"shape": list(a.shape),"offset": offset})
+        offset += -(-a.nbytes // ALIGNMENT) * ALIGNMENT
+    header = json.dumps({"kind": kind,"meta": meta or {},"arrays": descriptions}).encode()
+    start = -(-(len(MAGIC) + 8 + len(header)) // ALIGNMENT) * ALIGNMENT
+
+    with open(path,"wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<Q",len(header)))
+        f.write(header)
+        for (description,(name,a)) in zip(descriptions,arrays):
+            f.write(b"\0" * (start + description["offset"] - f.tell()))
+            np.ascontiguousarray(a).tofile(f)
+
+
+def readArrays(path,kind = None,mmap = True):
+    """
+    Reads a file written by writeArrays. Returns its metadata and a
+    dict of its arrays by name. If mmap is True, arrays are read-only
+    numpy memmaps of the file, otherwise they are loaded in memory.
+    If kind is given, checks that the file has this kind of content.
+    """
+    with open(path,"rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError("{} is not a persil file".format(path))
+        (length,) = struct.unpack("<Q",f.read(8))
+        header = json.loads(f.read(length).decode())
+        if kind is not None and header["kind"] != kind:
+            raise ValueError("{} contains {}, not {}".format(path,header["kind"],kind))
+        start = -(-(len(MAGIC) + 8 + length) // ALIGNMENT) * ALIGNMENT
+
+        arrays = {}
+        for description in header["arrays"]:
+            dtype = np.dtype(description["dtype"])
+            shape = tuple(description["shape"])
+            offset = start + description["offset"]
+            count = int(np.prod(shape))
+            if mmap and count > 0:
+                arrays[description["name"]] = np.memmap(path,dtype = dtype,mode = "r",offset = offset,shape = shape)
+            else:
+                f.seek(offset)
+                arrays[description["name"]] = np.fromfile(f,dtype = dtype,count = count).reshape(shape)
+    return header["meta"],arrays
@@ -0,0 +1,143 @@
+# Persistence of a point cloud at several thresholds and dimensions. The Rips complex at
+# threshold t is made of the simplices of value lower than t of any Rips complex at a larger
+# threshold, in the same order, so its intervals are those of the larger complex truncated at
+# t. A sweep is therefore computed once, at its largest threshold and dimension, and distances
+# and intervals are cached by point cloud, so later queries on the same points are truncations.
+
+from .vietorisrips import RipsComplex, euclidianDistance
+from .homology import ZomorodianCarlsson
+
+from numpy import inf
+from collections import OrderedDict
+import hashlib
+import pickle
+import numpy as np
+
+
+def _truncate(intervals,threshold):
+    # intervals of a filtration truncated before threshold: intervals born before it are
+    # kept, and those which die at threshold or later become infinite
+    res = []
+    for k in range(len(intervals)):
+        a = np.array(intervals[k],dtype = float).reshape(-1,2)
+        a = a[a[:,0] < threshold]
+        a[a[:,1] >= threshold,1] = inf
+        res.append([(x,y) for (x,y) in a.tolist()])
+    return res
+
+
+class RipsSweep:
+    """
+    Computes the persistence intervals of Rips complexes of point clouds
+    for several thresholds and dimensions, reusing the computations made
+    on the same points.
+
+    For each point cloud, identified by a hash of its coordinates, the
+    distances are computed once, and the intervals are computed for the
+    largest threshold and dimension asked so far. Queries with a lower
+    threshold and dimension are answered by truncating these intervals,
+    which is exact: the intervals (x,y) with x < t are kept, and y becomes
+    inf if y >= t. A query with a larger threshold or dimension computes
+    the intervals again, from the cached distances.
+
+    Parameters:
+
+    distance : as in RipsComplex, the same for all clouds.
+
+    algorithm, strict : passed to ZomorodianCarlsson. With "implicit",
+    intervals are computed with RipsComplex.compute_intervals instead,
+    without building the complex.
+
+    columnar, n_jobs : passed to RipsComplex.
+
+    cacheSize : number of point clouds whose distances and intervals are
+    kept. The least recently used cloud is forgotten first.
+
+    """
+    def __init__(self,distance = euclidianDistance,algorithm = "cohomology",strict = True,columnar = False,n_jobs = 1,cacheSize = 4):
+        if algorithm not in ("standard","twist","cohomology","implicit"):
+            raise ValueError("Unknown algorithm {}".format(algorithm))
+        self.distance = distance
+        self.algorithm = algorithm
+        self.strict = strict
+        self.columnar = columnar
+        self.n_jobs = n_jobs
+        self.cacheSize = cacheSize
+        self._cache = OrderedDict() # by hash of the points, [rips,threshold,maxDimension,intervals]
+
+    def key(self,points):
+        """
+        Returns the hash identifying the point cloud points in the cache:
+        a digest of its coordinates as an array of floats, or of its
+        pickled points if they are not numbers.
+        """
+        try:
+            a = np.ascontiguousarray(np.asarray(points,dtype = float))
+            data = repr(a.shape).encode() + a.tobytes()
+        except (TypeError,ValueError):
+            data = pickle.dumps(points)
+        return hashlib.blake2b(data,digest_size = 16).hexdigest()
+
+    def clear(self):
+        """
+        Empties the cache.
+        """
+        self._cache.clear()
+
+    def intervals(self,points,threshold,maxDimension = 1):
+        """
+        Returns the intervals of the Rips complex of points at the given
+        threshold, as a list of lists of intervals: the element k holds
+        the k-dimensional intervals, for k up to maxDimension.
+        """
+        return self.sweep(points,[threshold],maxDimension)[0]
+
+    def sweep(self,points,thresholds,maxDimension = 1):
+        """
+        Returns the list of the intervals of the Rips complex of points at
+        each threshold of thresholds, each given as by self.intervals, from
+        at most one computation, at the largest threshold.
+        """
+        thresholds = list(thresholds)
+        if not thresholds:
+            return []
+        entry = self._entry(points,max(thresholds),maxDimension)
+        return [_truncate(entry[3][:maxDimension+1],t) for t in thresholds]
+
+    def _entry(self,points,threshold,maxDimension):
+        # returns the cache entry of points, with intervals computed at least at threshold and maxDimension
+        key = self.key(points)
+        entry = self._cache.get(key)
+        if entry is None:
+            rips = RipsComplex(points,self.distance,threshold,n_jobs = self.n_jobs)
+            entry = [rips,-inf,-1,None]
+        else:
+            self._cache.move_to_end(key)
+        if threshold > entry[1] or maxDimension > entry[2]:
+            threshold = max(threshold,entry[1])
+            maxDimension = max(maxDimension,entry[2])
+            entry[3] = self._compute(entry[0],threshold,maxDimension)
+            entry[1],entry[2] = threshold,maxDimension
+        self._cache[key] = entry
+        while len(self._cache) > self.cacheSize:
+            self._cache.popitem(last = False)
+        return entry
+
+    def _compute(self,rips,threshold,maxDimension):
+        # intervals of dimensions 0..maxDimension of the Rips complex at threshold, from the distances of rips
+        rips.threshold = threshold
+        intervals = [[] for k in range(maxDimension+1)]
+        if rips.nPoints == 0:
+            return intervals
+        if self.algorithm == "implicit":
+            found = rips.compute_intervals(maxDimension,strict = self.strict)
+        else:
+            rips.compute_skeleton(maxDimension+1,columnar = self.columnar)
+            zc = ZomorodianCarlsson(rips.complex,strict = self.strict,algorithm = self.algorithm,dimensions = list(range(maxDimension+1)))
+            zc.computeIntervals()
+            found = zc.intervals
+            # the complex is not needed by later queries, which truncate the intervals
+            rips.complex = None
+        for k in range(min(maxDimension+1,len(found))):
+            intervals[k] = found[k]
+        return intervals
@@ -1,7 +1,15 @@
 from .simplexchain import *
 from .homology import *
-
-from numpy import sqrt
+from .homology import _reduceZ2
+
+from numpy import sqrt, inf
+from array import array
+from math import comb
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import itertools
+import weakref
 import matplotlib.pyplot as plt
 import numpy as np
 
@@ -15,37 +23,502 @@ def euclidianDistance(x,y):
 
 
 
+def _gridEdges(X,threshold,blockSize):
+    """
+    Yields arrays (i,j,d) describing the pairs of rows i < j of X at
+    euclidian distance d < threshold. The points are bucketed in a grid
+    of cubic cells of side threshold, so only points lying in the same
+    cell or in adjacent cells are compared. Returns without yielding
+    anything if the grid cannot be indexed by 64 bit keys.
+    """
+    n,D = X.shape
+    cells = np.floor((X - X.min(axis = 0))/threshold).astype(np.int64) + 1
+    strides = []
+    size = 1
+    for extent in (cells.max(axis = 0) + 2).tolist():
+        strides.append(size)
+        size *= extent
+    if size >= 1 << 62:
+        return
+    strides = np.array(strides,dtype = np.int64)
+    keys = cells @ strides
+
+    order = np.argsort(keys,kind = 'stable')
+    cellKeys,cellStart,cellCount = np.unique(keys[order],return_index = True,return_counts = True)
+    nCells = len(cellKeys)
+    pairsPerChunk = max(1,blockSize // D)
+
+    # only half of the neighbouring cells are visited, so that each pair of cells is seen once
+    for offset in itertools.product((0,1,-1),repeat = D):
+        nonzero = [o for o in offset if o != 0]
+        if nonzero and nonzero[0] < 0:
+            continue
+        delta = int(np.dot(offset,strides))
+        if delta == 0:
+            a = np.arange(nCells)
+            b = a
+        else:
+            pos = np.minimum(np.searchsorted(cellKeys,cellKeys+delta),nCells-1)
+            a = np.flatnonzero(cellKeys[pos] == cellKeys+delta)
+            b = pos[a]
+        sizes = cellCount[a]*cellCount[b]
+        ends = np.cumsum(sizes)
+        first = 0
+        while first < len(a):
+            done = ends[first-1] if first else 0
+            last = max(first+1,int(np.searchsorted(ends,done+pairsPerChunk,side = 'right')))
+            ca,cb,sz = a[first:last],b[first:last],sizes[first:last]
+            pairCell = np.repeat(np.arange(len(sz)),sz)
+            local = np.arange(sz.sum()) - np.repeat(np.cumsum(sz)-sz,sz)
+            width = cellCount[cb][pairCell]
+            i = order[cellStart[ca][pairCell] + local//width]
+            j = order[cellStart[cb][pairCell] + local%width]
+            if delta == 0:
+                keep = i < j
+                i,j = i[keep],j[keep]
+            diff = X[i] - X[j]
+            d = np.sqrt((diff*diff).sum(axis = 1))
+            close = d < threshold
+            i,j,d = i[close],j[close],d[close]
+            yield np.minimum(i,j),np.maximum(i,j),d
+            first = last
+
+
+
+
+def _csrGraph(n,i,j,d):
+    # compressed sparse row form of the graph on n vertices with edges (i[k],j[k]) of weight d[k]
+    rows = np.concatenate((i,j)).astype(np.int64)
+    cols = np.concatenate((j,i)).astype(np.int64)
+    order = np.lexsort((cols,rows))
+    indptr = np.zeros(n+1,dtype = np.int64)
+    np.cumsum(np.bincount(rows,minlength = n),out = indptr[1:])
+    return indptr,cols[order],np.concatenate((d,d))[order]
+
+def _relaxedEdgeValues(d,lp,lq,epsilon):
+    """
+    Returns the values at which the edges of lengths d between a point p of
+    insertion radius lp and points q of radii lq <= lp appear in the sparse
+    Rips filtration, inf for edges which never appear. At radius a, a point
+    of radius l has weight 0 up to l/epsilon, then a - l/epsilon up to its
+    death at l/(epsilon(1-epsilon)), and the edge is there once
+    d + w_p(a) + w_q(a) <= 2a, before q dies. The left side minus 2a
+    decreases piecewise linearly with a, so the smallest such a is found
+    between consecutive breakpoints. The value is 2a, as in the Rips complex.
+    """
+    death = lq/(epsilon*(1-epsilon))
+    with np.errstate(invalid = 'ignore'):
+        breaks = np.stack([np.zeros_like(lq),lq/epsilon,death,np.full_like(lq,lp/epsilon),np.full_like(lq,lp/(epsilon*(1-epsilon)))],axis = 1)
+    breaks = np.sort(np.minimum(breaks,death[:,None]),axis = 1)
+    def weight(a,l):
+        return np.where(a <= l/epsilon,0.,np.where(a < l/(epsilon*(1-epsilon)),a - l/epsilon,epsilon*a))
+    f = d[:,None] + weight(breaks,lp) + weight(breaks,lq[:,None]) - 2*breaks
+    below = f <= 0
+    k = np.argmax(below,axis = 1)
+    rows = np.arange(len(d))
+    a1,f1 = breaks[rows,k],f[rows,k]
+    a0,f0 = breaks[rows,np.maximum(k-1,0)],f[rows,np.maximum(k-1,0)]
+    with np.errstate(invalid = 'ignore',divide = 'ignore'):
+        a = np.where(k == 0,a1,a0 + f0*(a1-a0)/(f0-f1))
+    return np.where(below.any(axis = 1),2*a,inf)
+
+def _shareArray(a):
+    # copies array a in a new block of shared memory, returns the block and the copy
+    shm = shared_memory.SharedMemory(create = True,size = max(1,a.nbytes))
+    copy = np.ndarray(a.shape,dtype = a.dtype,buffer = shm.buf)
+    copy[...] = a
+    return shm,copy
+
+def _releaseSharedMemory(shm):
+    shm.unlink()
+    try:
+        shm.close()
+    except BufferError: # some arrays still use it, it will be unmapped with them
+        pass
+
+
+# In worker processes, _worker is a RipsComplex whose arrays are in shared memory
+_worker = None
+_workerMemory = []
+
+def _initWorker(state,shared):
+    global _worker
+    _worker = RipsComplex.__new__(RipsComplex)
+    _worker.__dict__.update(state)
+    for (attr,(name,dtype,shape)) in shared.items():
+        shm = shared_memory.SharedMemory(name = name)
+        _workerMemory.append(shm)
+        setattr(_worker,attr,np.ndarray(shape,dtype = dtype,buffer = shm.buf))
+
+def _workerDistanceRows(bounds):
+    (a,b) = bounds
+    _worker.distances[_worker._rowStart(a):_worker._rowStart(b)] = _worker._distanceRows(a,b)
+
+def _workerCloseEdges(bounds):
+    (a,b) = bounds
+    return _worker._closeEdges(a,b,_worker._distanceRows(a,b))
+
+def _workerCofaces(task):
+    (first,last,maxVertices) = task
+    _worker.complex = _SimplexCollector()
+    for u in range(first,last):
+        nbrs,reach = _worker._lowerEdges(u)
+        _worker._addCofaces([u],0,nbrs,reach,maxVertices)
+    return _worker.complex.sizes,_worker.complex.vertices,_worker.complex.values
+
+
+class _SimplexCollector:
+    # stands for the complex in worker processes, and records the inserted simplices in order
+    def __init__(self):
+        self.sizes = array('b')
+        self.vertices = array('q')
+        self.values = []
+
+    def insert(self,l,d,trusted = False):
+        self.sizes.append(len(l))
+        self.vertices.extend(l)
+        self.values.append(d)
+
+
+
+
 class RipsComplex:
     """
     Class used to process points in a metric space.
 
     Parameters:
 
-    pointList : List of points.
+    pointList : List of points, or (n,D) numpy array.
 
-    distance : function with signature point * point -> float
+    distance : function with signature point * point -> float.
+    The default euclidian distance is computed with numpy.
 
     threshold : float, maximum distance which will be considered
     when constructing the complex
 
     verbose: bool, set to True for info on computation progress
 
+    sparse: bool, set to True to only store the edges shorter than
+    the threshold, as a neighbourhood graph, instead of the full
+    distance matrix. A threshold must then be given.
+
+    n_jobs: int, number of processes computing the distances and
+    the simplices. Points and distances are shared with the processes
+    through shared memory, and the result is the same as with a single
+    process. A custom distance function must be picklable on platforms
+    which do not fork processes.
+
+    metrics: instance of Metrics, which receives the time spent in
+    computing distances and skeletons, and the number of simplices.
+
     """
-    def __init__(self, pointList, distance = euclidianDistance, threshold = None,verbose = False):
+    def __init__(self, pointList, distance = euclidianDistance, threshold = None,verbose = False,sparse = False,n_jobs = 1,metrics = None):
+        self._initPoints(pointList,distance,verbose,sparse,n_jobs,metrics)
+        if sparse:
+            if not threshold:
+                raise ValueError("A threshold is needed to build a sparse Rips complex")
+            self.threshold = threshold
+            self.distances = None
+            with self._phase("distances"):
+                self.compute_neighbourhood_graph()
+            return
+        with self._phase("distances"):
+            self.compute_dist_matrix()
+        self.threshold = threshold if threshold else self._defaultThreshold()
+
+    def _initPoints(self,pointList,distance,verbose,sparse,n_jobs,metrics):
+        # sets the attributes of the points and of the options, shared with the subclasses
+        # which compute other values than distances, such as WitnessComplex
         self._verbose = verbose
+        self._metrics = metrics
         self.points = pointList[:]
         self.distance = distance
         self.nPoints = len(pointList)
-        self.compute_dist_matrix()
-        if not threshold:
-            self.threshold = max([max(a) for a in self.matrix])+1
-        else:
-            self.threshold = threshold
+        self.sparse = sparse
+        self.n_jobs = n_jobs
+        self._collapsedGraph = None # neighbourhood graph after collapse_edges, as (indptr,indices,weights)
+        self._expansionGraph = None # graph used by compute_skeleton, None for the distances
+        self._deaths = None # values after which points get no new simplex, for compute_sparse_skeleton
+        if distance is euclidianDistance:
+            self._pointArray = np.asarray(self.points,dtype = float).reshape(self.nPoints,-1) if self.nPoints else np.zeros((0,1))
+
+    def _defaultThreshold(self):
+        # threshold above all finite values of self.distances, used when none is given
+        finite = self.distances[self.distances < inf]
+        return (finite.max() if len(finite) else 0)+1
+
+    # number of float64 entries allowed in a temporary block of differences
+    _blockSize = 1 << 22
+    # above this dimension, the grid has too many neighbouring cells to be worth it
+    _maxGridDimension = 6
 
     def compute_dist_matrix(self):
-        self.matrix = [[ self.distance(x,y) for x in self.points ] for y in self.points]
+        """
+        Computes the upper triangle of the distance matrix, stored
+        in condensed form in self.distances: distances from point 0
+        to points 1..n-1, then from point 1 to points 2..n-1, etc.
+        With the default euclidian distance, the points are read as
+        an (n,D) array and distances are computed by blocks of rows
+        with numpy. Any other distance function is called once per
+        pair, one row at a time.
+        """
+        n = self.nPoints
+        if self.n_jobs > 1 and n > 1:
+            # the processes write their blocks of rows directly in shared memory
+            shm,self.distances = _shareArray(np.empty(n*(n-1)//2))
+            self._sharedDistances = shm
+            weakref.finalize(self,_releaseSharedMemory,shm)
+            for _ in self._map(_workerDistanceRows,self._rowBlocks(),{"distances": self.distances}):
+                pass
+            return
+        self.distances = np.empty(n*(n-1)//2)
+        for (a,b) in self._rowBlocks():
+            self.distances[self._rowStart(a):self._rowStart(b)] = self._distanceRows(a,b)
+
+    def _phase(self,name):
+        # times the block under name in self._metrics, if there is one
+        if self._metrics is None:
+            return nullcontext()
+        return self._metrics.phase(name)
+
+    def _rowBlocks(self):
+        # bounds (a,b) of the blocks of rows in which distances are computed
+        n = self.nPoints
+        if self.distance is euclidianDistance:
+            rows = max(1,self._blockSize // max(1,n*self._pointArray.shape[1]))
+        else:
+            rows = 1
+        return [(a,min(a+rows,n-1)) for a in range(0,n-1,rows)]
+
+    def _distanceRows(self,a,b):
+        # returns the condensed distances of rows a..b-1
+        n = self.nPoints
+        if self.distance is euclidianDistance:
+            X = self._pointArray
+            diff = X[a:b,None,:] - X[None,a:,:]
+            block = np.sqrt((diff*diff).sum(axis = 2))
+            upper = np.arange(n-a)[None,:] > np.arange(b-a)[:,None]
+            return block[upper]
+        return np.concatenate([np.fromiter((self.distance(self.points[x],q) for q in self.points[x+1:]),dtype = float,count = n-x-1) for x in range(a,b)])
+
+    def _closeEdges(self,a,b,values):
+        # returns the edges (i,j,d) under the threshold among the condensed distances of rows a..b-1
+        rowStarts = self._rowStart(np.arange(a,b+1))
+        close = np.flatnonzero(values < self.threshold) + rowStarts[0]
+        i = np.searchsorted(rowStarts,close,side = 'right') - 1
+        return i+a,close - rowStarts[i] + i+a + 1,values[close - rowStarts[0]]
+
+    def _map(self,function,tasks,shared,sparse = None):
+        # Runs function on each task in a pool of self.n_jobs processes, and yields the results
+        # in order. Arrays in shared (attribute name -> array) are given to the processes through
+        # shared memory, other attributes are sent once to each process.
+        if sparse is None:
+            sparse = self.sparse
+        state = {"nPoints": self.nPoints,"threshold": getattr(self,"threshold",None),"sparse": sparse,
+                 "distance": self.distance,"_blockSize": self._blockSize,"_verbose": False,"_metrics": None,
+                 "_collapsedGraph": None,"_expansionGraph": None,"_deaths": self._deaths}
+        if self.distance is not euclidianDistance:
+            state["points"] = self.points
+        else:
+            shared = dict(shared,_pointArray = self._pointArray)
+
+        blocks = []
+        names = {}
+        try:
+            for (attr,a) in shared.items():
+                if attr == "distances" and getattr(self,"_sharedDistances",None) is not None:
+                    shm = self._sharedDistances
+                else:
+                    shm,_ = _shareArray(a)
+                    blocks.append(shm)
+                names[attr] = (shm.name,a.dtype.str,a.shape)
+            with ProcessPoolExecutor(max_workers = self.n_jobs,initializer = _initWorker,initargs = (state,names)) as pool:
+                count = 0
+                for res in pool.map(function,tasks):
+                    count += 1
+                    if count%100 == 0:
+                        if self._verbose:
+                            print("{}/{} tasks".format(count,len(tasks)))
+                        if self._metrics is not None:
+                            self._metrics.progress("tasks",count,len(tasks))
+                    yield res
+        finally:
+            for shm in blocks:
+                _releaseSharedMemory(shm)
+
+    def compute_neighbourhood_graph(self):
+        """
+        Computes the neighbourhood graph of the points, that is all
+        pairs of points at distance less than the threshold, without
+        computing the full distance matrix. The graph is stored in
+        compressed sparse row form: the neighbours of x are
+        self.indices[self.indptr[x]:self.indptr[x+1]], in increasing
+        order, and self.weights holds the corresponding distances.
+        With the default euclidian distance in low dimension, points
+        are bucketed in a grid so that only nearby pairs are compared.
+        """
+        n = self.nPoints
+        edges = []
+        if self.distance is euclidianDistance and n > 1:
+            if self._pointArray.shape[1] <= self._maxGridDimension:
+                edges = list(_gridEdges(self._pointArray,self.threshold,self._blockSize))
+        if not edges:
+            if self.n_jobs > 1 and n > 1:
+                edges = list(self._map(_workerCloseEdges,self._rowBlocks(),{}))
+            else:
+                edges = [self._closeEdges(a,b,self._distanceRows(a,b)) for (a,b) in self._rowBlocks()]
+
+        i = np.concatenate([e[0] for e in edges] + [np.zeros(0,dtype = np.int64)])
+        j = np.concatenate([e[1] for e in edges] + [np.zeros(0,dtype = np.int64)])
+        d = np.concatenate([e[2] for e in edges] + [np.zeros(0)])
+        self.nEdges = len(d)
+        self.indptr,self.indices,self.weights = _csrGraph(n,i,j,d)
+        if self._verbose:
+            print("Neighbourhood graph has {} edges.".format(self.nEdges))
 
+    def collapse_edges(self):
+        """
+        Simplifies the neighbourhood graph without changing the persistent
+        homology of the Rips complex, before computing the skeleton.
+        An edge uv is dominated by a vertex w if w and all the common
+        neighbours of u and v are neighbours of w. The complex then
+        collapses to the complex without uv, so uv can be left out of
+        the filtration for as long as it is dominated. Edges are processed
+        by decreasing length: each edge gets the first value at which it
+        is not dominated, or is removed if it stays dominated up to the
+        threshold. This is the edge collapse of Boissonnat and Pritam,
+        "Edge collapse and persistence of flag complexes", with the
+        delays of Glisse and Pritam, "Swap, shift and trim to edge
+        collapse a filtration".
+        The simplified graph is used by compute_skeleton with collapse
+        set to True. Returns its number of edges.
+        """
+        n = self.nPoints
+        i,j,d = self._edges()
+        indptr,indices,values = _csrGraph(n,i,j,d)
+        rows = np.repeat(np.arange(n,dtype = np.int64),np.diff(indptr))
+        keys = rows*n + indices # increasing, so that the value of an edge can be found by searchsorted
+
+        for e in np.argsort(d,kind = 'stable')[::-1].tolist():
+            u,v = int(i[e]),int(j[e])
+            t = float(d[e])
+            # common neighbours x of u and v, which become common neighbours at value a[x]
+            fu,fv = indptr[u],indptr[v]
+            common,iu,iv = np.intersect1d(indices[fu:indptr[u+1]],indices[fv:indptr[v+1]],assume_unique = True,return_indices = True)
+            a = np.maximum(values[fu+iu],values[fv+iv])
+            common,a = common[a < inf],a[a < inf]
+            if len(common) == 0:
+                continue
+            # B[w,x] is the value of edge wx, and w is its own neighbour
+            pairs = common[:,None]*n + common[None,:]
+            pos = np.minimum(np.searchsorted(keys,pairs),len(keys)-1)
+            B = np.where(keys[pos] == pairs,values[pos],inf)
+            np.fill_diagonal(B,-inf)
+            # w dominates uv at s if a[w] <= s and B[w,x] <= s whenever a[x] <= s. Then it dominates
+            # it until a common neighbour x appears before being a neighbour of w
+            s = t
+            while s < inf:
+                present = a <= s
+                dominating = present & np.all(B[:,present] <= s,axis = 1)
+                if not dominating.any():
+                    break
+                failing = (a[None,:] > s) & (B > a[None,:])
+                s = float(np.where(failing[dominating],a[None,:],inf).min(axis = 1).max())
+            if s > t:
+                values[np.searchsorted(keys,[u*n+v,v*n+u])] = s
+
+        kept = values < inf
+        collapsedIndptr = np.zeros(n+1,dtype = np.int64)
+        np.cumsum(np.bincount(rows[kept],minlength = n),out = collapsedIndptr[1:])
+        self._collapsedGraph = (collapsedIndptr,indices[kept],values[kept])
+        if self._verbose:
+            print("Edge collapse kept {} edges out of {}.".format(int(kept.sum())//2,len(d)))
+        return int(kept.sum())//2
+
+    def _edges(self):
+        # returns the arrays (i,j,d) of the edges ij under the threshold, with i < j, and their lengths
+        n = self.nPoints
+        if self.sparse:
+            rows = np.repeat(np.arange(n,dtype = np.int64),np.diff(self.indptr))
+            upper = rows < self.indices
+            return rows[upper],self.indices[upper],self.weights[upper]
+        close = np.flatnonzero(self.distances < self.threshold)
+        rowStarts = self._rowStart(np.arange(n+1))
+        i = np.searchsorted(rowStarts,close,side = 'right') - 1
+        return i,close - rowStarts[i] + i + 1,self.distances[close]
+
+    def _rowStart(self,x):
+        # position in self.distances of the distance between x and x+1
+        return x*self.nPoints - (x*(x+1))//2
+
+    def _condensedIndex(self,x,y):
+        # position of d(x,y) in self.distances, for x < y. Works on arrays
+        return x*self.nPoints - (x*(x+1))//2 + y - x - 1
+
+    def dist(self,x,y):
+        """
+        Returns the distance between the points of index x and y.
+        For a sparse complex, pairs further apart than the threshold
+        have distance inf.
+        """
+        if x == y:
+            return 0.
+        if self.sparse:
+            row = self.indices[self.indptr[x]:self.indptr[x+1]]
+            k = int(np.searchsorted(row,y))
+            if k < len(row) and row[k] == y:
+                return float(self.weights[self.indptr[x]+k])
+            return inf
+        if x > y:
+            x,y = y,x
+        return float(self.distances[self._condensedIndex(x,y)])
+
+    @property
+    def matrix(self):
+        """
+        The full distance matrix, as an (n,n) array built from
+        self.distances at each access, with inf for the pairs which are
+        not edges of a sparse complex. It is kept for compatibility with
+        the list of lists which RipsComplex used to store: self.distances
+        and dist take half the memory, or none for a sparse complex.
+        """
+        n = self.nPoints
+        if self.sparse:
+            res = np.full((n,n),inf)
+            res[np.repeat(np.arange(n),np.diff(self.indptr)),self.indices] = self.weights
+            np.fill_diagonal(res,0.)
+            return res
+        res = np.zeros((n,n))
+        i,j = np.triu_indices(n,1)
+        res[i,j] = res[j,i] = self.distances
+        return res
 
+    def computeWeight(self,s):
+        """
+        Returns the value of the simplex s (a Simplex or a list of
+        vertices) in the Rips filtration: the largest distance between
+        two of its vertices, 0 for a vertex. It is kept for compatibility,
+        and computed from the distances of the pairs of vertices of s.
+        """
+        vertices = sorted(s.vertices if isinstance(s,Simplex) else s)
+        return max((self.dist(x,y) for (k,x) in enumerate(vertices) for y in vertices[k+1:]),default = 0.)
+
+    def upperNeighbours(self,x,threshold = None):
+        """
+        Returns the array of points y > x at distance less than the
+        threshold from x, and the array of the corresponding distances.
+        """
+        if not threshold:
+            threshold = self.threshold
+        if self.sparse:
+            first,last = self.indptr[x],self.indptr[x+1]
+            first += np.searchsorted(self.indices[first:last],x,side = 'right')
+            nbrs,row = self.indices[first:last],self.weights[first:last]
+            close = np.flatnonzero(row < threshold)
+            return nbrs[close],row[close]
+        row = self.distances[self._rowStart(x):self._rowStart(x+1)]
+        close = np.flatnonzero(row < threshold)
+        return close+x+1, row[close]
 
     def plot(self,threshold = None):
         """
@@ -57,97 +530,366 @@ class RipsComplex:
         if not threshold:
             threshold = self.threshold
 
-        for x in self.points:
-            plt.plot(x[0],x[1],'ro')
-            for y in self.points:
-                if x < y and self.distance(x,y) < threshold:
-                    plt.plot([x[0],y[0]],[x[1],y[1]],'k-')
+        for x in range(self.nPoints):
+            p = self.points[x]
+            plt.plot(p[0],p[1],'ro')
+            for y in self.upperNeighbours(x,threshold)[0].tolist():
+                q = self.points[y]
+                plt.plot([p[0],q[0]],[p[1],q[1]],'k-')
         plt.show()
 
 
-    def compute_skeleton(self,maxDimension = None):
+    def compute_skeleton(self,maxDimension = None,columnar = False,collapse = False):
         """
         Computes the Rips-Vietoris complex of the points, with the
         chosen threshold, and up to a given maximum dimension. If
         no maximum dimension is specified, all simplices are computed.
-        Algorithm comes from Afra Zomorodian :
+        Algorithm comes from Afra Zomorodian (INCREMENTAL-VR) :
         https://citeseerx.ist.psu.edu/viewdoc/download?doi=10.1.1.210.426&rep=rep1&type=pdf
+        Simplices are enumerated depth first from each vertex towards
+        lower vertices, so only the current branch is kept in memory.
+        The value of a simplex is the maximum of the value of the simplex
+        it extends and of the lengths of the new edges, and each simplex
+        goes straight into the complex, after all of its faces.
+        If columnar is True, the complex is built in the columnar
+        storage mode of FilteredComplex, which uses much less memory.
+        If collapse is True, the edges are first simplified with
+        collapse_edges: the complex is much smaller, and has the same
+        persistence intervals in all dimensions lower than maxDimension,
+        except for intervals of length zero.
         """
         if not maxDimension:
             maxDimension = self.nPoints
 
+        if collapse and self._collapsedGraph is None:
+            with self._phase("collapse"):
+                self.collapse_edges()
+        self._expansionGraph = self._collapsedGraph if collapse else None
+        self._deaths = None
+        self._buildComplex(maxDimension,columnar)
 
-        prevSimplices = []
-        currSimplices = []
-
-
-        self.complex = FilteredComplex()
-
-        # initialize 1-skeleton
-        for x in range(self.nPoints):
-            for y in range(self.nPoints):
-                self.complex.insert([x],0)
-                if x < y and self.matrix[x][y] < self.threshold:
-                    self.complex.insert([x,y],self.matrix[x][y])
-                    currSimplices.append([x,y])
+    def compute_sparse_skeleton(self,epsilon,maxDimension = None,columnar = False):
+        """
+        Computes a sparse Rips filtration approximating the Rips complex,
+        in place of compute_skeleton, following Sheehy, "Linear-size
+        approximations to the Vietoris-Rips filtration", in the form of
+        Cavanna, Jahanseir and Sheehy, "A geometric perspective on sparse
+        filtrations". Points are ordered by greedy_permutation. A point of
+        insertion radius l gets a weight growing from value 2l/epsilon,
+        which is added to the lengths of its edges, and gets no new simplex
+        after value 2l/(epsilon(1-epsilon)), when it is covered by earlier
+        points. Each simplex is added once, at the first value at which it
+        is in the relaxed Rips complex, so the filtration is nested.
+        For points in a space of bounded doubling dimension, the complex
+        has O(n) simplices in each dimension, and for epsilon <= 1/3 its
+        persistence diagram is a multiplicative 1+O(epsilon) approximation
+        of the diagram of the Rips complex: intervals (b,d) of the Rips
+        complex, seen on a log scale, move by O(epsilon). Only values lower
+        than the threshold are kept. Simplices of dimension up to
+        maxDimension are computed, and columnar is as in compute_skeleton.
+        """
+        if not 0 < epsilon < 1:
+            raise ValueError("epsilon must be between 0 and 1")
+        if not maxDimension:
+            maxDimension = self.nPoints
 
+        with self._phase("sparsification"):
+            order,radii = self.greedy_permutation()
+            deaths = np.empty(self.nPoints)
+            deaths[order] = 2*radii/(epsilon*(1-epsilon))
+            edges = []
+            for x in range(self.nPoints-1):
+                p = int(order[x])
+                later = order[x+1:]
+                values = _relaxedEdgeValues(self._distancesFrom(p)[later],radii[x],radii[x+1:],epsilon)
+                kept = values < self.threshold
+                edges.append((np.full(int(kept.sum()),p,dtype = np.int64),later[kept],values[kept]))
+            i = np.concatenate([e[0] for e in edges] + [np.zeros(0,dtype = np.int64)])
+            j = np.concatenate([e[1] for e in edges] + [np.zeros(0,dtype = np.int64)])
+            values = np.concatenate([e[2] for e in edges] + [np.zeros(0)])
+            self._expansionGraph = _csrGraph(self.nPoints,i,j,values)
+        self._deaths = deaths
+        if self._verbose:
+            print("Sparse Rips graph has {} edges.".format(len(values)))
+        self._buildComplex(maxDimension,columnar)
 
-        # compute i+1-skeleton from i-skeleton
-        simplexList = []
-        for i in range(1,maxDimension):
+    def greedy_permutation(self):
+        """
+        Returns the greedy permutation of the points, as an array order
+        of point indices, and the array of their insertion radii. Each
+        point is the farthest one from the points before it, and its
+        insertion radius is its distance to them, inf for the first one.
+        """
+        n = self.nPoints
+        order = np.zeros(n,dtype = np.int64)
+        radii = np.full(n,inf)
+        if n == 0:
+            return order,radii
+        nearest = self._distancesFrom(0)
+        for x in range(1,n):
+            p = int(np.argmax(nearest))
+            order[x] = p
+            radii[x] = nearest[p]
+            np.minimum(nearest,self._distancesFrom(p),out = nearest)
+        return order,radii
+
+    def _distancesFrom(self,p):
+        # array of the distances from point p to all points
+        if self.distances is not None:
+            others = np.arange(self.nPoints)
+            positions = self._condensedIndex(np.minimum(others,p),np.maximum(others,p))
+            positions[p] = 0
+            d = self.distances[positions]
+            d[p] = 0.
+            return d
+        if self.distance is euclidianDistance:
+            diff = self._pointArray - self._pointArray[p]
+            return np.sqrt((diff*diff).sum(axis = 1))
+        return np.fromiter((self.distance(self.points[p],q) for q in self.points),dtype = float,count = self.nPoints)
+
+    def _buildComplex(self,maxDimension,columnar):
+        self.complex = FilteredComplex(columnar = columnar)
+        with self._phase("skeleton"):
+            self._computeSkeleton(maxDimension)
+        if self._metrics is not None:
+            counts = [0 for k in range(self.complex._dimension+1)]
+            if columnar:
+                for (k,column) in self.complex._columns.items():
+                    counts[k] = len(column)
+            else:
+                for s in self.complex._simplices:
+                    counts[s.dim] += 1
+            self._metrics.setSimplexCounts(counts)
+
+    def _computeSkeleton(self,maxDimension):
+        if self.n_jobs > 1 and self.nPoints > 1:
+            # vertices are split in ranges of roughly equal work, since higher vertices have more lower neighbours
+            chunks = 8*self.n_jobs
+            bounds = sorted(set([int(self.nPoints*sqrt(i/chunks)) for i in range(chunks+1)]))
+            tasks = [(bounds[i],bounds[i+1],maxDimension+1) for i in range(len(bounds)-1)]
+            if self._expansionGraph is not None:
+                # workers see the collapsed graph as a sparse neighbourhood graph
+                shared = dict(zip(("indptr","indices","weights"),self._expansionGraph))
+            elif self.sparse:
+                shared = {"indptr": self.indptr,"indices": self.indices,"weights": self.weights}
+            else:
+                shared = {"distances": self.distances}
+            for (sizes,vertices,values) in self._map(_workerCofaces,tasks,shared,sparse = self.sparse or self._expansionGraph is not None):
+                self._insertSimplices(sizes,vertices,values)
             if self._verbose:
-                print("Computing {}-simplices.".format(i))
-            prevSimplices = currSimplices[:]
-            currSimplices = []
-            count = 0
-            total = len(prevSimplices)
-            for l in prevSimplices:
-                count +=1
-                if count%1000 ==0 and self._verbose:
-                    print("Step {}: {}/{}".format(i,count,total))
-                neighbours = self.lowerNeighbours(l)
-
-                for v in neighbours:
-                    s = Simplex(l+[v])
-                    simplexList.append(s)
-                    currSimplices.append(l+[v])
+                print("Done creating skeleton: {} simplices.".format(self.complex._numSimplices))
+            return
+
+        for u in range(self.nPoints):
+            if u%1000 == 0:
+                if self._verbose:
+                    print("{}/{} vertices, {} simplices".format(u,self.nPoints,self.complex._numSimplices))
+                if self._metrics is not None:
+                    self._metrics.progress("skeleton",u,self.nPoints)
+            nbrs,reach = self._lowerEdges(u)
+            self._addCofaces([u],0,nbrs,reach,maxDimension+1)
         if self._verbose:
-            print("Done creating skeleton. Computing weights...")
-
-        # Finally, compute the weight of each additional simplex
-        total = len(simplexList)
-        count = 0
-        for s in simplexList:
-            count +=1
-            if count%1000 ==0 and self._verbose:
-                print("{}/{}".format(count,total))
-            value = self.computeWeight(s)
-            self.complex.append(s,value)
-
+            print("Done creating skeleton: {} simplices.".format(self.complex._numSimplices))
+
+
+    def _insertSimplices(self,sizes,vertices,values):
+        # inserts the simplices recorded by a _SimplexCollector, in the same order
+        if self.complex._columnar:
+            sizes = np.frombuffer(sizes,dtype = np.int8)
+            vertices = np.frombuffer(vertices,dtype = np.int64)
+            values = np.array(values,dtype = float)
+            starts = np.cumsum(sizes,dtype = np.int64) - sizes
+            for k in np.unique(sizes).tolist():
+                selected = sizes == k
+                self.complex.extend(vertices[starts[selected][:,None] + np.arange(k)],values[selected],trusted = True)
+            return
+        pos = 0
+        for (k,d) in zip(sizes,values):
+            self.complex.insert(vertices[pos:pos+k].tolist(),d,trusted = True)
+            pos += k
+
+    def _addCofaces(self,tau,value,nbrs,reach,maxVertices):
+        # tau is a sorted list of vertices of the given value, nbrs the increasing array of
+        # common lower neighbours of its vertices, and reach[k] the maximum distance from
+        # nbrs[k] to the vertices of tau.
+        self.complex.insert(tau,value,trusted = True)
+        if self._deaths is not None:
+            # in a sparse filtration, a simplex is only added while all its vertices are alive
+            deaths = np.minimum(self._deaths[nbrs],min([self._deaths[u] for u in tau]))
+            allowed = np.maximum(value,reach) <= deaths
+            nbrs,reach = nbrs[allowed],reach[allowed]
+        if len(tau) >= maxVertices:
+            return
+        last = len(tau)+1 >= maxVertices
+        nbrsList = nbrs.tolist()
+        reachList = reach.tolist()
+        for k in range(len(nbrsList)):
+            v = nbrsList[k]
+            sigmaValue = max(value,reachList[k])
+            if last:
+                self.complex.insert([v]+tau,sigmaValue,trusted = True)
+            else:
+                pos,weights = self._restrictLower(v,nbrs[:k])
+                self._addCofaces([v]+tau,sigmaValue,nbrs[pos],np.maximum(reach[pos],weights),maxVertices)
+
+    def _lowerEdges(self,u):
+        # returns the increasing array of neighbours v < u of u, and the distances to them
+        if self._expansionGraph is not None:
+            indptr,indices,weights = self._expansionGraph
+        elif self.sparse:
+            indptr,indices,weights = self.indptr,self.indices,self.weights
+        else:
+            return self._restrictLower(u,np.arange(u))
+        first,last = indptr[u],indptr[u+1]
+        last = first + np.searchsorted(indices[first:last],u)
+        return indices[first:last],weights[first:last]
+
+    def _restrictLower(self,v,candidates):
+        # candidates is an increasing array of vertices lower than v. Returns the
+        # positions of the neighbours of v among them, and the distances to v.
+        if self.sparse or self._expansionGraph is not None:
+            nbrs,weights = self._lowerEdges(v)
+            _,pos,inRow = np.intersect1d(candidates,nbrs,assume_unique = True,return_indices = True)
+            return pos,weights[inRow]
+        d = self.distances[self._condensedIndex(candidates,v)]
+        pos = np.flatnonzero(d < self.threshold)
+        return pos,d[pos]
 
     def lowerNeighbours(self,l):
-        res = []
-        for v in range(min(l)):
-            inNbrs = True
-            for u in l:
-                if self.matrix[u][v] >= self.threshold:
-                    inNbrs = False
-                    break
-            if inNbrs:
-                res.append(v)
-
-        return res
-
-    def computeWeight(self,s):
-        res = self.complex.degree(s)
-        if res>=0:
-            return res
-
-        for f in s.faces():
-            res = max(res,self.computeWeight(f))
-        return res
-
-
-
-
-
+        """
+        Returns the list of the vertices lower than all vertices
+        of l, and at distance less than the threshold from each
+        of them.
+        """
+        m = max(l)
+        nbrs,_ = self._lowerEdges(m)
+        for u in l:
+            if u != m:
+                nbrs = nbrs[self._restrictLower(u,nbrs[nbrs < u])[0]]
+        return nbrs.tolist()
+
+    def compute_intervals(self,maxDimension = 1,strict = True):
+        """
+        Computes the persistence intervals over Z/2Z of the Rips complex,
+        in dimensions up to maxDimension, without building the complex,
+        in the manner of Bauer, "Ripser: efficient computation of
+        Vietoris-Rips persistence barcodes". Simplices are only listed
+        one dimension at a time, by their value and their key in the
+        combinatorial number system. Intervals of dimension 0 are found
+        with a union-find over the edges. In each higher dimension,
+        coboundaries are computed from the neighbourhood graph and reduced
+        as in the cohomology algorithm of ZomorodianCarlsson: simplices
+        which were pivots in the dimension below are skipped, and only the
+        reduced coboundaries with a pivot are kept, until the dimension
+        is done. Returns the list of the intervals of each dimension, as
+        ZomorodianCarlsson.intervals, and stores it in self.intervals.
+        If strict is True, intervals of length zero are left out.
+
+        Unlike Ripser, cofaces are not enumerated again when they are
+        needed: the simplices of the dimension being reduced are kept as
+        arrays of their vertices, values, keys and numbers, along with the
+        cofaces found for the next dimension. Memory use is therefore the
+        same as for the columnar skeleton of these two dimensions, as built
+        by compute_skeleton(columnar = True): what is saved is the memory of
+        the other dimensions and of the boundary matrix.
+        """
+        n = self.nPoints
+        i,j,d = self._edges()
+        indptr,indices,weights = _csrGraph(n,i,j,d)
+        levels = np.unique(d)
+        intervals = [[] for k in range(maxDimension+1)]
+        # the simplex with k vertices, of value levels[r] and key c, has number r*comb(n,k)+c,
+        # so that numbers follow the filtration order
+        dtype = np.int64 if (len(levels)+1)*comb(n,maxDimension+2) < 1 << 62 else object
+        binomials = np.array([[comb(v,t) for t in range(maxDimension+3)] for v in range(n)],dtype = dtype).reshape(n,maxDimension+3)
+
+        # dimension 0: each edge joining two components kills one of them
+        keys = binomials[j,2] + binomials[i,1]
+        numbers = np.searchsorted(levels,d).astype(dtype)*comb(n,2) + keys
+        parent = list(range(n))
+        def root(x):
+            while parent[x] != x:
+                parent[x] = parent[parent[x]]
+                x = parent[x]
+            return x
+        cleared = set()
+        for e in np.argsort(numbers,kind = 'stable').tolist():
+            (u,v) = (root(int(i[e])),root(int(j[e])))
+            if u != v:
+                parent[max(u,v)] = min(u,v)
+                cleared.add(int(numbers[e]))
+                if d[e] > 0 or not strict:
+                    intervals[0].append((0.,float(d[e])))
+        for x in range(n):
+            if parent[x] == x:
+                intervals[0].append((0.,inf))
+
+        degrees = np.diff(indptr)
+        def commonNeighbours(sigma,first):
+            # neighbours v >= first of all vertices of sigma, and the maximum distance from v to them.
+            # They are taken from the row of the vertex of sigma with the fewest neighbours, and
+            # searched in the sorted rows of the others
+            x = min(sigma,key = degrees.item)
+            a,b = indptr[x],indptr[x+1]
+            a += np.searchsorted(indices[a:b],first)
+            nbrs,reach = indices[a:b],weights[a:b]
+            for u in sigma:
+                if u == x or len(nbrs) == 0:
+                    continue
+                row = indices[indptr[u]:indptr[u+1]]
+                if len(row) == 0:
+                    return row,weights[:0]
+                pos = np.minimum(np.searchsorted(row,nbrs),len(row)-1)
+                found = row[pos] == nbrs
+                nbrs,reach = nbrs[found],np.maximum(reach[found],weights[indptr[u]+pos[found]])
+            return nbrs,reach
+
+        vertices,values = np.stack((i,j),axis = 1),d
+        for k in range(2,maxDimension+2):
+            if self._verbose:
+                print("Dimension {}: {} simplices".format(k-1,len(values)))
+            top = k == maxDimension+1
+            size = comb(n,k+1)
+            pivots = {}
+            cofaces = [] # arrays (rows,new vertices,values) giving the simplices with k+1 vertices
+            for x in np.argsort(numbers,kind = 'stable')[::-1].tolist():
+                sigma = vertices[x].tolist()
+                reduced = int(numbers[x]) not in cleared
+                if top and not reduced:
+                    continue
+                # only the cofaces above sigma are needed if it is not reduced
+                nbrs,reach = commonNeighbours(sigma,0 if reduced else sigma[-1]+1)
+                reach = np.maximum(reach,values[x])
+                if not top:
+                    above = nbrs > sigma[-1]
+                    cofaces.append((np.full(int(above.sum()),x,dtype = np.int64),nbrs[above],reach[above]))
+                if not reduced:
+                    continue
+                # key of the coface with vertex v inserted at position t of sigma
+                t = np.searchsorted(sigma,nbrs)
+                kept = binomials[sigma,np.arange(1,k+1)]
+                shifted = binomials[sigma,np.arange(2,k+2)]
+                before = np.concatenate(([0],np.cumsum(kept)))
+                after = np.concatenate((np.cumsum(shifted[::-1])[::-1],[0]))
+                cofaceKeys = before[t] + binomials[nbrs,t+1] + after[t]
+                column = np.sort(np.searchsorted(levels,reach).astype(dtype)*size + cofaceKeys).tolist()
+                if column and column[0] in pivots:
+                    column,_ = _reduceZ2(column,pivots,1)
+                if not column:
+                    intervals[k-1].append((float(values[x]),inf))
+                    continue
+                pivots[column[0]] = column
+                death = float(levels[column[0] // size])
+                if death > values[x] or not strict:
+                    intervals[k-1].append((float(values[x]),death))
+            if top:
+                break
+            cleared = set(pivots)
+            rows = np.concatenate([c[0] for c in cofaces] + [np.zeros(0,dtype = np.int64)])
+            newVertices = np.concatenate([c[1] for c in cofaces] + [np.zeros(0,dtype = np.int64)])
+            values = np.concatenate([c[2] for c in cofaces] + [np.zeros(0)])
+            keys = keys[rows] + binomials[newVertices,k+1]
+            vertices = np.concatenate((vertices[rows],newVertices[:,None]),axis = 1)
+            numbers = np.searchsorted(levels,values).astype(dtype)*size + keys
+        self.intervals = intervals
+        return intervals
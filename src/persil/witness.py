@@ -0,0 +1,135 @@
+# Lazy witness complexes, built on a small set of landmarks chosen among the points. All
+# points act as witnesses: they decide which landmarks are close to each other, so large
+# point clouds give approximate diagrams from a complex on a few hundred vertices.
+
+from .vietorisrips import RipsComplex, euclidianDistance
+
+from numpy import inf
+import numpy as np
+
+
+class WitnessComplex(RipsComplex):
+    """
+    Lazy witness complex of de Silva and Carlsson, "Topological estimation
+    using witness complexes". The complex is the flag complex over the
+    landmarks in which the edge between landmarks a and b has value
+    min over the points w of max(d(w,a),d(w,b)) - m(w), or 0 if this is
+    negative, where m(w) is the distance from w to its nu-th closest
+    landmark (m(w) = 0 if nu is 0).
+    The edge values replace the distances of RipsComplex, whose methods
+    then apply to the landmarks: the complex is computed with
+    compute_skeleton, and the vertex of index x of the complex is the
+    landmark self.landmarks[x].
+
+    Parameters:
+
+    pointList : List of points, or (n,D) numpy array. All of them are witnesses.
+
+    landmarks : int, number of landmarks to select, or list of the
+    indices of the landmarks in pointList.
+
+    selection : "maxmin" or "random", how landmarks are selected. With
+    "maxmin", each landmark is the point farthest from the landmarks
+    before it, starting from a random point.
+
+    nu : int, 0, 1 or 2 usually. Larger values give smaller edge values.
+
+    seed : seed of the random selection of the landmarks.
+
+    distance, threshold, verbose, n_jobs and metrics are as in RipsComplex.
+    Only edge values lower than the threshold are computed. Distances
+    from the points to the landmarks are computed by blocks of points,
+    in the main process.
+
+    """
+    def __init__(self, pointList, landmarks = 100, distance = euclidianDistance, threshold = None, nu = 2, selection = "maxmin", seed = None, verbose = False, n_jobs = 1, metrics = None):
+        self._initPoints(pointList,distance,verbose,False,n_jobs,metrics)
+        self.nu = nu
+        # all points are witnesses, and the points of the complex are the landmarks
+        self.witnesses = self.points
+        self.nWitnesses = self.nPoints
+        if distance is euclidianDistance:
+            self._witnessArray = self._pointArray
+
+        with self._phase("landmarks"):
+            if np.isscalar(landmarks):
+                self.landmarks = self.select_landmarks(landmarks,selection,seed)
+            else:
+                self.landmarks = np.asarray(landmarks,dtype = np.int64)
+        self.nPoints = len(self.landmarks)
+        if distance is euclidianDistance:
+            self._pointArray = self._witnessArray[self.landmarks]
+            self.points = self._pointArray
+        else:
+            self.points = [self.witnesses[x] for x in self.landmarks.tolist()]
+
+        self.threshold = threshold if threshold else inf
+        with self._phase("distances"):
+            self.compute_witness_values()
+        if not threshold:
+            self.threshold = self._defaultThreshold()
+
+    def select_landmarks(self,k,selection = "maxmin",seed = None):
+        """
+        Returns an array of the indices of k points, selected at random
+        or by the maxmin procedure, among the witnesses.
+        """
+        n = self.nWitnesses
+        k = min(k,n)
+        rng = np.random.default_rng(seed)
+        if selection == "random":
+            return np.sort(rng.choice(n,size = k,replace = False))
+        if selection != "maxmin":
+            raise ValueError("Unknown landmark selection: {}".format(selection))
+        landmarks = np.zeros(k,dtype = np.int64)
+        if k == 0:
+            return landmarks
+        landmarks[0] = rng.integers(n)
+        nearest = self._witnessDistances(landmarks[:1])[:,0]
+        for x in range(1,k):
+            landmarks[x] = int(np.argmax(nearest))
+            np.minimum(nearest,self._witnessDistances(landmarks[x:x+1])[:,0],out = nearest)
+        return landmarks
+
+    def _witnessDistances(self,targets,a = 0,b = None):
+        # returns the (b-a,len(targets)) array of the distances from witnesses a..b-1 to the witnesses targets
+        if b is None:
+            b = self.nWitnesses
+        if self.distance is euclidianDistance:
+            X = self._witnessArray
+            diff = X[a:b,None,:] - X[None,targets,:]
+            return np.sqrt((diff*diff).sum(axis = 2))
+        return np.array([[self.distance(self.witnesses[w],self.witnesses[t]) for t in targets.tolist()] for w in range(a,b)],dtype = float).reshape(b-a,len(targets))
+
+    def compute_witness_values(self):
+        """
+        Computes the values of the edges between landmarks, stored in
+        condensed form in self.distances like the distances of RipsComplex,
+        with inf for edges whose value is not lower than the threshold.
+        Witnesses are processed by blocks, and for each landmark, the
+        values given by the witnesses closer to it than the threshold
+        (relative to m(w)) are computed at once with numpy.
+        """
+        L = self.nPoints
+        self.distances = np.full(L*(L-1)//2,inf)
+        if L < 2:
+            return
+        rows = max(1,self._blockSize // max(1,L*self._pointArray.shape[1] if self.distance is euclidianDistance else L))
+        for a in range(0,self.nWitnesses,rows):
+            b = min(a+rows,self.nWitnesses)
+            D = self._witnessDistances(self.landmarks,a,b)
+            if self.nu > 0:
+                m = np.partition(D,min(self.nu,L)-1,axis = 1)[:,min(self.nu,L)-1]
+                D = np.maximum(D - m[:,None],0.)
+            D[D >= self.threshold] = inf
+            for x in range(L-1):
+                # witnesses close to landmark x give a value to its edges with the landmarks after it
+                close = np.flatnonzero(D[:,x] < inf)
+                if len(close) == 0:
+                    continue
+                row = self.distances[self._rowStart(x):self._rowStart(x+1)]
+                np.minimum(row,np.maximum(D[close,x,None],D[close,x+1:]).min(axis = 0),out = row)
+            if self._verbose:
+                print("{}/{} witnesses".format(b,self.nWitnesses))
+            if self._metrics is not None:
+                self._metrics.progress("witnesses",b,self.nWitnesses)
@@ -19,7 +19,7 @@ r = RipsComplex(l,euclidianDistance,0.23,verbose = True)
 
 r.compute_skeleton(2)
 
-zc = ZomorodianCarlsson(r.complex, strict = True,verbose = True)
+zc = ZomorodianCarlsson(r.complex, strict = True,verbose = True,dimensions = [1])
 
 zc.computeIntervals()
 
@@ -0,0 +1,12 @@
+import random
+
+import pytest
+
+
+@pytest.fixture
+def randomPoints():
+    # points drawn uniformly in the unit cube of dimension D, the same for the same seed
+    def points(n,seed,D = 2):
+        random.seed(seed)
+        return [tuple(random.random() for i in range(D)) for j in range(n)]
+    return points
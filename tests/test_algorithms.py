@@ -0,0 +1,48 @@
+import math
+import random
+
+import pytest
+
+from persil import *
+
+
+def ripsComplex(n,seed,D = 2,maxDimension = 3):
+    random.seed(seed)
+    r = RipsComplex([tuple(random.random() for i in range(D)) for j in range(n)],threshold = 0.6)
+    r.compute_skeleton(maxDimension)
+    return r.complex
+
+def result(fc,algorithm,field = 2,strict = True):
+    zc = ZomorodianCarlsson(fc,algorithm = algorithm,field = field,strict = strict)
+    zc.computeIntervals()
+    pairs = sorted((t.vertices,None if s is None else s.vertices) for (t,s) in zc.pairs)
+    return [sorted(l) for l in zc.intervals],pairs
+
+
+@pytest.mark.parametrize("algorithm",["twist","cohomology"])
+@pytest.mark.parametrize("field",[2,3])
+@pytest.mark.parametrize("strict",[True,False])
+@pytest.mark.parametrize("seed",range(3))
+def test_algorithms_match_standard(algorithm,field,strict,seed):
+    fc = ripsComplex(22,seed,D = 3)
+    assert result(fc,algorithm,field,strict) == result(fc,"standard",field,strict)
+
+
+@pytest.mark.parametrize("algorithm",["standard","twist","cohomology"])
+def test_circle(algorithm):
+    # a circle of 12 points has one 1-dimensional class, from the edge between neighbours to
+    # the triangles across the circle
+    points = [(math.cos(2*math.pi*i/12),math.sin(2*math.pi*i/12)) for i in range(12)]
+    r = RipsComplex(points)
+    r.compute_skeleton(2)
+    zc = ZomorodianCarlsson(r.complex,algorithm = algorithm)
+    zc.computeIntervals()
+    assert len(zc.intervals[1]) == 1
+    (x,y), = zc.intervals[1]
+    assert abs(x - 2*math.sin(math.pi/12)) < 1e-9 and y > x
+    assert sum(1 for (x,y) in zc.intervals[0] if y == float("inf")) == 1
+
+
+def test_unknown_algorithm():
+    with pytest.raises(ValueError):
+        ZomorodianCarlsson(ripsComplex(5,0),algorithm = "other")
@@ -0,0 +1,60 @@
+import itertools
+import random
+
+import pytest
+
+from persil import *
+
+
+def ripsComplex(n,seed,grid = False):
+    random.seed(seed)
+    if grid:
+        # points of a grid, whose many equal distances give simplices of equal degrees
+        points = [(random.randint(0,5),random.randint(0,5)) for i in range(n)]
+        points = list(set(points))
+    else:
+        points = [(random.random(),random.random()) for i in range(n)]
+    r = RipsComplex(points,threshold = 2.5 if grid else 0.45)
+    r.compute_skeleton(3)
+    return r.complex
+
+def sphereComplex(k):
+    # boundary of the simplex on k+2 vertices, a k-dimensional sphere, with degrees by dimension
+    fc = FilteredComplex()
+    for size in range(1,k+2):
+        for s in itertools.combinations(range(k+2),size):
+            fc.insert(list(s),size)
+    return fc
+
+def result(fc,backend,strict = True,algorithm = "standard"):
+    zc = ZomorodianCarlsson(fc,backend = backend,strict = strict,algorithm = algorithm)
+    zc.computeIntervals()
+    pairs = sorted((t.vertices,None if s is None else s.vertices) for (t,s) in zc.pairs)
+    return [sorted(l) for l in zc.intervals],pairs
+
+
+@pytest.mark.parametrize("seed",range(3))
+@pytest.mark.parametrize("grid",[False,True])
+@pytest.mark.parametrize("strict",[True,False])
+@pytest.mark.parametrize("algorithm",["standard","twist"])
+def test_z2_matches_chain(seed,grid,strict,algorithm):
+    fc = ripsComplex(25,seed,grid)
+    assert result(fc,"z2",strict,algorithm) == result(fc,"chain",strict,algorithm)
+
+
+@pytest.mark.parametrize("k",[1,2,3])
+def test_spheres(k):
+    fc = sphereComplex(k)
+    intervals,pairs = result(fc,"z2")
+    assert (intervals,pairs) == result(fc,"chain")
+    assert [sum(1 for (x,y) in l if y == float("inf")) for l in intervals[:k+1]] == [1] + [0]*(k-1) + [1]
+
+
+def test_backend_errors():
+    fc = sphereComplex(1)
+    with pytest.raises(ValueError):
+        ZomorodianCarlsson(fc,field = 3,backend = "z2")
+    with pytest.raises(ValueError):
+        ZomorodianCarlsson(fc,backend = "other")
+    # over Z/3Z, the chain backend is used by default
+    assert ZomorodianCarlsson(fc,field = 3).backend == "chain"
@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+from persil import *
+
+
+def plainIntervals(points,maxDimension,threshold):
+    intervals = [[] for k in range(maxDimension+1)]
+    if len(points) == 0:
+        return intervals
+    r = RipsComplex(points,threshold = threshold)
+    r.compute_skeleton(maxDimension+1)
+    zc = ZomorodianCarlsson(r.complex)
+    zc.computeIntervals()
+    for k in range(min(maxDimension+1,len(zc.intervals))):
+        intervals[k] = sorted(zc.intervals[k])
+    return intervals
+
+def randomClouds(count,seed):
+    rng = np.random.default_rng(seed)
+    # clouds of a few sizes, so that processes reuse the complexes of the sizes they saw
+    return [rng.random((int(rng.choice([0,1,2,9,14])),2)) for i in range(count)]
+
+
+@pytest.mark.parametrize("n_jobs",[1,2])
+@pytest.mark.parametrize("threshold",[None,0.4])
+@pytest.mark.parametrize("collapse",[False,True])
+def test_batch_matches_plain(n_jobs,threshold,collapse):
+    clouds = randomClouds(40,int(collapse))
+    results = dict(batch_persistence(clouds,maxDimension = 1,threshold = threshold,n_jobs = n_jobs,chunksize = 3,collapse = collapse))
+    assert sorted(results) == list(range(len(clouds)))
+    for (i,points) in enumerate(clouds):
+        assert [sorted(l) for l in results[i]] == plainIntervals(points,1,threshold)
+
+
+def test_batch_ordered_and_large_clouds():
+    rng = np.random.default_rng(5)
+    # the largest cloud has too many triangles for a template, and uses compute_skeleton
+    clouds = [rng.random((n,2)) for n in (12,200,12,3)]
+    results = list(batch_persistence(iter(clouds),maxDimension = 1,threshold = 0.2,n_jobs = 2,chunksize = 1,ordered = True,maxInFlight = 2))
+    assert [i for (i,intervals) in results] == list(range(len(clouds)))
+    for (i,intervals) in results:
+        assert [sorted(l) for l in intervals] == plainIntervals(clouds[i],1,0.2)
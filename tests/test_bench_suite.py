@@ -0,0 +1,48 @@
+import importlib.util
+import math
+import pathlib
+
+import numpy as np
+import pytest
+
+from persil import *
+
+
+@pytest.fixture(scope = "module")
+def suite():
+    path = pathlib.Path(__file__).resolve().parent.parent / "bench-suite.py"
+    spec = importlib.util.spec_from_file_location("bench_suite",path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def bettiNumbers(fc):
+    zc = ZomorodianCarlsson(fc)
+    zc.computeIntervals()
+    return [sum(1 for (x,y) in l if y == math.inf) for l in zc.intervals]
+
+
+def test_reference_complexes(suite):
+    assert bettiNumbers(suite.triangulatedTorus(5))[:3] == [1,2,1]
+    for d in (1,2,4):
+        assert bettiNumbers(suite.sphereBoundary(d))[:d+1] == [1] + [0]*(d-1) + [1]
+
+
+@pytest.mark.parametrize("algorithm",["standard","cohomology"])
+def test_run_case_and_compare(suite,algorithm):
+    params = dict(cloud = "circle",n = 40,D = 2,threshold = 0.8,maxDimension = 2)
+    r = suite.runCase("circle-40","rips",params,0,1,True,{"algorithm": algorithm})
+    assert set(r["time"]) == {"distances","skeleton","zc_init","intervals"}
+    assert set(r["peak_memory"]) == set(r["time"])
+    # the same case through the library
+    rips = RipsComplex(suite.circlePoints(40,2,np.random.default_rng(0)),threshold = 0.8)
+    rips.compute_skeleton(2)
+    zc = ZomorodianCarlsson(rips.complex,algorithm = algorithm)
+    zc.computeIntervals()
+    assert r["intervals"][:2] == [len(zc.intervals[0]),len(zc.intervals[1])]
+    assert r["infinite_intervals"][:2] == [1,sum(1 for (x,y) in zc.intervals[1] if y == math.inf)]
+
+    previous = {"results": [r]}
+    assert suite.compare([r],previous,1.25) == 0
+    changed = dict(r,intervals = [n+1 for n in r["intervals"]])
+    assert suite.compare([changed],previous,1.25) == 1
@@ -0,0 +1,38 @@
+import math
+
+import pytest
+
+from persil import *
+
+
+def sortedIntervals(fc,dimensions):
+    zc = ZomorodianCarlsson(fc,algorithm = "cohomology",dimensions = dimensions)
+    zc.computeIntervals()
+    return [sorted(zc.intervals[k]) for k in dimensions]
+
+
+@pytest.mark.parametrize("D",[2,3])
+@pytest.mark.parametrize("threshold,sparse",[(0.3,False),(0.5,False),(None,False),(0.3,True),(0.5,True)])
+@pytest.mark.parametrize("seed",range(2))
+def test_collapse_keeps_intervals(D,threshold,sparse,seed,randomPoints):
+    points = randomPoints(25,seed,D = D)
+    r = RipsComplex(points,threshold = threshold,sparse = sparse)
+    r.compute_skeleton(3)
+    full = r.complex
+    kept = r.collapse_edges()
+    assert kept <= len([1 for s in full._simplices if s.dim == 2])
+    r.compute_skeleton(3,collapse = True)
+    assert r.complex._numSimplices <= full._numSimplices
+    # intervals of dimensions lower than the maximum dimension are kept, except those of length zero
+    assert sortedIntervals(r.complex,[0,1,2]) == sortedIntervals(full,[0,1,2])
+
+
+def test_collapse_of_a_circle():
+    # the edges of a dense circle collapse a lot, and its single 1-dimensional class is kept
+    points = [(math.cos(2*math.pi*i/60),math.sin(2*math.pi*i/60)) for i in range(60)]
+    r = RipsComplex(points,threshold = 1.2)
+    r.compute_skeleton(2)
+    full = r.complex
+    r.compute_skeleton(2,collapse = True)
+    assert r.complex._numSimplices < full._numSimplices/2
+    assert sortedIntervals(r.complex,[0,1]) == sortedIntervals(full,[0,1])
@@ -0,0 +1,61 @@
+import itertools
+import random
+
+import numpy as np
+import pytest
+
+from persil import *
+from persil.simplexchain import simplexKey
+
+
+def randomInsertions(n,count,seed):
+    # random simplices with random degrees, in any order: insert adds the missing faces, and
+    # lowers the degree of the simplices already there
+    random.seed(seed)
+    res = []
+    for i in range(count):
+        s = random.sample(range(n),random.randint(1,4))
+        res.append((s,random.randint(0,20)/2))
+    return res
+
+def result(fc,algorithm = "standard",field = 2):
+    # pairs are not compared: simplices of equal degrees may be ordered differently
+    zc = ZomorodianCarlsson(fc,algorithm = algorithm,field = field)
+    zc.computeIntervals()
+    return [sorted(l) for l in zc.intervals]
+
+
+@pytest.mark.parametrize("seed",range(4))
+def test_columnar_matches_objects(seed):
+    insertions = randomInsertions(12,60,seed)
+    plain = FilteredComplex()
+    columnar = FilteredComplex(columnar = True)
+    for (s,d) in insertions:
+        plain.insert(s,d)
+        columnar.insert(s,d)
+    assert columnar._numSimplices == plain._numSimplices
+    assert columnar._dimension == plain._dimension
+    for s in plain._simplices:
+        assert columnar.degree(s) == plain.degree(s)
+    assert columnar.degree(Simplex([0,1,2,3,4])) == -1
+    for algorithm in ("standard","twist","cohomology"):
+        assert result(columnar,algorithm) == result(plain,algorithm)
+    assert result(columnar,field = 3) == result(plain,field = 3)
+
+
+@pytest.mark.parametrize("seed",range(2))
+def test_columnar_rips_skeleton(seed):
+    random.seed(seed)
+    r = RipsComplex([(random.random(),random.random()) for i in range(30)],threshold = 0.4)
+    r.compute_skeleton(2)
+    plain = r.complex
+    r.compute_skeleton(2,columnar = True)
+    assert r.complex._columnar and r.complex._numSimplices == plain._numSimplices
+    assert result(r.complex,"cohomology") == result(plain,"cohomology")
+
+
+def test_simplex_keys():
+    # keys are the ranks of the sorted tuples in colexicographic order
+    for k in range(1,5):
+        tuples = sorted(itertools.combinations(range(9),k),key = lambda v: v[::-1])
+        assert [simplexKey(v) for v in tuples] == list(range(len(tuples)))
@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+from persil import *
+
+
+def plainIntervals(c):
+    # intervals of the lower-star filtration from a reduction of the boundary matrix over Z/2Z,
+    # with the cells in the order of the complex, by dimension
+    columns = []
+    for k in range(1,len(c._dimStart)-1):
+        for j in range(c._dimStart[k],c._dimStart[k+1]):
+            columns.append(set(c._faces[k][j-c._dimStart[k]].tolist()))
+    lows = {}
+    for (j,column) in enumerate(columns):
+        while column:
+            p = max(column)
+            if p not in lows:
+                lows[p] = j
+                break
+            column ^= columns[lows[p]]
+    dimension = np.searchsorted(c._dimStart,np.arange(len(columns)),side = 'right')-2
+    intervals = [[] for k in range(len(c.shape)+1)]
+    paired = set(lows) | set(lows.values())
+    for (p,j) in lows.items():
+        if c._values[p] != c._values[j]:
+            intervals[dimension[p]].append((float(c._values[p]),float(c._values[j])))
+    for j in range(len(columns)):
+        if j not in paired:
+            intervals[dimension[j]].append((float(c._values[j]),np.inf))
+    return [sorted(i) for i in intervals]
+
+
+shapes = [(7,9),(5,6,4),(12,),(3,3,3,3),(1,5),(5,1),(1,),(4,1,3),(1,1)]
+
+@pytest.mark.parametrize("shape",shapes)
+@pytest.mark.parametrize("algorithm",["standard","twist","cohomology"])
+@pytest.mark.parametrize("field,backend",[(2,"z2"),(3,"chain")])
+def test_cubical_matches_plain_reduction(shape,algorithm,field,backend):
+    values = np.random.default_rng(len(shape)).integers(0,6,size = shape).astype(float)
+    c = CubicalComplex(values)
+    zc = ZomorodianCarlsson(c,algorithm = algorithm,field = field,backend = backend)
+    zc.computeIntervals()
+    assert len(zc.intervals) == len(shape)+1
+    assert [sorted(i) for i in zc.intervals] == plainIntervals(c)
+
+
+def test_cubical_line_matches_simplicial_path():
+    values = np.random.default_rng(0).random(30)
+    fc = FilteredComplex()
+    for (x,v) in enumerate(values.tolist()):
+        fc.insert([x],v)
+    for x in range(len(values)-1):
+        fc.insert([x,x+1],max(values[x],values[x+1]))
+    ref = ZomorodianCarlsson(fc)
+    ref.computeIntervals()
+    zc = ZomorodianCarlsson(CubicalComplex(values),algorithm = "twist")
+    zc.computeIntervals()
+    assert sorted(zc.intervals[0]) == sorted(ref.intervals[0])
+    with pytest.raises(ValueError,match = "cubical"):
+        zc.update()
+
+
+def test_cubical_cells_and_saved_pairs(tmp_path):
+    c = CubicalComplex(np.random.default_rng(1).random((4,5)))
+    for k in range(2,len(c._dimStart)-1):
+        vertices = c.vertexArray(k,np.arange(c._dimStart[k+1]-c._dimStart[k]))
+        assert np.array_equal(c.values.reshape(-1)[vertices].max(axis = 1),c._values[c._dimStart[k]:c._dimStart[k+1]])
+        for (row,cell) in zip(c._faces[k].tolist(),vertices.tolist()):
+            for f in row:
+                assert set(c.cells[f].vertices) <= set(cell)
+    zc = ZomorodianCarlsson(c,algorithm = "twist")
+    zc.computeIntervals()
+    zc.saveIntervals(tmp_path/"intervals.bin")
+    intervals,pairs = loadIntervals(tmp_path/"intervals.bin")
+    assert [len(i) for i in intervals] == [len(i) for i in zc.intervals]
+    assert pairs[1][0].shape[1] == 2 and pairs[1][1].shape[1] == 4
@@ -0,0 +1,113 @@
+import itertools
+import random
+
+import numpy as np
+import pytest
+from numpy import inf
+
+from persil import *
+
+
+def randomIntervals(n,seed,integers = False):
+    rng = np.random.default_rng(seed)
+    x = rng.integers(0,6,n).astype(float) if integers else rng.random(n)
+    y = x + (rng.integers(0,4,n) if integers else rng.random(n))
+    y[rng.random(n) < 0.15] = inf
+    return [(a,b) for (a,b) in zip(x.tolist(),y.tolist())]
+
+def plainCosts(I,J):
+    # square matrix of the costs of matching the finite points of I (rows, then copies of the
+    # diagonal) with those of J (columns, then copies of the diagonal)
+    A = np.array([(x,y) for (x,y) in I if y < inf]).reshape(-1,2)
+    B = np.array([(x,y) for (x,y) in J if y < inf]).reshape(-1,2)
+    n,m = len(A),len(B)
+    C = np.zeros((n+m,n+m))
+    C[:n,:m] = np.maximum(np.abs(A[:,None,0]-B[None,:,0]),np.abs(A[:,None,1]-B[None,:,1]))
+    C[:n,m:] = ((A[:,1]-A[:,0])/2)[:,None]
+    C[n:,:m] = ((B[:,1]-B[:,0])/2)[None,:]
+    return C
+
+def plainBottleneck(I,J):
+    # smallest e for which the intervals of I and J and the diagonal have a perfect matching,
+    # tested for all the costs of the full matrix by trying all the assignments
+    e1 = sorted(x for (x,y) in I if y == inf)
+    e2 = sorted(x for (x,y) in J if y == inf)
+    if len(e1) != len(e2):
+        return inf
+    res = max([abs(a-b) for (a,b) in zip(e1,e2)],default = 0.)
+    A = [(x,y) for (x,y) in I if y < inf]
+    B = [(x,y) for (x,y) in J if y < inf]
+    # points of A then diagonal copies of B, against points of B then diagonal copies of A
+    rows = A + [None]*len(B)
+    columns = B + [None]*len(A)
+    def cost(p,q):
+        if p is None and q is None:
+            return 0.
+        if p is None:
+            return (q[1]-q[0])/2
+        if q is None:
+            return (p[1]-p[0])/2
+        return max(abs(p[0]-q[0]),abs(p[1]-q[1]))
+    best = min((max([cost(rows[i],columns[s[i]]) for i in range(len(rows))],default = 0.) for s in itertools.permutations(range(len(columns)))),default = 0.)
+    return max(res,best)
+
+
+@pytest.mark.parametrize("seed",range(40))
+def test_bottleneck_matches_brute_force(seed):
+    random.seed(seed)
+    I = randomIntervals(random.randint(0,3),seed,integers = seed%2 == 1)
+    J = randomIntervals(random.randint(0,3),seed+100,integers = seed%2 == 1)
+    d = PersistenceDiagram(I).bottleneck(PersistenceDiagram(J))
+    assert d == plainBottleneck(I,J)
+    assert PersistenceDiagram(J).bottleneck(PersistenceDiagram(I)) == d
+
+
+@pytest.mark.parametrize("seed",range(5))
+def test_bottleneck_larger_diagrams(seed):
+    # the bottleneck distance is at most the cost of matching the intervals in order, and at most
+    # the Wasserstein distances, which tend to it for large powers
+    rng = np.random.default_rng(seed)
+    x = rng.random(60)
+    I = np.c_[x,x+rng.random(60)*0.3]
+    J = I + rng.normal(0,0.01,I.shape)
+    J[:,1] = np.maximum(J[:,1],J[:,0])
+    P,Q = PersistenceDiagram(I),PersistenceDiagram(J)
+    d = P.bottleneck(Q)
+    assert d <= np.abs(I-J).max()
+    assert d <= P.wasserstein(Q,q = 1)
+    assert abs(P.wasserstein(Q,q = 64) - d) < d*0.2
+    assert P.bottleneck(P) == 0
+    assert P.bottleneck(PersistenceDiagram([])) == max((I[:,1]-I[:,0])/2)
+
+
+def test_betti_curve_landscape_and_image():
+    I = randomIntervals(30,7)
+    P = PersistenceDiagram(I)
+    grid = np.linspace(-0.5,2.5,41)
+    for p in (0,0.25):
+        assert P.bettiCurve(grid,p).tolist() == [sum(1 for (x,y) in I if x <= l and l+p < y) for l in grid]
+    L = P.landscape(grid,levels = 3)
+    for (t,l) in enumerate(grid):
+        tents = sorted((max(0.,min(l-x,y-l)) for (x,y) in I),reverse = True)
+        assert np.allclose(L[:,t],tents[:3])
+    image = P.image(resolution = 8,sigma = 0.1)
+    assert image.shape == (8,8) and np.all(image >= 0)
+    assert image.sum() > 0
+
+
+@pytest.mark.parametrize("q",[1,2,3.5])
+@pytest.mark.parametrize("seed",range(20))
+def test_wasserstein_matches_brute_force(q,seed):
+    random.seed(seed)
+    I = randomIntervals(random.randint(0,4),seed,integers = seed%2 == 1)
+    J = randomIntervals(random.randint(0,4),seed+100,integers = seed%2 == 1)
+    P,Q = PersistenceDiagram(I),PersistenceDiagram(J)
+    if len(P.essential()) != len(Q.essential()):
+        assert P.wasserstein(Q,q) == inf
+        J = [(x,y) for (x,y) in J if y < inf] + [(x,y) for (x,y) in I if y == inf]
+        Q = PersistenceDiagram(J)
+    C = plainCosts(I,J)**q
+    best = min((sum(C[i,s[i]] for i in range(len(C))) for s in itertools.permutations(range(len(C)))),default = 0.)
+    essential = (np.abs(P.essential()-Q.essential())**q).sum()
+    assert np.isclose(P.wasserstein(Q,q),(best+essential)**(1/q))
+    assert np.isclose(Q.wasserstein(P,q),P.wasserstein(Q,q))
@@ -0,0 +1,37 @@
+import random
+
+import pytest
+
+from persil import *
+
+
+def ripsComplex(seed,columnar):
+    random.seed(seed)
+    r = RipsComplex([tuple(random.random() for i in range(3)) for j in range(22)],threshold = 0.6)
+    r.compute_skeleton(4,columnar = columnar)
+    return r.complex
+
+def sortedIntervals(fc,**options):
+    zc = ZomorodianCarlsson(fc,**options)
+    zc.computeIntervals()
+    return [sorted(l) for l in zc.intervals]
+
+
+@pytest.mark.parametrize("dimensions",[[0],[1],[2],[0,2],[1,3],[3]])
+@pytest.mark.parametrize("algorithm",["standard","twist","cohomology"])
+@pytest.mark.parametrize("columnar",[False,True])
+def test_dimensions_match_full_computation(dimensions,algorithm,columnar):
+    fc = ripsComplex(len(dimensions),columnar)
+    full = sortedIntervals(fc,algorithm = algorithm)
+    restricted = sortedIntervals(fc,algorithm = algorithm,dimensions = dimensions)
+    assert len(restricted) == len(full)
+    for k in range(len(full)):
+        assert restricted[k] == (full[k] if k in dimensions else [])
+
+
+def test_dimensions_errors_and_large_dimensions():
+    fc = ripsComplex(0,False)
+    with pytest.raises(ValueError):
+        ZomorodianCarlsson(fc,dimensions = [-1])
+    # dimensions above the complex give no interval
+    assert sortedIntervals(fc,dimensions = [7]) == [[] for l in sortedIntervals(fc)]
@@ -0,0 +1,63 @@
+import itertools
+
+import numpy as np
+import pytest
+from numpy import inf
+
+from persil import *
+from persil.vietorisrips import euclidianDistance
+
+
+def plainMatrix(points,distance = euclidianDistance):
+    return [[distance(x,y) for y in points] for x in points]
+
+def manhattan(x,y):
+    return sum(abs(a-b) for (a,b) in zip(x,y))
+
+
+@pytest.mark.parametrize("n",[0,1,2,17,60])
+@pytest.mark.parametrize("D",[1,3])
+@pytest.mark.parametrize("blockSize",[None,7])
+def test_condensed_distances(n,D,blockSize,monkeypatch,randomPoints):
+    if blockSize:
+        # blocks of a single row
+        monkeypatch.setattr(RipsComplex,"_blockSize",blockSize)
+    points = randomPoints(n,n+D,D = D)
+    r = RipsComplex(points)
+    M = plainMatrix(points)
+    assert len(r.distances) == n*(n-1)//2
+    assert np.allclose(r.distances,[M[x][y] for x in range(n) for y in range(x+1,n)])
+    for x in range(n):
+        for y in range(n):
+            assert np.isclose(r.dist(x,y),M[x][y])
+    # without a threshold, every pair is an edge
+    assert r.threshold == (max(max(row) for row in M)+1 if n > 1 else 1)
+
+
+def test_array_input_and_custom_distance(randomPoints):
+    points = randomPoints(30,4)
+    r = RipsComplex(np.array(points))
+    assert np.allclose(r.distances,RipsComplex(points).distances)
+    c = RipsComplex(points,manhattan,threshold = 0.5)
+    M = plainMatrix(points,manhattan)
+    assert np.allclose(c.distances,[M[x][y] for x in range(30) for y in range(x+1,30)])
+    for x in range(30):
+        nbrs,d = c.upperNeighbours(x)
+        assert nbrs.tolist() == [y for y in range(x+1,30) if M[x][y] < 0.5]
+        assert np.allclose(d,[M[x][y] for y in nbrs.tolist()])
+
+
+@pytest.mark.parametrize("n",[0,1,12])
+@pytest.mark.parametrize("sparse",[False,True])
+def test_matrix_and_weights_for_compatibility(n,sparse,randomPoints):
+    points = randomPoints(n,n)
+    r = RipsComplex(points,threshold = 0.5,sparse = sparse)
+    M = np.array(plainMatrix(points)).reshape(n,n)
+    if sparse:
+        M[M >= 0.5] = inf
+    assert r.matrix.shape == (n,n) and np.allclose(r.matrix,M)
+    for s in itertools.combinations(range(n),3):
+        w = max(M[x][y] for (x,y) in itertools.combinations(s,2))
+        assert np.isclose(r.computeWeight(list(s)[::-1]),w) and np.isclose(r.computeWeight(Simplex(list(s))),w)
+    if n:
+        assert r.computeWeight([n-1]) == 0
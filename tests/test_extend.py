@@ -0,0 +1,89 @@
+import random
+
+import numpy as np
+import pytest
+
+from persil import *
+
+
+def ripsArrays(n,seed,maxDim = 2):
+    # (vertices,degrees) arrays of each dimension of a Rips complex, and its simplices in insertion order
+    random.seed(seed)
+    r = RipsComplex([(random.random(),random.random()) for i in range(n)],threshold = 0.5)
+    r.compute_skeleton(maxDim)
+    fc = r.complex
+    simplices = [(list(s.vertices),fc.degree(s)) for s in fc._simplices]
+    arrays = []
+    for k in range(1,maxDim+2):
+        rows = [(v,d) for (v,d) in simplices if len(v) == k]
+        arrays.append((np.array([v for (v,d) in rows],dtype = np.int64).reshape(len(rows),k),np.array([d for (v,d) in rows])))
+    return arrays,simplices
+
+def sortedIntervals(fc,algorithm = "standard"):
+    zc = ZomorodianCarlsson(fc,algorithm = algorithm)
+    zc.computeIntervals()
+    return [sorted(zc.intervals[k]) for k in range(2)]
+
+
+@pytest.mark.parametrize("columnar",[True,False])
+@pytest.mark.parametrize("trusted",[True,False])
+@pytest.mark.parametrize("seed",range(3))
+def test_from_arrays_matches_insert(columnar,trusted,seed):
+    arrays,simplices = ripsArrays(20,seed)
+    ref = FilteredComplex()
+    for (s,d) in simplices:
+        ref.insert(s,d)
+    # dimensions in any order, and rows in any order inside a dimension
+    shuffled = []
+    for (vertices,degrees) in reversed(arrays):
+        perm = np.random.RandomState(seed).permutation(len(degrees))
+        shuffled.append((vertices[perm][:,::-1],degrees[perm]))
+    fc = FilteredComplex.from_arrays(shuffled,trusted = trusted,columnar = columnar)
+    assert fc._numSimplices == ref._numSimplices
+    assert sortedIntervals(fc) == sortedIntervals(ref)
+    assert sortedIntervals(fc,"cohomology") == sortedIntervals(ref)
+
+
+@pytest.mark.parametrize("columnar",[True,False])
+def test_extend_stores_float_degrees(columnar):
+    fc = FilteredComplex(columnar = columnar)
+    fc.extend([0,1,2],np.array([0,0,1],dtype = np.int64))
+    fc.extend([[0,1],[1,2],[0,2]],[1,2,3])
+    assert fc.degree(Simplex([0,2])) == 3
+    zc = ZomorodianCarlsson(fc)
+    zc.computeIntervals()
+    for k in range(2):
+        for (x,y) in zc.intervals[k]:
+            assert type(x) is float and type(y) is float
+
+
+@pytest.mark.parametrize("columnar",[True,False])
+def test_extend_checks(columnar):
+    fc = FilteredComplex(columnar = columnar)
+    fc.extend([0,1,2],[0,0,1])
+    with pytest.raises(ValueError):
+        fc.extend([[0,0]],[1])
+    with pytest.raises(ValueError):
+        fc.extend([[0,3]],[1])
+    with pytest.raises(ValueError):
+        fc.extend([[0,2]],[0.5])
+    with pytest.raises(ValueError):
+        fc.extend([[0,1],[1,0]],[1,1])
+    fc.extend([[0,1]],[1])
+    with pytest.raises(ValueError):
+        fc.extend([[1,0]],[2])
+
+
+@pytest.mark.parametrize("columnar",[True,False])
+def test_from_arrays_with_an_empty_dimension(columnar):
+    # at a small threshold, a Rips complex has edges but no triangles
+    arrays,simplices = ripsArrays(20,1)
+    arrays = [(vertices,degrees) if k < 2 else (np.zeros((0,3),dtype = np.int64),np.zeros(0)) for (k,(vertices,degrees)) in enumerate(arrays)]
+    ref = FilteredComplex()
+    for (s,d) in simplices:
+        if len(s) < 3:
+            ref.insert(s,d)
+    fc = FilteredComplex.from_arrays(arrays,columnar = columnar)
+    fc.extend([],[])
+    assert fc._numSimplices == ref._numSimplices
+    assert sortedIntervals(fc) == sortedIntervals(ref)
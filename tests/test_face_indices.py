@@ -0,0 +1,63 @@
+import random
+
+import pytest
+
+from persil import *
+
+
+def randomComplex(n,seed,columnar = False):
+    random.seed(seed)
+    r = RipsComplex([(random.random(),random.random()) for i in range(n)],threshold = 0.4)
+    r.compute_skeleton(3)
+    if not columnar:
+        return r.complex
+    fc = FilteredComplex(columnar = True)
+    for s in r.complex._simplices:
+        fc.insert(list(s.vertices),r.complex.degree(s))
+    return fc
+
+def plainFaces(zc,j):
+    if zc.simplices[j].dim == 1:
+        return []
+    return [zc._indexBySimplex[f] for f in zc.simplices[j].faces()]
+
+def vertexFaces(zc,k):
+    # faces of each simplex with k vertices, as vertex tuples, in index order
+    res = []
+    for j in range(zc._dimStart[k],zc._dimStart[k+1]):
+        res.append([tuple(zc.simplices[f].vertices) for f in zc._faceIndices(j,k)])
+    return res
+
+
+@pytest.mark.parametrize("seed",range(3))
+@pytest.mark.parametrize("dimensions",[None,[1],[0,2]])
+def test_face_indices_match_simplex_faces(seed,dimensions):
+    zc = ZomorodianCarlsson(randomComplex(25,seed),dimensions = dimensions)
+    for k in zc._reduced:
+        for j in range(zc._dimStart[k],zc._dimStart[k+1]):
+            assert zc._faceIndices(j,k) == plainFaces(zc,j)
+    assert all(zc._faces[k] is None for k in range(1,zc.dim+1) if k not in zc._reduced)
+
+
+@pytest.mark.parametrize("seed",range(3))
+def test_face_indices_match_columnar(seed):
+    zc = ZomorodianCarlsson(randomComplex(20,seed))
+    columnar = ZomorodianCarlsson(randomComplex(20,seed,columnar = True))
+    for k in zc._reduced:
+        assert sorted(map(sorted,vertexFaces(zc,k))) == sorted(map(sorted,vertexFaces(columnar,k)))
+    zc.computeIntervals()
+    columnar.computeIntervals()
+    assert [sorted(l) for l in zc.intervals] == [sorted(l) for l in columnar.intervals]
+
+
+def test_face_indices_after_update():
+    fc = FilteredComplex()
+    for (s,d) in [([0],0),([1],0),([2],0),([0,1],1),([1,2],1),([0,2],2)]:
+        fc.insert(s,d)
+    zc = ZomorodianCarlsson(fc)
+    zc.computeIntervals()
+    fc.insert([0,1,2],3)
+    assert zc.update() == 1
+    j = zc.numSimplices-1
+    assert zc._faceIndices(j,3) == plainFaces(zc,j)
+    assert sorted(zc.intervals[1]) == [(2.,3.)]
@@ -0,0 +1,79 @@
+import random
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pytest
+from matplotlib.collections import LineCollection, PathCollection, QuadMesh
+from numpy import inf
+
+from persil import *
+from persil.graphical import get_min_max
+
+
+@pytest.fixture
+def figure(monkeypatch):
+    # figures are kept open instead of shown, and returned by the fixture
+    plt.switch_backend("Agg")
+    monkeypatch.setattr(plt,"show",lambda: None)
+    yield lambda: plt.gcf()
+    plt.close("all")
+
+def randomIntervals(n,seed):
+    random.seed(seed)
+    res = []
+    for i in range(n):
+        x = random.randint(0,20)/4
+        res.append((x,random.choice([inf,x,x+random.randint(1,10)/4])))
+    return res + res[:5]
+
+def plainMinMax(intervals):
+    p_min,p_max = inf,-inf
+    for (x,y) in intervals:
+        p_min = min(p_min,x)
+        p_max = max(p_max,x)
+        if y != inf:
+            p_max = max(p_max,y)
+    return p_min,p_max
+
+def segments(ax):
+    return sorted(tuple(map(tuple,np.round(s,9))) for c in ax.collections if isinstance(c,LineCollection) for s in c.get_segments())
+
+def points(ax):
+    return sorted(tuple(p) for c in ax.collections if isinstance(c,PathCollection) for p in np.round(c.get_offsets(),9).tolist())
+
+
+@pytest.mark.parametrize("seed",range(3))
+def test_persistence_diagram(seed,figure):
+    intervals = randomIntervals(40,seed)
+    assert get_min_max(intervals) == plainMinMax(intervals)
+    persistence_diagram(intervals)
+    ax = figure().axes[0]
+    top = ax.get_ylim()[1]
+    assert top == plainMinMax(intervals)[1] + (plainMinMax(intervals)[1]-plainMinMax(intervals)[0])/5
+    assert segments(ax) == sorted(((x,x),(x,round(top,9))) for (x,y) in set(intervals) if y == inf)
+    assert points(ax) == sorted((x,y) for (x,y) in set(intervals) if y < inf)
+
+
+def test_density_and_empty_diagrams(figure):
+    intervals = randomIntervals(200,5)
+    persistence_diagram(np.array(intervals),density = True,bins = 16)
+    ax = figure().axes[0]
+    meshes = [c for c in ax.collections if isinstance(c,QuadMesh)]
+    assert len(meshes) == 1 and meshes[0].get_array().sum() == len(set((x,y) for (x,y) in intervals if y < inf))
+    plt.close("all")
+    persistence_diagram([])
+    assert figure().axes[0].get_xlim() == (0,1)
+
+
+@pytest.mark.parametrize("seed",range(3))
+def test_barcode(seed,figure,tmp_path):
+    intervals = randomIntervals(30,seed)
+    barcode(intervals)
+    ax = figure().axes[0]
+    top = ax.get_xlim()[1]
+    bars = [((x,i),(y if y < inf else top,i)) for (i,(x,y)) in enumerate(intervals) if x != y]
+    assert segments(ax) == sorted(tuple(tuple(round(v,9) for v in p) for p in b) for b in bars)
+    assert points(ax) == sorted((x,i) for (i,(x,y)) in enumerate(intervals) if x == y)
+    path = tmp_path / "barcode.png"
+    barcode(intervals,saveAs = str(path))
+    assert path.stat().st_size > 0
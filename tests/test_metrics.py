@@ -0,0 +1,37 @@
+import json
+
+import pytest
+
+from persil import *
+
+
+@pytest.mark.parametrize("algorithm",["standard","twist","cohomology"])
+def test_metrics_do_not_change_results(algorithm,randomPoints):
+    points = randomPoints(120,1)
+    calls = []
+    m = Metrics(callback = lambda phase,done,total: calls.append((phase,done,total)),longest = 3)
+    r = RipsComplex(points,threshold = 0.3,metrics = m)
+    r.compute_skeleton(2)
+    zc = ZomorodianCarlsson(r.complex,algorithm = algorithm,metrics = m)
+    zc.computeIntervals()
+
+    plain = RipsComplex(points,threshold = 0.3)
+    plain.compute_skeleton(2)
+    ref = ZomorodianCarlsson(plain.complex,algorithm = algorithm)
+    ref.computeIntervals()
+    assert [sorted(l) for l in zc.intervals] == [sorted(l) for l in ref.intervals]
+
+    assert {"distances","skeleton","initialization","reduction"} <= set(m.times)
+    counts = [0]*(r.complex._dimension+1)
+    for s in plain.complex._simplices:
+        counts[s.dim] += 1
+    assert m.simplices == counts
+    # each reduced column is a simplex of the complex, and the longest reductions are sorted
+    for k in m.columns:
+        assert 0 < m.columns[k] <= counts[k]
+        assert m.maxFillIn.get(k,0) <= m.fillIn[k]
+    assert len(m.longest) == 3 and m.longest == sorted(m.longest,reverse = True)
+    assert all(0 <= index < len(zc.simplices) for (additions,index) in m.longest)
+    json.dumps(m.report())
+    assert "reduction" in str(m)
+    assert calls and all(done <= total for (phase,done,total) in calls)
@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+from persil import *
+
+
+def manhattan(x,y):
+    return sum(abs(a-b) for (a,b) in zip(x,y))
+
+def simplices(fc):
+    return [(s.vertices,fc.degree(s)) for s in fc._simplices]
+
+
+@pytest.mark.parametrize("distance",[None,manhattan])
+def test_parallel_distances_and_skeleton(distance,monkeypatch,randomPoints):
+    # small blocks, so that there are more tasks than processes
+    monkeypatch.setattr(RipsComplex,"_blockSize",64)
+    points = randomPoints(40,1)
+    options = {} if distance is None else {"distance": distance}
+    serial = RipsComplex(points,threshold = 0.4,**options)
+    parallel = RipsComplex(points,threshold = 0.4,n_jobs = 2,**options)
+    assert np.array_equal(parallel.distances,serial.distances)
+    serial.compute_skeleton(3)
+    parallel.compute_skeleton(3)
+    assert simplices(parallel.complex) == simplices(serial.complex)
+
+
+def test_parallel_sparse_graph(randomPoints):
+    # in dimension 8, the graph is computed by blocks of rows in the processes, not with a grid
+    points = randomPoints(60,2,D = 8)
+    serial = RipsComplex(points,threshold = 1.0,sparse = True)
+    parallel = RipsComplex(points,threshold = 1.0,sparse = True,n_jobs = 2)
+    for a in ("indptr","indices","weights"):
+        assert np.array_equal(getattr(parallel,a),getattr(serial,a))
+    serial.compute_skeleton(2)
+    parallel.compute_skeleton(2)
+    assert simplices(parallel.complex) == simplices(serial.complex)
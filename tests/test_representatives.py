@@ -0,0 +1,87 @@
+import random
+
+import numpy as np
+import pytest
+from numpy import inf
+
+from persil import *
+
+
+def ripsComplex(n,seed,columnar = False):
+    random.seed(seed)
+    r = RipsComplex([(random.random(),random.random()) for i in range(n)],threshold = 0.5)
+    r.compute_skeleton(3)
+    fc = FilteredComplex(columnar = columnar)
+    for s in r.complex._simplices:
+        fc.insert(list(s.vertices),r.complex.degree(s))
+    return fc,{s.vertices: r.complex.degree(s) for s in r.complex._simplices}
+
+def plainBoundary(vertices,coefficients,field):
+    # boundary of a chain given as rows of vertices, as a dict of non zero coefficients
+    res = {}
+    for (v,c) in zip(map(tuple,vertices.tolist()),coefficients.tolist()):
+        for i in range(len(v)):
+            f = v[:i]+v[i+1:]
+            res[f] = (res.get(f,0) + (-1)**i*c) % field
+    return {f: c for (f,c) in res.items() if c}
+
+def plainCoboundary(vertices,coefficients,field,degrees,death):
+    # coboundary of a cochain, restricted to the simplices of degree lower than death
+    cochain = {v: c for (v,c) in zip(map(tuple,vertices.tolist()),coefficients.tolist())}
+    k = vertices.shape[1]
+    res = {}
+    for (s,d) in degrees.items():
+        if len(s) == k+1 and d < death:
+            c = sum((-1)**i*cochain.get(s[:i]+s[i+1:],0) for i in range(len(s))) % field
+            if c:
+                res[s] = c
+    return res
+
+def computed(fc,algorithm,field,representatives = None):
+    zc = ZomorodianCarlsson(fc,field = field,algorithm = algorithm,representatives = representatives)
+    zc.computeIntervals()
+    return zc
+
+
+@pytest.mark.parametrize("algorithm",["standard","twist","cohomology"])
+@pytest.mark.parametrize("field",[2,3])
+@pytest.mark.parametrize("columnar",[False,True])
+@pytest.mark.parametrize("seed",range(2))
+def test_representatives(algorithm,field,columnar,seed):
+    fc,degrees = ripsComplex(18,seed,columnar)
+    zc = computed(fc,algorithm,field,"all")
+    ref = computed(ripsComplex(18,seed,columnar)[0],algorithm,field)
+    assert zc.intervals == ref.intervals
+    for k in range(2):
+        for (i,(birth,death)) in enumerate(zc.intervals[k]):
+            vertices,coefficients = zc.representative(k,i)
+            assert vertices.shape == (len(coefficients),k+1) and len(vertices)
+            assert np.all(coefficients % field != 0)
+            values = [degrees[tuple(v)] for v in vertices.tolist()]
+            if algorithm == "cohomology":
+                # a cocycle until the death, made of simplices born with the class or after it
+                assert plainCoboundary(vertices,coefficients,field,degrees,death) == {}
+                assert min(values) >= birth
+            else:
+                # a cycle, made of simplices born with the class or before it
+                if k > 0:
+                    assert plainBoundary(vertices,coefficients,field) == {}
+                assert max(values) == birth
+
+
+def test_longest_representatives():
+    fc,degrees = ripsComplex(20,5)
+    zc = computed(fc,"standard",2,2)
+    for k in range(2):
+        lengths = [y-x for (x,y) in zc.intervals[k]]
+        kept = sorted(zc.representatives[k])
+        assert len(kept) == min(2,len(lengths))
+        assert sorted((lengths[i] for i in kept),reverse = True) == sorted(lengths,reverse = True)[:len(kept)]
+        for i in set(range(len(lengths))) - set(kept):
+            with pytest.raises(ValueError):
+                zc.representative(k,i)
+    assert zc.T is None
+    with pytest.raises(ValueError):
+        zc.update()
+    with pytest.raises(ValueError):
+        ZomorodianCarlsson(fc,representatives = -1)
@@ -0,0 +1,31 @@
+import random
+
+import pytest
+
+from persil import *
+
+
+def explicitIntervals(points,threshold,maxDimension):
+    r = RipsComplex(points,threshold = threshold)
+    r.compute_skeleton(maxDimension+1)
+    zc = ZomorodianCarlsson(r.complex,algorithm = "cohomology",dimensions = range(maxDimension+1))
+    zc.computeIntervals()
+    return [sorted(zc.intervals[k]) for k in range(maxDimension+1)]
+
+
+@pytest.mark.parametrize("sparse",[False,True])
+@pytest.mark.parametrize("threshold,maxDimension",[(0.3,1),(0.5,2),(2.,2)])
+def test_compute_intervals_matches_explicit_complex(sparse,threshold,maxDimension):
+    random.seed(int(threshold*10)+maxDimension)
+    points = [tuple(random.random() for i in range(3)) for j in range(40)]
+    r = RipsComplex(points,threshold = threshold,sparse = sparse)
+    intervals = r.compute_intervals(maxDimension)
+    assert [sorted(i) for i in intervals] == explicitIntervals(points,threshold,maxDimension)
+
+
+def test_compute_intervals_on_a_circle():
+    from math import cos, sin, pi
+    points = [(cos(2*pi*x/30),sin(2*pi*x/30)) for x in range(30)]
+    intervals = RipsComplex(points,threshold = 1.5).compute_intervals(1)
+    assert len(intervals[1]) == 1
+    assert intervals[0].count((0.,float("inf"))) == 1
@@ -0,0 +1,49 @@
+import pickle
+import random
+
+import pytest
+
+from persil import *
+
+
+def randomVertices(k,seed):
+    random.seed(seed)
+    return random.sample(range(50),k)
+
+def plainFaces(l):
+    v = sorted(l)
+    return [Simplex(v[:i]+v[i+1:]) for i in range(len(v))]
+
+
+@pytest.mark.parametrize("k",[1,2,3,5])
+@pytest.mark.parametrize("seed",range(4))
+def test_simplex_constructors_and_faces(k,seed):
+    l = randomVertices(k,seed)
+    s = Simplex(l)
+    t = Simplex.fromSorted(tuple(sorted(l)))
+    assert s == t and hash(s) == hash(t) == hash(tuple(sorted(l)))
+    assert s.vertices == t.vertices and s.dim == t.dim == k
+    assert len({s,t}) == 1 and {s: 1}[t] == 1
+    faces = s.faces(cache = True)
+    assert faces == plainFaces(l) and [hash(f) for f in faces] == [hash(f) for f in plainFaces(l)]
+    assert s.faces() is faces and s.faces(cache = True) is faces
+    assert t.faces() == faces
+    assert t.faces() is not t.faces() and t._faces is None
+    u = pickle.loads(pickle.dumps(s))
+    assert u == s and hash(u) == hash(s) and u._faces is None
+
+
+def test_cached_faces_in_complexes():
+    fc = FilteredComplex()
+    for (s,d) in [([0],0),([1],0),([2],0),([0,1],1),([1,2],1),([0,2],2),([2,1,0],3)]:
+        fc.insert(s,d)
+    # faces of the inserted simplices are not kept, and lookups of faces use the cached hashes
+    assert all(s._faces is None for s in fc._simplices)
+    for s in fc._simplices:
+        assert all(fc.degree(f) <= fc.degree(s) for f in (s.faces() if s.dim > 1 else []))
+    assert all(s._faces is None for s in fc._simplices)
+    assert fc.degree(Simplex.fromSorted((0,1,2))) == 3
+    # missing faces are inserted with the degree of the simplex, from faces which are not kept
+    fc.insert([0,1,3],4)
+    assert [fc.degree(f) for f in plainFaces([0,1,3])] == [4,4,1]
+    assert fc._simplices[-1]._faces is None
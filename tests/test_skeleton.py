@@ -0,0 +1,46 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from persil import *
+
+
+def plainSkeleton(r,maxVertices):
+    # value of each clique of at most maxVertices vertices: the length of its longest edge
+    res = {}
+    for k in range(1,maxVertices+1):
+        for s in itertools.combinations(range(r.nPoints),k):
+            lengths = [r.dist(x,y) for (x,y) in itertools.combinations(s,2)]
+            if all(d < r.threshold for d in lengths):
+                res[s] = max(lengths,default = 0.)
+    return res
+
+def complexSimplices(fc):
+    return {tuple(s.vertices): fc.degree(s) for s in fc._simplices}
+
+
+@pytest.mark.parametrize("maxDimension",[1,2,3])
+@pytest.mark.parametrize("threshold",[0.2,0.45])
+@pytest.mark.parametrize("seed",range(2))
+def test_skeleton_matches_cliques(maxDimension,threshold,seed,randomPoints):
+    r = RipsComplex(randomPoints(22,seed),threshold = threshold)
+    r.compute_skeleton(maxDimension)
+    simplices = complexSimplices(r.complex)
+    plain = plainSkeleton(r,maxDimension+1)
+    assert set(simplices) == set(plain)
+    for (s,d) in plain.items():
+        assert np.isclose(simplices[s],d)
+    # each simplex comes after its faces, with a value at least theirs
+    position = {tuple(s.vertices): i for (i,s) in enumerate(r.complex._simplices)}
+    for s in r.complex._simplices:
+        for f in (s.faces() if s.dim > 1 else []):
+            assert position[tuple(f.vertices)] < position[tuple(s.vertices)]
+            assert simplices[tuple(f.vertices)] <= simplices[tuple(s.vertices)]
+
+
+def test_skeleton_without_maximum_dimension(randomPoints):
+    # all the cliques, up to the largest one
+    r = RipsComplex(randomPoints(9,5),threshold = 0.6)
+    r.compute_skeleton()
+    assert set(complexSimplices(r.complex)) == set(plainSkeleton(r,9))
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from persil import *
+
+
+def plainEdges(points,threshold):
+    r = RipsComplex(points)
+    return {(x,y): r.dist(x,y) for x in range(len(points)) for y in range(x+1,len(points)) if r.dist(x,y) < threshold}
+
+def complexIntervals(fc):
+    zc = ZomorodianCarlsson(fc)
+    zc.computeIntervals()
+    return [sorted(zc.intervals[k]) for k in range(2)]
+
+
+# D = 8 is above RipsComplex._maxGridDimension, where pairs are compared by blocks of rows
+@pytest.mark.parametrize("D",[1,2,3,8])
+@pytest.mark.parametrize("threshold",[0.05,0.3,5.0])
+def test_neighbourhood_graph(D,threshold,randomPoints):
+    points = randomPoints(80,D,D = D)
+    r = RipsComplex(points,threshold = threshold,sparse = True)
+    assert r.distances is None
+    edges = plainEdges(points,threshold)
+    assert r.nEdges == len(edges)
+    for x in range(len(points)):
+        row = r.indices[r.indptr[x]:r.indptr[x+1]].tolist()
+        assert row == sorted(y for y in range(len(points)) if (min(x,y),max(x,y)) in edges)
+        for (y,d) in zip(row,r.weights[r.indptr[x]:r.indptr[x+1]].tolist()):
+            assert np.isclose(d,edges[(min(x,y),max(x,y))])
+            assert r.dist(x,y) == d
+    far = [(x,y) for x in range(len(points)) for y in range(x+1,len(points)) if (x,y) not in edges]
+    for (x,y) in far[:20]:
+        assert r.dist(x,y) == np.inf
+
+
+@pytest.mark.parametrize("seed",range(3))
+def test_sparse_skeleton_matches_dense(seed,randomPoints):
+    points = randomPoints(50,seed)
+    dense = RipsComplex(points,threshold = 0.3)
+    dense.compute_skeleton(2)
+    sparse = RipsComplex(points,threshold = 0.3,sparse = True)
+    sparse.compute_skeleton(2)
+    assert sparse.complex._numSimplices == dense.complex._numSimplices
+    assert complexIntervals(sparse.complex) == complexIntervals(dense.complex)
+
+
+def test_sparse_custom_distance_and_errors(randomPoints):
+    points = randomPoints(40,9)
+    manhattan = lambda x,y: abs(x[0]-y[0]) + abs(x[1]-y[1])
+    r = RipsComplex(points,manhattan,threshold = 0.4,sparse = True)
+    assert r.nEdges == len([1 for x in range(40) for y in range(x+1,40) if manhattan(points[x],points[y]) < 0.4])
+    with pytest.raises(ValueError):
+        RipsComplex(points,sparse = True)
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from persil import *
+
+
+def intervals(fc,k):
+    zc = ZomorodianCarlsson(fc,algorithm = "cohomology",dimensions = [k])
+    zc.computeIntervals()
+    return sorted(zc.intervals[k])
+
+
+def test_greedy_permutation(randomPoints):
+    points = randomPoints(50,0)
+    r = RipsComplex(points)
+    order,radii = r.greedy_permutation()
+    assert sorted(order.tolist()) == list(range(50)) and order[0] == 0 and radii[0] == np.inf
+    for x in range(1,50):
+        # each point is the farthest from those before it, at distance its insertion radius
+        nearest = [min(r.dist(p,int(q)) for q in order[:x]) for p in range(50)]
+        assert np.isclose(radii[x],max(nearest[int(p)] for p in order[x:]))
+        assert np.isclose(nearest[int(order[x])],radii[x])
+
+
+@pytest.mark.parametrize("epsilon",[0.1,0.2,0.3])
+@pytest.mark.parametrize("seed",range(2))
+def test_sparse_skeleton_approximates_rips(epsilon,seed,randomPoints):
+    points = randomPoints(50,seed)
+    r = RipsComplex(points)
+    r.compute_skeleton(2)
+    full = r.complex
+    r.compute_sparse_skeleton(epsilon,2)
+    sparse = r.complex
+    assert sparse._numSimplices < full._numSimplices
+    # each simplex comes after its faces, and its value is at least that of the Rips complex
+    position = {s.vertices: i for (i,s) in enumerate(sparse._simplices)}
+    for s in sparse._simplices:
+        assert sparse.degree(s) >= full.degree(s) - 1e-12
+        for f in (s.faces() if s.dim > 1 else []):
+            assert position[f.vertices] < position[s.vertices]
+    # on a log scale, the 1-dimensional intervals move by O(epsilon)
+    logDiagram = lambda I: PersistenceDiagram(np.log(np.array(I,dtype = float).reshape(-1,2)))
+    assert logDiagram(intervals(sparse,1)).bottleneck(logDiagram(intervals(full,1))) <= np.log(1+2*epsilon)
+    assert [y for (x,y) in intervals(sparse,0)].count(np.inf) == 1
+
+
+def test_sparse_skeleton_is_exact_at_small_values(randomPoints):
+    # below 2l/epsilon for the smallest insertion radius l, no weight is added: the filtration
+    # is the Rips filtration
+    points = randomPoints(40,3)
+    r = RipsComplex(points)
+    epsilon = 0.05
+    order,radii = r.greedy_permutation()
+    r.threshold = 2*radii.min()/epsilon
+    r.compute_skeleton(2)
+    full = r.complex
+    r.compute_sparse_skeleton(epsilon,2)
+    for k in (0,1):
+        a,b = intervals(r.complex,k),intervals(full,k)
+        assert len(a) == len(b) and np.allclose(a,b)
+    with pytest.raises(ValueError):
+        r.compute_sparse_skeleton(1.5)
@@ -0,0 +1,68 @@
+import random
+
+import numpy as np
+import pytest
+
+from persil import *
+
+
+def ripsComplex(n,seed,columnar):
+    random.seed(seed)
+    r = RipsComplex([(random.random(),random.random()) for i in range(n)],threshold = 0.5)
+    r.compute_skeleton(2,columnar = columnar)
+    return r.complex
+
+def sortedIntervals(fc,**options):
+    zc = ZomorodianCarlsson(fc,**options)
+    zc.computeIntervals()
+    return [sorted(l) for l in zc.intervals]
+
+
+@pytest.mark.parametrize("columnar",[False,True])
+@pytest.mark.parametrize("mmap",[True,False])
+def test_complex_round_trip(columnar,mmap,tmp_path):
+    fc = ripsComplex(30,int(columnar),columnar)
+    path = tmp_path / "complex.persil"
+    fc.save(path)
+    loaded = FilteredComplex.load(path,mmap = mmap)
+    assert loaded._columnar
+    assert loaded._numSimplices == fc._numSimplices and loaded._dimension == fc._dimension
+    simplices = fc._simplices if not columnar else ripsComplex(30,int(columnar),False)._simplices
+    for s in simplices:
+        assert loaded.degree(s) == fc.degree(s)
+    assert sortedIntervals(loaded) == sortedIntervals(fc)
+    assert sortedIntervals(loaded,algorithm = "cohomology") == sortedIntervals(fc)
+
+    # the loaded complex can be modified, without changing the file
+    loaded.insert([0,1,2,3],10.)
+    assert loaded.degree(Simplex([0,1,2,3])) == 10.
+    again = FilteredComplex.load(path)
+    assert again._numSimplices == fc._numSimplices
+
+
+def test_intervals_round_trip(tmp_path):
+    fc = ripsComplex(25,3,False)
+    zc = ZomorodianCarlsson(fc,strict = False)
+    zc.computeIntervals()
+    path = tmp_path / "intervals.persil"
+    zc.saveIntervals(path)
+    intervals,pairs = loadIntervals(path)
+    assert len(intervals) == len(zc.intervals)
+    byDimension = [[(t,s) for (t,s) in zc.pairs if t.dim == k+1] for k in range(len(zc.intervals))]
+    for k in range(len(zc.intervals)):
+        assert np.array_equal(intervals[k],np.array(zc.intervals[k],dtype = float).reshape(-1,2))
+        births,deaths = pairs[k]
+        assert births.tolist() == [list(t.vertices) for (t,s) in byDimension[k]]
+        assert deaths.tolist() == [list(s.vertices) if s is not None else [-1]*(k+2) for (t,s) in byDimension[k]]
+
+
+def test_kind_is_checked(tmp_path):
+    fc = ripsComplex(5,0,False)
+    path = tmp_path / "complex.persil"
+    fc.save(path)
+    with pytest.raises(ValueError):
+        loadIntervals(path)
+    other = tmp_path / "other"
+    other.write_bytes(b"not a persil file")
+    with pytest.raises(ValueError):
+        FilteredComplex.load(other)
@@ -0,0 +1,52 @@
+import pytest
+from numpy import inf
+
+from persil import *
+
+
+def explicitIntervals(points,threshold,maxDimension):
+    r = RipsComplex(points,threshold = threshold)
+    r.compute_skeleton(maxDimension+1)
+    zc = ZomorodianCarlsson(r.complex,dimensions = range(maxDimension+1))
+    zc.computeIntervals()
+    return [sorted(zc.intervals[k]) if k < len(zc.intervals) else [] for k in range(maxDimension+1)]
+
+
+@pytest.mark.parametrize("algorithm",["standard","cohomology","implicit"])
+@pytest.mark.parametrize("columnar",[False,True])
+@pytest.mark.parametrize("seed",range(2))
+def test_sweep_matches_direct_computation(algorithm,columnar,seed,randomPoints):
+    points = randomPoints(30,seed)
+    sweep = RipsSweep(algorithm = algorithm,columnar = columnar)
+    thresholds = [0.1,0.25,0.4,0.6]
+    for (t,intervals) in zip(thresholds,sweep.sweep(points,thresholds,2)):
+        assert [sorted(l) for l in intervals] == explicitIntervals(points,t,2)
+    # lower thresholds and dimensions are truncations of the cached intervals
+    assert [sorted(l) for l in sweep.intervals(points,0.3)] == explicitIntervals(points,0.3,1)
+
+
+def test_sweep_cache(monkeypatch,randomPoints):
+    sweep = RipsSweep(cacheSize = 2)
+    computations = []
+    compute = sweep._compute
+    monkeypatch.setattr(sweep,"_compute",lambda rips,t,k: computations.append((t,k)) or compute(rips,t,k))
+    clouds = [randomPoints(15,seed) for seed in range(3)]
+    sweep.intervals(clouds[0],0.5,1)
+    sweep.intervals(clouds[0],0.3,1)
+    sweep.intervals(list(map(list,clouds[0])),0.2,0)
+    assert computations == [(0.5,1)]
+    # a larger threshold or dimension computes the intervals again, at the largest of both
+    sweep.intervals(clouds[0],0.2,2)
+    sweep.intervals(clouds[0],0.7,1)
+    assert computations[1:] == [(0.5,2),(0.7,2)]
+    # the least recently used cloud is forgotten first
+    sweep.intervals(clouds[1],0.5)
+    sweep.intervals(clouds[0],0.5)
+    sweep.intervals(clouds[2],0.5)
+    assert set(sweep._cache) == {sweep.key(clouds[0]),sweep.key(clouds[2])}
+    sweep.clear()
+    assert len(sweep._cache) == 0
+    assert sweep.sweep(clouds[0],[]) == []
+    assert sweep.intervals([],1.) == [[],[]]
+    with pytest.raises(ValueError):
+        RipsSweep(algorithm = "other")
@@ -0,0 +1,58 @@
+import random
+
+import pytest
+
+from persil import *
+
+
+def sortedIntervals(zc,dims):
+    return [sorted(zc.intervals[k]) for k in dims]
+
+def ripsSimplices(n,seed):
+    # simplices of a Rips complex with their degrees, in an order where update can add them
+    random.seed(seed)
+    r = RipsComplex([(random.random(),random.random()) for i in range(n)],threshold = 0.5)
+    r.compute_skeleton(2)
+    fc = r.complex
+    return sorted(((list(s.vertices),fc.degree(s)) for s in fc._simplices),key = lambda x: (x[1],len(x[0])))
+
+
+@pytest.mark.parametrize("algorithm",["standard","twist"])
+@pytest.mark.parametrize("field",[2,3])
+@pytest.mark.parametrize("seed",range(4))
+def test_update_matches_full_computation(algorithm,field,seed):
+    simplices = ripsSimplices(25,seed)
+    full = FilteredComplex()
+    for (s,d) in simplices:
+        full.insert(s,d)
+    ref = ZomorodianCarlsson(full,field = field)
+    ref.computeIntervals()
+
+    fc = FilteredComplex()
+    cut = len(simplices)//3
+    for (s,d) in simplices[:cut]:
+        fc.insert(s,d)
+    zc = ZomorodianCarlsson(fc,field = field,algorithm = algorithm)
+    zc.computeIntervals()
+    for a in range(cut,len(simplices),17):
+        for (s,d) in simplices[a:a+17]:
+            fc.insert(s,d)
+        zc.update()
+    assert sortedIntervals(zc,range(2)) == sortedIntervals(ref,range(2))
+
+
+def test_update_rejects_cohomology_and_unordered_simplices():
+    fc = FilteredComplex()
+    fc.insert([0],0)
+    fc.insert([1],0)
+    fc.insert([0,1],2)
+    zc = ZomorodianCarlsson(fc,algorithm = "cohomology")
+    zc.computeIntervals()
+    with pytest.raises(ValueError):
+        zc.update()
+    zc = ZomorodianCarlsson(fc)
+    zc.computeIntervals()
+    fc.insert([2],0)
+    fc.insert([1,2],1)
+    with pytest.raises(ValueError):
+        zc.update()
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+from numpy import inf
+
+from persil import *
+from persil.vietorisrips import euclidianDistance
+
+
+def plainValues(points,landmarks,nu,threshold):
+    # condensed edge values of the lazy witness complex, from all the distances at once
+    X = np.array(points,dtype = float)
+    D = np.sqrt(((X[:,None,:] - X[None,landmarks,:])**2).sum(axis = 2))
+    m = np.sort(D,axis = 1)[:,nu-1] if nu > 0 else np.zeros(len(X))
+    L = len(landmarks)
+    res = []
+    for a in range(L):
+        for b in range(a+1,L):
+            v = max((np.maximum(D[:,a],D[:,b]) - m).min(),0.)
+            res.append(v if v < threshold else inf)
+    return np.array(res)
+
+
+@pytest.mark.parametrize("nu",[0,1,2])
+@pytest.mark.parametrize("threshold",[None,0.2])
+@pytest.mark.parametrize("euclidian",[True,False])
+def test_witness_values(nu,threshold,euclidian,randomPoints):
+    points = randomPoints(60,nu)
+    distance = euclidianDistance if euclidian else (lambda x,y: float(np.hypot(x[0]-y[0],x[1]-y[1])))
+    w = WitnessComplex(points,landmarks = 12,distance = distance,threshold = threshold,nu = nu,seed = 1)
+    assert w.nPoints == 12 and w.nWitnesses == 60
+    assert len(set(w.landmarks.tolist())) == 12
+    ref = plainValues(points,w.landmarks,nu,threshold if threshold else inf)
+    assert np.allclose(w.distances,ref)
+    if threshold is None:
+        assert w.threshold == ref.max()+1
+
+
+def test_witness_landmarks_and_skeleton(randomPoints):
+    points = randomPoints(50,3)
+    landmarks = [0,5,7,11,20,33,49]
+    w = WitnessComplex(points,landmarks = landmarks,nu = 1)
+    assert w.landmarks.tolist() == landmarks
+    assert np.allclose(w.points,np.array(points)[landmarks])
+    # the complex is the flag complex of the edge values, built as for a Rips complex
+    w.compute_skeleton(2)
+    zc = ZomorodianCarlsson(w.complex)
+    zc.computeIntervals()
+    values = plainValues(points,landmarks,1,inf)
+    deaths = sorted(y for (x,y) in zc.intervals[0] if y < inf)
+    assert len(deaths) == len(landmarks)-1
+    assert set(deaths) <= set(values.tolist())
+
+    r = WitnessComplex(points,landmarks = 10,selection = "random",seed = 4)
+    assert r.nPoints == 10 and list(r.landmarks) == sorted(r.landmarks)
+    with pytest.raises(ValueError):
+        WitnessComplex(points,landmarks = 10,selection = "other")